@@ -0,0 +1,36 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_content_hash(apps, schema_editor):
+    FaceData = apps.get_model('ControlPanel', 'FaceData')
+
+    for face in FaceData.objects.filter(content_hash='').iterator():
+        digest = hashlib.sha256()
+        try:
+            with face.image.open('rb') as f:
+                for chunk in f.chunks():
+                    digest.update(chunk)
+        except (FileNotFoundError, ValueError):
+            # Dosyası kaybolmuş kayıt: özet boş kalır, manifest yine de listeler
+            continue
+
+        face.content_hash = digest.hexdigest()
+        face.save(update_fields=['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ControlPanel', '0004_accesslog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facedata',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Görüntü dosyasının SHA-256 özeti', max_length=64),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
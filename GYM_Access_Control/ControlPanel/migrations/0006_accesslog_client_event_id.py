@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ControlPanel', '0005_facedata_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accesslog',
+            name='client_event_id',
+            field=models.CharField(blank=True, help_text='İstemcinin ürettiği olay kimliği (tekrar gönderimleri ayırt eder)', max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate, TruncHour
+
+
+def backfill_access_counts(apps, schema_editor):
+    AccessLog = apps.get_model('ControlPanel', 'AccessLog')
+    AccessLogDailyCount = apps.get_model('ControlPanel', 'AccessLogDailyCount')
+    AccessLogHourlyCount = apps.get_model('ControlPanel', 'AccessLogHourlyCount')
+
+    daily = (AccessLog.objects.annotate(day=TruncDate('entry_time'))
+             .values('day', 'customer_id').annotate(total=Count('id')).order_by())
+    AccessLogDailyCount.objects.bulk_create(
+        (AccessLogDailyCount(day=row['day'], customer_id=row['customer_id'], count=row['total']) for row in daily),
+        batch_size=1000
+    )
+
+    hourly = (AccessLog.objects.annotate(hour=TruncHour('entry_time'))
+              .values('hour').annotate(total=Count('id')).order_by())
+    AccessLogHourlyCount.objects.bulk_create(
+        (AccessLogHourlyCount(hour=row['hour'], count=row['total']) for row in hourly),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ControlPanel', '0006_accesslog_client_event_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessLogDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Günlük Geçiş Sayısı',
+                'verbose_name_plural': 'Günlük Geçiş Sayıları',
+            },
+        ),
+        migrations.CreateModel(
+            name='AccessLogHourlyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Saatlik Geçiş Sayısı',
+                'verbose_name_plural': 'Saatlik Geçiş Sayıları',
+                'ordering': ['hour'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='accesslog',
+            index=models.Index(fields=['entry_time'], name='accesslog_entry_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accesslog',
+            index=models.Index(fields=['customer', 'entry_time'], name='accesslog_customer_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accesslog',
+            index=models.Index(fields=['confidence_score'], name='accesslog_confidence_idx'),
+        ),
+        migrations.AddField(
+            model_name='accesslogdailycount',
+            name='customer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_access_counts', to='ControlPanel.customer'),
+        ),
+        migrations.AddIndex(
+            model_name='accesslogdailycount',
+            index=models.Index(fields=['day', '-count'], name='accesslog_daily_top_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='accesslogdailycount',
+            constraint=models.UniqueConstraint(fields=('day', 'customer'), name='accesslog_daily_unique'),
+        ),
+        migrations.RunPython(backfill_access_counts, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,25 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Count
+from django.db.models.functions import TruncDate, TruncHour
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.utils import timezone
 from .manager import CustomUserManager
+from collections import Counter
+import hashlib
+
+
+def compute_content_hash(file_field) -> str:
+    """Yüklenen dosyanın SHA-256 özetini parça parça okuyarak hesaplar"""
+    digest = hashlib.sha256()
+    file_field.open('rb')
+    try:
+        for chunk in file_field.chunks():
+            digest.update(chunk)
+    finally:
+        file_field.seek(0)
+    return digest.hexdigest()
 
 
 class CustomBaseUser(AbstractBaseUser,PermissionsMixin):
@@ -90,6 +108,28 @@ class FaceData(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="face_data")
     image = models.ImageField(upload_to='faces/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="Görüntü dosyasının SHA-256 özeti")
+
+    def save(self, *args, **kwargs):
+        if self.image and not self.content_hash:
+            self.content_hash = compute_content_hash(self.image)
+        super().save(*args, **kwargs)
+
+class AccessLogQuerySet(models.QuerySet):
+
+    def delete(self):
+        """
+        Silinen kayıtları sayaçlardan gruplanmış sorgularla düşer, ardından tek DELETE ile siler.
+        Kayıtlar belleğe alınmaz; sorgu sayısı satır sayısına değil gün / saat sayısına bağlıdır
+        (admin toplu silme ve eski kayıt temizliği bu yoldan geçer).
+        """
+        with transaction.atomic():
+            discount_access_counts(self)
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class AccessLog(models.Model):
     """Geçiş kontrol kayıtları"""
@@ -98,11 +138,123 @@ class AccessLog(models.Model):
     confidence_score = models.FloatField(help_text="Tanınma güven skoru (0-1)")
     camera_location = models.CharField(max_length=100, blank=True, help_text="Kamera konumu")
     snapshot = models.ImageField(upload_to='access_snapshots/', null=True, blank=True)
+    client_event_id = models.CharField(max_length=64, null=True, blank=True, unique=True,
+                                       help_text="İstemcinin ürettiği olay kimliği (tekrar gönderimleri ayırt eder)")
     
     class Meta:
         verbose_name = "Geçiş Kaydı"
         verbose_name_plural = "Geçiş Kayıtları"
         ordering = ['-entry_time']
+        indexes = [
+            models.Index(fields=['entry_time'], name='accesslog_entry_time_idx'),
+            models.Index(fields=['customer', 'entry_time'], name='accesslog_customer_time_idx'),
+            models.Index(fields=['confidence_score'], name='accesslog_confidence_idx'),
+        ]
     
+    objects = AccessLogQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.customer.full_name} - {self.entry_time.strftime('%Y-%m-%d %H:%M:%S')}"
+
+    def save(self, *args, **kwargs):
+        # Yeni kayıtlar sayaçlara aynı transaction'da eklenir
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                record_access_counts([self])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            record_access_counts([self], -1)
+            return super().delete(*args, **kwargs)
+
+
+class AccessLogDailyCount(models.Model):
+    """Müşteri başına günlük geçiş sayısı (dashboard için güncel tutulan özet)"""
+    day = models.DateField()
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='daily_access_counts')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Günlük Geçiş Sayısı"
+        verbose_name_plural = "Günlük Geçiş Sayıları"
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'customer'], name='accesslog_daily_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['day', '-count'], name='accesslog_daily_top_idx'),
+        ]
+
+
+class AccessLogHourlyCount(models.Model):
+    """Saatlik toplam geçiş sayısı"""
+    hour = models.DateTimeField(unique=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Saatlik Geçiş Sayısı"
+        verbose_name_plural = "Saatlik Geçiş Sayıları"
+        ordering = ['hour']
+
+
+def _increment_count(model, counts: Counter):
+    for key, amount in counts.items():
+        lookup = dict(key)
+        if model.objects.filter(**lookup).update(count=F('count') + amount) or amount <= 0:
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(count=amount, **lookup)
+        except IntegrityError:
+            # Aynı anda başka bir istek satırı oluşturdu
+            model.objects.filter(**lookup).update(count=F('count') + amount)
+
+
+def record_access_counts(access_logs, step: int = 1):
+    """
+    Geçiş kayıtlarını günlük ve saatlik sayaçlara ekler (step=-1 ile düşer).
+    Kayıtla aynı transaction'da çağrılmalıdır.
+    """
+    daily = Counter()
+    hourly = Counter()
+    for access_log in access_logs:
+        local_time = timezone.localtime(access_log.entry_time)
+        daily[(('day', local_time.date()), ('customer_id', access_log.customer_id))] += step
+        hourly[(('hour', local_time.replace(minute=0, second=0, microsecond=0)),)] += step
+
+    _increment_count(AccessLogDailyCount, daily)
+    _increment_count(AccessLogHourlyCount, hourly)
+
+
+def discount_access_counts(access_logs, include_daily: bool = True):
+    """
+    Kayıt kümesini (QuerySet) sayaçlardan düşer; gruplama veritabanında yapılır.
+    Silmeyle aynı transaction'da, silmeden önce çağrılmalıdır.
+    """
+    tzinfo = timezone.get_current_timezone()
+    access_logs = access_logs.order_by()
+
+    if include_daily:
+        daily = Counter()
+        rows = (access_logs.annotate(day=TruncDate('entry_time', tzinfo=tzinfo))
+                .values('day', 'customer_id').annotate(total=Count('pk')))
+        for row in rows:
+            daily[(('day', row['day']), ('customer_id', row['customer_id']))] -= row['total']
+        _increment_count(AccessLogDailyCount, daily)
+
+    hourly = Counter()
+    rows = access_logs.annotate(hour=TruncHour('entry_time', tzinfo=tzinfo)).values('hour').annotate(total=Count('pk'))
+    for row in rows:
+        hourly[(('hour', row['hour']),)] -= row['total']
+    _increment_count(AccessLogHourlyCount, hourly)
+
+
+@receiver(pre_delete, sender=Customer)
+def _discount_customer_access_logs(sender, instance, **kwargs):
+    """
+    Müşteri silinince geçiş kayıtları zincirleme (sinyalsiz, tek DELETE ile) silinir;
+    günlük sayaçlar da müşteriye bağlı olduğundan birlikte silinir, yalnızca saatlik
+    toplamlar tek gruplanmış sorguyla düşülür.
+    """
+    discount_access_counts(AccessLog.objects.filter(customer=instance), include_daily=False)
@@ -0,0 +1,120 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+import base64
+import json
+
+
+def encode_cursor(access_log, reverse: bool = False) -> str:
+    """Kaydın (entry_time, id) konumunu URL'de taşınabilir bir cursor'a çevirir"""
+    position = {'t': access_log.entry_time.isoformat(), 'id': access_log.pk, 'r': reverse}
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str):
+    """
+    Returns:
+        (entry_time, id, geriye mi) - bozuk cursor için ValueError
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        entry_time = parse_datetime(position['t'])
+        pk = int(position['id'])
+        reverse = bool(position.get('r', False))
+    except (TypeError, KeyError, UnicodeError, ValueError) as e:
+        raise ValueError("Geçersiz cursor") from e
+
+    if entry_time is None:
+        raise ValueError("Geçersiz cursor")
+    return entry_time, pk, reverse
+
+
+class KeysetPage:
+    """Bir sayfanın kayıtları ve komşu sayfaların cursor'ları"""
+
+    def __init__(self, items: list, next_cursor: str = None, previous_cursor: str = None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+def keyset_paginate(queryset, cursor: str = None, page_size: int = 50) -> KeysetPage:
+    """
+    Kayıtları yeniden eskiye (entry_time, id) sırasıyla sayfalar.
+
+    OFFSET kullanılmaz: sonraki sayfa son kaydın konumundan sonrası olarak filtrelenir,
+    böylece her sayfa entry_time indeksinde kısa bir aralık taramasıdır ve derin
+    sayfalar da ilk sayfa kadar hızlıdır. page_size + 1 kayıt okunarak devamı olup
+    olmadığı anlaşılır (COUNT sorgusu yok).
+    """
+    position = decode_cursor(cursor) if cursor else None
+    reverse = position is not None and position[2]
+
+    if reverse:
+        # Önceki (daha yeni) sayfa: ters sırada okunur, sonra çevrilir
+        entry_time, pk, _ = position
+        queryset = queryset.filter(Q(entry_time__gt=entry_time) | Q(entry_time=entry_time, pk__gt=pk))
+        queryset = queryset.order_by('entry_time', 'pk')
+    else:
+        if position is not None:
+            entry_time, pk, _ = position
+            queryset = queryset.filter(Q(entry_time__lt=entry_time) | Q(entry_time=entry_time, pk__lt=pk))
+        queryset = queryset.order_by('-entry_time', '-pk')
+
+    items = list(queryset[:page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    if reverse:
+        items.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, position is not None
+
+    if not items:
+        return KeysetPage(items)
+
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(items[-1]) if has_next else None,
+        previous_cursor=encode_cursor(items[0], reverse=True) if has_previous else None
+    )
+
+
+class AccessLogKeysetPagination(BasePagination):
+    """REST listeleri için (entry_time, id) keyset sayfalama"""
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = keyset_paginate(queryset, request.query_params.get(self.cursor_query_param),
+                                        self.get_page_size(request))
+        except ValueError:
+            raise NotFound("Geçersiz cursor")
+        return self.page.items
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_link(self, cursor: str):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.page.next_cursor),
+            'previous': self.get_link(self.page.previous_cursor),
+            'results': data
+        })
@@ -0,0 +1,15 @@
+from rest_framework.parsers import FileUploadParser
+
+
+class JPEGUploadParser(FileUploadParser):
+    """
+    Ham 'image/jpeg' gövdesini dosya olarak okur (ör. curl -T snap.jpg).
+
+    FileUploadParser dosya adını Content-Disposition başlığından bekler ve başlık yoksa
+    isteği reddeder; snapshot'ın adı sunucuda verildiği için burada ad üretilir.
+    Gövde yine Django'nun yükleme işleyicileriyle parça parça okunur.
+    """
+    media_type = 'image/jpeg'
+
+    def get_filename(self, stream, media_type, parser_context):
+        return super().get_filename(stream, media_type, parser_context) or 'snapshot.jpg'
@@ -18,6 +18,16 @@ class CustomerFaceSerializer(serializers.ModelSerializer):
         model = Customer
         fields = ['id', 'full_name', 'face_data']
         
+class FaceManifestSerializer(serializers.ModelSerializer):
+    """Eğitim senkronizasyonu için hafif yüz kaydı (isimler ayrı listede gönderilir)"""
+    image = serializers.ImageField(use_url = True)
+    customer_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = FaceData
+        fields = ['id', 'customer_id', 'image', 'content_hash', 'uploaded_at']
+
+
 class AccessLogSerializer(serializers.ModelSerializer):
     customer_name = serializers.CharField(source='customer.full_name', read_only=True)
     
@@ -34,6 +44,8 @@ class AccessLogCreateSerializer(serializers.Serializer):
     confidence_score = serializers.FloatField(min_value=0, max_value=1)
     camera_location = serializers.CharField(max_length=100, required=False, default="Ana Giriş")
     snapshot_base64 = serializers.CharField(required=False, allow_blank=True)
+    client_event_id = serializers.CharField(max_length=64, required=False)
+    entry_time = serializers.DateTimeField(required=False)
     
     def create(self, validated_data):
         from django.core.files.base import ContentFile
@@ -42,6 +54,13 @@ class AccessLogCreateSerializer(serializers.Serializer):
         customer_id = validated_data.pop('customer_id')
         snapshot_base64 = validated_data.pop('snapshot_base64', None)
         
+        # Aynı olay tekrar gönderildiyse mevcut kayıt döner
+        client_event_id = validated_data.get('client_event_id')
+        if client_event_id:
+            existing = AccessLog.objects.filter(client_event_id=client_event_id).first()
+            if existing is not None:
+                return existing
+        
         try:
             customer = Customer.objects.get(id=customer_id, is_active=True)
         except Customer.DoesNotExist:
@@ -65,3 +84,13 @@ class AccessLogCreateSerializer(serializers.Serializer):
                 pass  # Snapshot kaydedilemese bile devam et
         
         return access_log
+
+
+class AccessLogEventSerializer(serializers.Serializer):
+    """Toplu geçiş kaydı gönderimindeki tek olay (müşteri kontrolü toplu yapılır)"""
+    client_event_id = serializers.CharField(max_length=64)
+    customer_id = serializers.IntegerField()
+    confidence_score = serializers.FloatField(min_value=0, max_value=1)
+    camera_location = serializers.CharField(max_length=100, required=False, default="Ana Giriş")
+    entry_time = serializers.DateTimeField(required=False)
+    snapshot_base64 = serializers.CharField(required=False, allow_blank=True)
@@ -1,3 +1,332 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+from datetime import date, timedelta, timezone as dt_timezone
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import QueryDict
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import (CustomBaseUser, Customer, AccessLog, AccessLogDailyCount, AccessLogHourlyCount,
+                     record_access_counts)
+from .views import AccessLogViewSet, local_day_range
+
+MEDIA_ROOT = tempfile.mkdtemp()
+# En küçük geçerli JPEG başlığı (sunucu yalnızca SOI işaretini kontrol eder)
+JPEG_BYTES = b'\xff\xd8\xff\xe0' + b'\x00' * 64 + b'\xff\xd9'
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class AccessLogTestCase(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = Customer.objects.create(full_name="Test Üye")
+
+    def event(self, event_id, **extra):
+        return {'client_event_id': event_id, 'customer_id': self.customer.id,
+                'confidence_score': 0.9, 'camera_location': "Ana Giriş", **extra}
+
+    def daily_count(self):
+        counts = AccessLogDailyCount.objects.filter(customer=self.customer)
+        return sum(counts.values_list('count', flat=True))
+
+
+class AccessLogBulkTests(AccessLogTestCase):
+
+    def post_bulk(self, events):
+        return self.client.post(reverse('access-log-bulk'), {'events': events}, format='json')
+
+    def test_retry_is_idempotent(self):
+        response = self.post_bulk([self.event('a'), self.event('b')])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], ['a', 'b'])
+
+        response = self.post_bulk([self.event('a'), self.event('c')])
+        self.assertEqual(response.data['created'], ['c'])
+        self.assertEqual(response.data['duplicates'], ['a'])
+
+        self.assertEqual(AccessLog.objects.count(), 3)
+        self.assertEqual(self.daily_count(), 3)
+        self.assertEqual(sum(AccessLogHourlyCount.objects.values_list('count', flat=True)), 3)
+
+    def test_invalid_and_unknown_customer_rejected(self):
+        response = self.post_bulk([self.event('a', confidence_score=2),
+                                   self.event('b', customer_id=self.customer.id + 100)])
+        self.assertEqual(response.data['created'], [])
+        self.assertEqual([item['client_event_id'] for item in response.data['rejected']], ['a', 'b'])
+        self.assertEqual(AccessLog.objects.count(), 0)
+
+    def test_concurrent_insert_is_not_counted(self):
+        # Başka bir isteğin önce eklediği olay: eklenmiş sayılmaz, sayaçlara yazılmaz
+        AccessLog.objects.create(customer=self.customer, confidence_score=0.9, client_event_id='a')
+        logs = [AccessLog(customer=self.customer, confidence_score=0.9, client_event_id=event_id)
+                for event_id in ('a', 'b')]
+
+        inserted = AccessLogViewSet._insert_access_logs(logs)
+
+        self.assertEqual([access_log.client_event_id for access_log in inserted], ['b'])
+        self.assertEqual(AccessLog.objects.count(), 2)
+
+    def test_snapshot_saved_only_for_inserted_rows(self):
+        snapshot = base64.b64encode(JPEG_BYTES).decode('ascii')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_bulk([self.event('a', snapshot_base64=snapshot)])
+        self.assertTrue(AccessLog.objects.get(client_event_id='a').snapshot)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.post_bulk([self.event('a', snapshot_base64=snapshot)])
+        self.assertEqual(response.data['duplicates'], ['a'])
+        self.assertEqual(callbacks, [])
+
+
+class AccessLogCounterTests(AccessLogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for event_id in ('a', 'b', 'c'):
+            AccessLog.objects.create(customer=self.customer, confidence_score=0.9, client_event_id=event_id)
+
+    def hourly_count(self):
+        return sum(AccessLogHourlyCount.objects.values_list('count', flat=True))
+
+    def test_instance_delete(self):
+        AccessLog.objects.get(client_event_id='a').delete()
+        self.assertEqual(self.daily_count(), 2)
+        self.assertEqual(self.hourly_count(), 2)
+
+    def test_queryset_delete(self):
+        AccessLog.objects.filter(client_event_id__in=['a', 'b']).delete()
+        self.assertEqual(self.daily_count(), 1)
+        self.assertEqual(self.hourly_count(), 1)
+
+    def test_customer_cascade(self):
+        other = Customer.objects.create(full_name="Diğer Üye")
+        AccessLog.objects.create(customer=other, confidence_score=0.9, client_event_id='d')
+        self.assertEqual(self.hourly_count(), 4)
+
+        self.customer.delete()
+        self.assertFalse(AccessLogDailyCount.objects.filter(customer_id=self.customer.id).exists())
+        self.assertEqual(self.hourly_count(), 1)
+
+    def test_delete_queries_do_not_grow_with_rows(self):
+        def delete_queries(customer, row_count):
+            logs = [AccessLog(customer=customer, confidence_score=0.9) for _ in range(row_count)]
+            record_access_counts(AccessLog.objects.bulk_create(logs))
+            with CaptureQueriesContext(connection) as queries:
+                AccessLog.objects.filter(customer=customer).delete()
+            return len(queries)
+
+        small = delete_queries(Customer.objects.create(full_name="Az"), 2)
+        large = delete_queries(Customer.objects.create(full_name="Çok"), 40)
+        self.assertEqual(small, large)
+
+        with CaptureQueriesContext(connection) as small_cascade:
+            Customer.objects.create(full_name="Boş").delete()
+        with CaptureQueriesContext(connection) as large_cascade:
+            self.customer.delete()
+        self.assertEqual(len(small_cascade), len(large_cascade))
+
+    def test_deleting_every_row_zeroes_counters(self):
+        AccessLog.objects.all().delete()
+        self.assertEqual(self.daily_count(), 0)
+        self.assertEqual(self.hourly_count(), 0)
+
+    def test_local_day_range_spans_dst_change(self):
+        with timezone.override('Europe/Istanbul'):
+            start, end = local_day_range(date(2016, 3, 27))
+        # Aynı tzinfo'lu datetime farkı saat farkını yok sayar: UTC'de karşılaştırılır
+        self.assertEqual(end.astimezone(dt_timezone.utc) - start.astimezone(dt_timezone.utc), timedelta(hours=23))
+
+
+class AccessLogSnapshotTests(AccessLogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.access_log = AccessLog.objects.create(customer=self.customer, confidence_score=0.9, client_event_id='a')
+        self.url = reverse('access-log-snapshot', kwargs={'client_event_id': 'a'})
+
+    def test_raw_jpeg_without_filename(self):
+        # curl -T snap.jpg -H 'Content-Type: image/jpeg' gibi: Content-Disposition yok
+        response = self.client.put(self.url, JPEG_BYTES, content_type='image/jpeg')
+        self.assertEqual(response.status_code, 204)
+
+        self.access_log.refresh_from_db()
+        self.assertTrue(self.access_log.snapshot.name.endswith('.jpg'))
+        with self.access_log.snapshot.open('rb') as f:
+            self.assertEqual(f.read(), JPEG_BYTES)
+
+    def test_multipart_upload(self):
+        upload = SimpleUploadedFile('snap.jpg', JPEG_BYTES, content_type='image/jpeg')
+        response = self.client.put(self.url, {'snapshot': upload}, format='multipart')
+        self.assertEqual(response.status_code, 204)
+
+    def test_repeat_upload_keeps_existing_file(self):
+        self.client.put(self.url, JPEG_BYTES, content_type='image/jpeg')
+        self.access_log.refresh_from_db()
+        name = self.access_log.snapshot.name
+
+        self.client.put(self.url, JPEG_BYTES, content_type='image/jpeg')
+        self.access_log.refresh_from_db()
+        self.assertEqual(self.access_log.snapshot.name, name)
+
+    def test_rejects_non_jpeg_oversized_and_unknown(self):
+        response = self.client.put(self.url, b'GIF89a' + b'\x00' * 16, content_type='image/jpeg')
+        self.assertEqual(response.status_code, 400)
+
+        oversized = JPEG_BYTES + b'\x00' * AccessLogViewSet.SNAPSHOT_MAX_BYTES
+        response = self.client.put(self.url, oversized, content_type='image/jpeg')
+        self.assertEqual(response.status_code, 413)
+
+        url = reverse('access-log-snapshot', kwargs={'client_event_id': 'yok'})
+        self.assertEqual(self.client.put(url, JPEG_BYTES, content_type='image/jpeg').status_code, 404)
+
+
+class AccessLogKeysetPaginationTests(AccessLogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # Aynı entry_time'lı kayıtlar da sırayı id ile korumalı
+        times = [now, now, now - timedelta(minutes=1), now - timedelta(minutes=2), now - timedelta(minutes=2),
+                 now - timedelta(minutes=2), now - timedelta(days=1)]
+        for i, entry_time in enumerate(times):
+            AccessLog.objects.create(customer=self.customer, confidence_score=0.9, entry_time=entry_time,
+                                     client_event_id=str(i))
+        self.expected = list(AccessLog.objects.order_by('-entry_time', '-pk').values_list('pk', flat=True))
+
+    def walk(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            url = response.data['next']
+        return pages
+
+    def test_forward_pages_cover_every_row_once(self):
+        pages = self.walk(reverse('access-log-list') + '?page_size=3')
+
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        self.assertEqual([item['id'] for page in pages for item in page['results']], self.expected)
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_returns_same_page(self):
+        pages = self.walk(reverse('access-log-list') + '?page_size=3')
+
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [item['id'] for item in pages[1]['results']])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['id'] for item in response.data['results']], self.expected[:3])
+        self.assertIsNone(response.data['previous'])
+
+    def test_rows_inserted_between_pages_do_not_shift(self):
+        first = self.client.get(reverse('access-log-list') + '?page_size=3').data
+        AccessLog.objects.create(customer=self.customer, confidence_score=0.9, client_event_id='yeni')
+
+        rest = self.walk(first['next'])
+
+        self.assertEqual([item['id'] for page in [first] + rest for item in page['results']], self.expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('access-log-list') + '?cursor=bozuk')
+        self.assertEqual(response.status_code, 404)
+
+    def test_today_is_paginated(self):
+        pages = self.walk(reverse('access-log-today') + '?page_size=4')
+        today = [pk for pk in self.expected
+                 if timezone.localtime(AccessLog.objects.get(pk=pk).entry_time).date() == timezone.localdate()]
+        self.assertEqual([item['id'] for page in pages for item in page['results']], today)
+
+    def test_html_view_keeps_filters_in_cursor_links(self):
+        user = CustomBaseUser.objects.create_user(email='admin@example.com', username='admin', password='x')
+        self.client.force_login(user)
+
+        with mock.patch('ControlPanel.views.ACCESS_LOGS_PAGE_SIZE', 3):
+            # Bozuk cursor ilk sayfaya döner
+            response = self.client.get(reverse('access-logs'), {'customer': 'Test', 'cursor': 'bozuk'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([log.pk for log in response.context['logs']], self.expected[:3])
+
+            next_query = QueryDict(response.context['next_query'])
+            self.assertEqual(next_query['customer'], 'Test')
+            response = self.client.get(reverse('access-logs') + '?' + response.context['next_query'])
+            self.assertEqual([log.pk for log in response.context['logs']], self.expected[3:6])
+
+
+class AccessLogExportTests(AccessLogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.customer.full_name = 'Şule "Test", Yılmaz'
+        self.customer.save()
+        other = Customer.objects.create(full_name="Diğer Üye")
+        now = timezone.now()
+        self.logs = [
+            AccessLog.objects.create(customer=self.customer, confidence_score=0.9, entry_time=now,
+                                     client_event_id='a', snapshot='access_snapshots/a.jpg'),
+            AccessLog.objects.create(customer=other, confidence_score=0.4, entry_time=now - timedelta(minutes=1),
+                                     client_event_id='b'),
+            AccessLog.objects.create(customer=self.customer, confidence_score=0.8,
+                                     entry_time=now - timedelta(days=3), client_event_id='c'),
+        ]
+
+    def export(self, **params):
+        response = self.client.get(reverse('access-log-export'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv(self):
+        response, content = self.export()
+
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('attachment; filename="access_logs_', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([int(row['id']) for row in rows], [log.pk for log in self.logs])
+        # Virgül ve tırnak içeren isim tek sütunda kalır
+        self.assertEqual(rows[0]['customer_name'], self.customer.full_name)
+        self.assertTrue(rows[0]['snapshot'].endswith('access_snapshots/a.jpg'))
+        self.assertEqual(rows[1]['snapshot'], '')
+        self.assertEqual(rows[0]['entry_time'], timezone.localtime(self.logs[0].entry_time).isoformat())
+
+    def test_ndjson(self):
+        response, content = self.export(export_format='ndjson')
+
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([record['id'] for record in records], [log.pk for log in self.logs])
+        self.assertEqual(records[0]['customer_name'], self.customer.full_name)
+        self.assertEqual(records[1]['confidence_score'], 0.4)
+        self.assertEqual(set(records[0]), set(AccessLogViewSet.EXPORT_HEADER))
+
+    def test_filters_match_list_page(self):
+        _, content = self.export(export_format='ndjson', customer='test', min_confidence='0.85')
+        self.assertEqual([json.loads(line)['id'] for line in content.splitlines()], [self.logs[0].pk])
+
+        _, content = self.export(export_format='ndjson', date_from=str(timezone.localdate()))
+        self.assertEqual(len(content.splitlines()), 2)
+
+        # Geçersiz filtre değerleri yok sayılır
+        _, content = self.export(export_format='ndjson', min_confidence='yüksek', date_to='dün')
+        self.assertEqual(len(content.splitlines()), 3)
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('access-log-export'), {'export_format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
 
-# Create your tests here.
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from .views import AppUser_LoginView, access_log_dashboard, AccessLogViewSet, access_logs_view
 from django.contrib.auth.views import LogoutView
-from .views import Customers_View, delete_customer, CustomerFaceListView
+from .views import Customers_View, delete_customer, CustomerFaceListView, CustomerFaceManifestView
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
@@ -14,6 +14,7 @@ urlpatterns = [
         path('customers/' , Customers_View, name="Customers"),
         path('delete-customer/',delete_customer, name="delete-customer"),
         path('api/customers/faces/', CustomerFaceListView.as_view(),name="customer-faces"),
+        path('api/customers/faces/manifest/', CustomerFaceManifestView.as_view(), name="customer-faces-manifest"),
         path('api/', include(router.urls)),
         path('access-logs/', access_logs_view, name='access-logs'),
         path('', access_log_dashboard, name='access-dashboard')
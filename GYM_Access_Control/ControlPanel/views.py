@@ -5,20 +5,34 @@ from .forms import AppUser_LoginForm
 from .models import Customer
 from .models import CustomerType
 from .models import FaceData
-from .models import AccessLog
+from .models import AccessLog, AccessLogDailyCount, AccessLogHourlyCount, record_access_counts
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .serializer import CustomerFaceSerializer, AccessLogSerializer, AccessLogCreateSerializer
+from .pagination import AccessLogKeysetPagination, keyset_paginate
+from .parsers import JPEGUploadParser
+from rest_framework.utils.encoders import JSONEncoder
+from .serializer import CustomerFaceSerializer, FaceManifestSerializer, AccessLogSerializer, AccessLogCreateSerializer, AccessLogEventSerializer
 from django.contrib.auth.decorators import login_required
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import FileUploadParser, MultiPartParser
 from rest_framework.response import Response
 from django.shortcuts import render
-from django.db.models import Count
+from django.db import transaction, IntegrityError
+from django.db.models import Sum
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import parse_etags, quote_etag
+from datetime import datetime, time, timedelta
+import base64
+import csv
+import hashlib
+import itertools
+import json
 import subprocess
 import threading
 import logging
@@ -26,8 +40,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def retrain_model_async():
-    """Background'da modeli yeniden eğit"""
+def retrain_model_async(incremental=True):
+    """Background'da modeli yeniden eğit (varsayılan: yalnızca değişen yüz kayıtları)"""
     try:
         import os
         import sys
@@ -46,8 +60,12 @@ def retrain_model_async():
 
         logger.info(f"Model eğitimi başlatılıyor: {train_script}")
 
+        command = [venv_python, train_script]
+        if incremental:
+            command.append('--incremental')
+
         result = subprocess.run(
-            [venv_python, train_script],
+            command,
             cwd=recognition_service_path,
             capture_output=True,
             text=True,
@@ -125,6 +143,9 @@ def delete_customer(request):
         try:
             customer = Customer.objects.get(id=customer_id)
             customer.delete()
+
+            # Silinen müşterinin encoding'lerini galeriden çıkar (background'da)
+            threading.Thread(target=retrain_model_async, daemon=True).start()
             return JsonResponse({'success': True})
         except Customer.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Customer not found'})
@@ -138,79 +159,411 @@ class CustomerFaceListView(APIView):
         customers = Customer.objects.prefetch_related('face_data').all()
         serializer = CustomerFaceSerializer(customers, many=True, context={'request': request})
         return Response(serializer.data)
+
+
+class CustomerFaceManifestView(APIView):
+    """
+    Eğitim senkronizasyonu için koşullu yüz manifest'i.
+
+    ETag tüm yüz kayıtlarının (id, müşteri, içerik özeti, yükleme zamanı) ve müşteri
+    isimlerinin özetidir; If-None-Match eşleşirse gövde üretilmeden 304 döner.
+    ?since=<ISO zaman> verilirse yalnızca o andan sonra yüklenen yüzler gönderilir,
+    silinmeleri görebilmek için tüm yüz id'leri her zaman listelenir.
+    """
+
+    def get(self, request):
+        faces = FaceData.objects.order_by('customer_id', 'id')
+        face_rows = list(faces.values_list('id', 'customer_id', 'content_hash', 'uploaded_at'))
+        customers = list(Customer.objects.order_by('id').values_list('id', 'full_name'))
+
+        state = json.dumps([face_rows, customers], default=str).encode('utf-8')
+        etag = quote_etag(hashlib.sha256(state).hexdigest())
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        since = request.query_params.get('since')
+        if since:
+            since = parse_datetime(since)
+            if since is None:
+                return Response({'error': "Geçersiz 'since' değeri"}, status=status.HTTP_400_BAD_REQUEST)
+            faces = faces.filter(uploaded_at__gt=since)
+
+        serializer = FaceManifestSerializer(faces.only('id', 'customer_id', 'image', 'content_hash', 'uploaded_at'),
+                                            many=True, context={'request': request})
+
+        return Response({
+            'generated_at': timezone.now().isoformat(),
+            'since': since.isoformat() if since else None,
+            'customers': [{'id': customer_id, 'full_name': full_name} for customer_id, full_name in customers],
+            'face_ids': [row[0] for row in face_rows],
+            'faces': serializer.data
+        }, headers={'ETag': etag})
     
 
 
 
+# Geçiş kaydı listelerinde okunan sütunlar
+ACCESS_LOG_LIST_FIELDS = ('id', 'customer_id', 'customer__full_name', 'entry_time', 'confidence_score',
+                          'camera_location', 'snapshot')
+
+
 class AccessLogViewSet(viewsets.ModelViewSet):
     """Geçiş kayıtları API ViewSet"""
     queryset = AccessLog.objects.select_related('customer').all()
     serializer_class = AccessLogSerializer
+    pagination_class = AccessLogKeysetPagination
     
+    # Akışla dışa aktarımda veritabanından tek seferde okunan kayıt
+    STREAM_CHUNK_SIZE = 1000
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'today', 'stream'):
+            queryset = queryset.only(*ACCESS_LOG_LIST_FIELDS)
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'create':
             return AccessLogCreateSerializer
         return AccessLogSerializer
     
+    # Tek toplu istekte kabul edilen en fazla olay
+    BULK_MAX_EVENTS = 500
+    # Yüklenebilecek en büyük snapshot (bayt)
+    SNAPSHOT_MAX_BYTES = 2 * 1024 * 1024
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Toplu geçiş kaydı: müşteriler tek sorguda doğrulanır, kayıtlar tek transaction'da eklenir.
+        Daha önce kaydedilmiş client_event_id'ler tekrar yazılmaz (tekrar gönderimler güvenlidir).
+        """
+        events = request.data.get('events') if isinstance(request.data, dict) else request.data
+        if not isinstance(events, list):
+            return Response({'detail': "'events' listesi bekleniyor"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(events) > self.BULK_MAX_EVENTS:
+            return Response({'detail': f"En fazla {self.BULK_MAX_EVENTS} olay gönderilebilir"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        valid, rejected = [], []
+        for event in events:
+            serializer = AccessLogEventSerializer(data=event)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+            else:
+                event_id = event.get('client_event_id') if isinstance(event, dict) else None
+                rejected.append({'client_event_id': event_id, 'errors': serializer.errors})
+
+        event_ids = {event['client_event_id'] for event in valid}
+        seen = set(AccessLog.objects.filter(client_event_id__in=event_ids).values_list('client_event_id', flat=True))
+        customers = Customer.objects.filter(is_active=True).in_bulk({event['customer_id'] for event in valid})
+
+        logs, duplicates, snapshots = [], [], {}
+        for event in valid:
+            event_id = event['client_event_id']
+            if event_id in seen:
+                duplicates.append(event_id)
+                continue
+
+            customer = customers.get(event['customer_id'])
+            if customer is None:
+                rejected.append({'client_event_id': event_id,
+                                 'errors': {'customer_id': ["Müşteri bulunamadı veya aktif değil"]}})
+                continue
+
+            seen.add(event_id)
+            access_log = AccessLog(
+                customer=customer,
+                entry_time=event.get('entry_time') or timezone.now(),
+                confidence_score=event['confidence_score'],
+                camera_location=event['camera_location'],
+                client_event_id=event_id
+            )
+
+            if event.get('snapshot_base64'):
+                snapshots[event_id] = event['snapshot_base64']
+            logs.append(access_log)
+
+        with transaction.atomic():
+            inserted = self._insert_access_logs(logs)
+            # Sayaçlara yalnızca gerçekten eklenen kayıtlar yazılır
+            record_access_counts(inserted)
+            # Snapshot dosyaları yalnızca eklenen kayıtlar için ve commit'ten sonra yazılır
+            if snapshots:
+                transaction.on_commit(lambda: self._save_bulk_snapshots(inserted, snapshots))
+
+        inserted_ids = {access_log.client_event_id for access_log in inserted}
+        created = [access_log.client_event_id for access_log in logs if access_log.client_event_id in inserted_ids]
+        # Eşzamanlı bir tekrar gönderimin önce eklediği olaylar
+        duplicates.extend(access_log.client_event_id for access_log in logs
+                          if access_log.client_event_id not in inserted_ids)
+
+        return Response({'created': created, 'duplicates': duplicates, 'rejected': rejected})
+
+    @staticmethod
+    def _insert_access_logs(logs):
+        """
+        Kayıtları ekler; aynı client_event_id'yi eşzamanlı bir istek önce eklediyse o kayıt atlanır
+
+        Returns:
+            Bu istekte eklenen kayıtlar
+        """
+        try:
+            with transaction.atomic():
+                AccessLog.objects.bulk_create(logs)
+            return logs
+        except IntegrityError:
+            pass
+
+        # Çakışma var: hangi kayıtların eklendiğini bilmek için tek tek (savepoint ile) eklenir
+        inserted = []
+        for access_log in logs:
+            try:
+                with transaction.atomic():
+                    AccessLog.objects.bulk_create([access_log])
+            except IntegrityError:
+                continue
+            inserted.append(access_log)
+        return inserted
+
+    @staticmethod
+    def _save_bulk_snapshots(access_logs, snapshots: dict):
+        """Toplu istekte gelen base64 snapshot'ları eklenen kayıtlara yazar (bulk_create dosya kaydetmez)"""
+        for access_log in access_logs:
+            data = snapshots.get(access_log.client_event_id)
+            if not data:
+                continue
+            try:
+                access_log.snapshot.save(f"access_{access_log.customer_id}_{access_log.client_event_id}.jpg",
+                                         ContentFile(base64.b64decode(data)), save=False)
+                AccessLog.objects.filter(client_event_id=access_log.client_event_id).update(
+                    snapshot=access_log.snapshot.name)
+            except Exception as e:
+                # Snapshot kaydedilemese bile geçiş kaydı geçerlidir
+                logger.warning(f"Snapshot kaydedilemedi ({access_log.client_event_id}): {e}")
+
+    @action(detail=False, methods=['put'], url_path=r'snapshots/(?P<client_event_id>[\w-]+)',
+            parser_classes=[JPEGUploadParser, MultiPartParser, FileUploadParser])
+    def snapshot(self, request, client_event_id=None):
+        """
+        Geçiş kaydının snapshot'ını ham JPEG olarak yükler (gövde ya da multipart 'snapshot' alanı).
+        Dosya base64'e çevrilmeden, Django'nun yükleme işleyicileriyle parça parça diske yazılır.
+        """
+        access_log = AccessLog.objects.filter(client_event_id=client_event_id).first()
+        if access_log is None:
+            return Response({'detail': "Geçiş kaydı bulunamadı"}, status=status.HTTP_404_NOT_FOUND)
+
+        upload = request.data.get('snapshot') or request.data.get('file')
+        if upload is None:
+            return Response({'detail': "Snapshot dosyası bekleniyor"}, status=status.HTTP_400_BAD_REQUEST)
+        if upload.size > self.SNAPSHOT_MAX_BYTES:
+            return Response({'detail': "Snapshot çok büyük"}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if upload.read(2) != b'\xff\xd8':
+            return Response({'detail': "JPEG dosyası bekleniyor"}, status=status.HTTP_400_BAD_REQUEST)
+        upload.seek(0)
+
+        # Tekrar yüklemede mevcut dosya korunur
+        if not access_log.snapshot:
+            access_log.snapshot.save(f"access_{access_log.customer_id}_{client_event_id}.jpg", upload, save=False)
+            access_log.save(update_fields=['snapshot'])
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=False, methods=['get'])
     def today(self, request):
         """Bugünkü geçişler"""
-        today = timezone.now().date()
-        logs = self.queryset.filter(entry_time__date=today)
+        start, end = local_day_range(timezone.localdate())
+        logs = self.paginate_queryset(self.get_queryset().filter(entry_time__gte=start, entry_time__lt=end))
         serializer = self.get_serializer(logs, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def stream(self, request):
+        """Filtrelenmiş kayıtları sayfalamadan JSON dizisi olarak akıtır (bellek kullanımı kayıt sayısından bağımsız)"""
+        queryset = filter_access_logs(self.get_queryset(), request.query_params).order_by('-entry_time', '-id')
+        encoder = JSONEncoder()
+
+        def generate():
+            yield '['
+            rows = queryset.iterator(chunk_size=self.STREAM_CHUNK_SIZE)
+            separator = ''
+            while True:
+                chunk = list(itertools.islice(rows, self.STREAM_CHUNK_SIZE))
+                if not chunk:
+                    break
+                for item in self.get_serializer(chunk, many=True).data:
+                    yield separator + encoder.encode(item)
+                    separator = ','
+            yield ']'
+
+        return StreamingHttpResponse(generate(), content_type='application/json')
+
+    # Dışa aktarımdaki sütunlar
+    EXPORT_COLUMNS = ('id', 'customer_id', 'customer__full_name', 'entry_time', 'confidence_score',
+                      'camera_location', 'snapshot')
+    EXPORT_HEADER = ('id', 'customer_id', 'customer_name', 'entry_time', 'confidence_score',
+                     'camera_location', 'snapshot')
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Filtrelenmiş kayıtları CSV (varsayılan) ya da NDJSON (?export_format=ndjson) olarak akıtır.
+        access_logs_view ile aynı filtreler kullanılır; satırlar iterator(chunk_size) ile okunur,
+        bellek kullanımı dışa aktarılan aralıktan bağımsızdır.
+        """
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return Response({'detail': "export_format 'csv' ya da 'ndjson' olmalı"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (filter_access_logs(AccessLog.objects.all(), request.query_params)
+                .order_by('-entry_time', '-id')
+                .values_list(*self.EXPORT_COLUMNS)
+                .iterator(chunk_size=self.STREAM_CHUNK_SIZE))
+
+        def records():
+            for row in rows:
+                record = dict(zip(self.EXPORT_HEADER, row))
+                record['entry_time'] = timezone.localtime(record['entry_time']).isoformat()
+                record['snapshot'] = default_storage.url(record['snapshot']) if record['snapshot'] else ''
+                yield record
+
+        if export_format == 'csv':
+            writer = csv.writer(_Echo())
+            content = itertools.chain(
+                [writer.writerow(self.EXPORT_HEADER)],
+                (writer.writerow([record[column] for column in self.EXPORT_HEADER]) for record in records())
+            )
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            content = (json.dumps(record, ensure_ascii=False) + '\n' for record in records())
+            content_type = 'application/x-ndjson; charset=utf-8'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f"access_logs_{timezone.localdate():%Y%m%d}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """İstatistikler"""
-        today = timezone.now().date()
+        """İstatistikler (günlük / saatlik sayaç tablolarından)"""
+        today = timezone.localdate()
+        start, end = local_day_range(today)
+        daily = AccessLogDailyCount.objects.filter(day=today)
         
         stats = {
-            'today_total': self.queryset.filter(entry_time__date=today).count(),
-            'today_unique': self.queryset.filter(entry_time__date=today).values('customer').distinct().count(),
+            'today_total': daily.aggregate(total=Sum('count'))['total'] or 0,
+            'today_unique': daily.filter(count__gt=0).count(),
             'last_hour': self.queryset.filter(entry_time__gte=timezone.now() - timedelta(hours=1)).count(),
-            'total': self.queryset.count()
+            'total': AccessLogDailyCount.objects.aggregate(total=Sum('count'))['total'] or 0,
+            'today_hourly': [
+                {'hour': hour, 'count': count}
+                for hour, count in AccessLogHourlyCount.objects.filter(hour__gte=start, hour__lt=end)
+                .values_list('hour', 'count')
+            ]
         }
         return Response(stats)
 
 
-@login_required(login_url='/login/')
-def access_logs_view(request):
-    """Access logs list with filtering"""
-    logs = AccessLog.objects.select_related('customer').all()
+def local_day_range(day):
+    """Yerel günün [başlangıç, bitiş) aralığı; entry_time__date yerine indeksi kullanan filtre için"""
+    # Yaz saati geçişi olan günler 23 / 25 saattir: bitiş ertesi günün başlangıcından hesaplanır
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+# Geçiş kayıtları sayfasında sayfa başına kayıt
+ACCESS_LOGS_PAGE_SIZE = 50
 
+
+def filter_access_logs(logs, params):
+    """
+    Geçiş kayıtları sayfası ve dışa aktarım için ortak filtreler:
+    customer (isim), date_from / date_to (yerel gün, dahil), min_confidence.
+    Geçersiz değerler yok sayılır.
+    """
     # Filter by customer name
-    customer_name = request.GET.get('customer', '').strip()
+    customer_name = params.get('customer', '').strip()
     if customer_name:
         logs = logs.filter(customer__full_name__icontains=customer_name)
 
     # Filter by date range
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
+    try:
+        date_from = parse_date(params.get('date_from', ''))
+    except ValueError:
+        date_from = None
+    try:
+        date_to = parse_date(params.get('date_to', ''))
+    except ValueError:
+        date_to = None
 
     if date_from:
-        logs = logs.filter(entry_time__date__gte=date_from)
+        logs = logs.filter(entry_time__gte=local_day_range(date_from)[0])
     if date_to:
-        logs = logs.filter(entry_time__date__lte=date_to)
+        logs = logs.filter(entry_time__lt=local_day_range(date_to)[1])
 
     # Filter by minimum confidence
-    min_confidence = request.GET.get('min_confidence', '')
-    if min_confidence:
-        logs = logs.filter(confidence_score__gte=float(min_confidence))
+    try:
+        min_confidence = float(params.get('min_confidence', ''))
+    except ValueError:
+        min_confidence = None
+    if min_confidence is not None:
+        logs = logs.filter(confidence_score__gte=min_confidence)
+
+    return logs
+
+
+@login_required(login_url='/login/')
+def access_logs_view(request):
+    """Access logs list with filtering and keyset pagination"""
+    logs = filter_access_logs(AccessLog.objects.select_related('customer').only(*ACCESS_LOG_LIST_FIELDS), request.GET)
+
+    # Bozuk cursor ilk sayfaya döner
+    try:
+        page = keyset_paginate(logs, request.GET.get('cursor'), ACCESS_LOGS_PAGE_SIZE)
+    except ValueError:
+        page = keyset_paginate(logs, None, ACCESS_LOGS_PAGE_SIZE)
+
+    context = {
+        'logs': page.items,
+        'next_query': _query_with_cursor(request.GET, page.next_cursor),
+        'previous_query': _query_with_cursor(request.GET, page.previous_cursor),
+    }
+    return render(request, 'ControlPanel/access_logs.html', context)
 
-    return render(request, 'ControlPanel/access_logs.html', {'logs': logs})
+
+class _Echo:
+    """csv.writer'ın yazdığı satırı biriktirmeden geri döndüren sözde dosya"""
+
+    def write(self, value):
+        return value
+
+
+def _query_with_cursor(params, cursor):
+    """Filtreleri koruyarak cursor'ı değiştirilmiş sorgu dizesi (cursor yoksa None)"""
+    if cursor is None:
+        return None
+    query = params.copy()
+    query['cursor'] = cursor
+    return query.urlencode()
 
 
 def access_log_dashboard(request):
     """Geçiş kontrol dashboard'u"""
-    today = timezone.now().date()
+    today = timezone.localdate()
+    start, end = local_day_range(today)
+    
+    # Bugünkü kayıtlar (entry_time indeksi üzerinde aralık taraması)
+    today_logs = AccessLog.objects.filter(entry_time__gte=start, entry_time__lt=end).select_related('customer')
     
-    # Bugünkü kayıtlar
-    today_logs = AccessLog.objects.filter(entry_time__date=today).select_related('customer')
+    # Günlük sayaçlar tablo büyüdükçe yavaşlamaz (gün başına müşteri sayısı kadar satır)
+    daily = AccessLogDailyCount.objects.filter(day=today)
     
     # İstatistikler
     stats = {
-        'today_total': today_logs.count(),
+        'today_total': daily.aggregate(total=Sum('count'))['total'] or 0,
         'registered_users': Customer.objects.count(),
         'last_hour': AccessLog.objects.filter(
             entry_time__gte=timezone.now() - timedelta(hours=1)
@@ -218,12 +571,8 @@ def access_log_dashboard(request):
     }
     
     # En çok giriş yapanlar
-    top_customers = AccessLog.objects.filter(
-        entry_time__date=today
-    ).values(
-        'customer__full_name'
-    ).annotate(
-        count=Count('id')
+    top_customers = daily.filter(count__gt=0).values(
+        'customer__full_name', 'count'
     ).order_by('-count')[:5]
     
     context = {
@@ -0,0 +1,161 @@
+import logging
+import time
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+# (işleme aralığı, tespit ölçeği, upsample) - pahalıdan ucuza sıralı
+DEFAULT_LEVELS = [
+    (1, 1.0, 2),
+    (1, 1.0, 1),
+    (2, 1.0, 1),
+    (2, 0.75, 1),
+    (3, 0.75, 1),
+    (3, 1.0, 0),
+    (4, 0.75, 0),
+    (6, 0.5, 0)
+]
+
+
+class AdaptiveController:
+    """
+    Ölçülen gecikmeye göre işleme ayarlarını seçen denetleyici.
+
+    Tespit sonuçlarının yakalamadan bu yana geçen süresi (kuyrukta bekleme dahil, gecikip
+    atılan sonuçlar da) üstel hareketli ortalamayla izlenir; encoding sonuçlarının yakalamadan
+    kimliğe geçen süresi ayrıca izlenir. Ortalamalardan biri bütçesini aşarsa ya da hatta
+    bekleyen iş sayısı sınırı geçerse bir seviye ucuzlanır (tespit ve encoding aynı
+    çekirdekleri paylaşır); ikisi de bütçenin rahatça altındaysa bir seviye pahalılaşır. Salınımı önlemek için iki değişiklik arasında bekleme süresi
+    vardır ve iyileştirme kötüleştirmeden daha yavaş yapılır.
+    """
+
+    def __init__(self, latency_budget: float = 0.25, levels: List[Tuple[int, float, int]] = None,
+                 start_level: int = 2, max_in_flight: int = 4, smoothing: float = 0.2,
+                 downgrade_cooldown: float = 2.0, upgrade_cooldown: float = 6.0, upgrade_ratio: float = 0.6,
+                 encode_budget: float = None, encode_window: float = 10.0):
+        """
+        Args:
+            latency_budget: Hedef gecikme (saniye, yakalamadan tespit sonucuna)
+            levels: (işleme aralığı, tespit ölçeği, upsample) seviyeleri, pahalıdan ucuza
+            start_level: Başlangıç seviyesi
+            max_in_flight: Bu sayıdan fazla bekleyen iş varsa ayar ucuzlatılır
+            smoothing: Gecikme ortalamasının yeni ölçüme verdiği ağırlık
+            downgrade_cooldown / upgrade_cooldown: Ayar değişiklikleri arası en kısa süre (saniye)
+            upgrade_ratio: Ortalama bütçenin bu oranının altındaysa ayar pahalılaştırılır
+            encode_budget: Yakalamadan encoding sonucuna hedef süre (None = 4 x latency_budget)
+            encode_window: Son encoding ölçümü bu süreden (saniye) eskiyse karara katılmaz
+                (kadrajda yeni yüz yokken eski ölçüm ayarı kilitlemez)
+        """
+        self.latency_budget = latency_budget
+        self.levels = levels or DEFAULT_LEVELS
+        self.level = max(0, min(start_level, len(self.levels) - 1))
+        self.max_in_flight = max_in_flight
+        self.smoothing = smoothing
+        self.downgrade_cooldown = downgrade_cooldown
+        self.upgrade_cooldown = upgrade_cooldown
+        self.upgrade_ratio = upgrade_ratio
+        self.encode_budget = encode_budget if encode_budget is not None else 4 * latency_budget
+        self.encode_window = encode_window
+
+        self.latency = None
+        self.compute = None
+        self.encode_latency = None
+        self.encode_compute = None
+        self.last_encode = None
+        self.in_flight = 0
+        self.last_change = time.monotonic()
+        self.changes = 0
+
+    @property
+    def stride(self) -> int:
+        return self.levels[self.level][0]
+
+    @property
+    def detect_params(self) -> dict:
+        """Tespit aşamasına frame bazında verilecek ayarlar"""
+        _, scale, upsample = self.levels[self.level]
+        return {'detect_scale': scale, 'number_of_times_to_upsample': upsample}
+
+    def observe(self, latency: float, compute: float = None, in_flight: int = 0):
+        """
+        Bir tespit sonucunun (atılan gecikmiş sonuçlar dahil) ölçümlerini işler ve gerekirse
+        seviyeyi değiştirir
+
+        Args:
+            latency: Yakalamadan sonuca geçen süre (saniye)
+            compute: Tespitin kendi süresi (saniye)
+            in_flight: Hatta bekleyen iş sayısı
+        """
+        self.latency = self._smooth(self.latency, latency)
+        self.compute = self._smooth(self.compute, compute)
+        self.in_flight = in_flight
+        self._adjust(time.monotonic())
+
+    def observe_encoding(self, latency: float, compute: float = None):
+        """
+        Bir encoding sonucunun ölçümlerini işler ve gerekirse seviyeyi değiştirir
+
+        Args:
+            latency: Yakalamadan encoding sonucuna geçen süre (saniye)
+            compute: Encoding'in kendi süresi (saniye)
+        """
+        self.encode_latency = self._smooth(self.encode_latency, latency)
+        self.encode_compute = self._smooth(self.encode_compute, compute)
+        self.last_encode = time.monotonic()
+        if self.latency is not None:
+            self._adjust(self.last_encode)
+
+    def _smooth(self, average, value):
+        """Üstel hareketli ortalama (ölçüm yoksa ortalama değişmez)"""
+        if value is None:
+            return average
+        if average is None:
+            return value
+        return average + self.smoothing * (value - average)
+
+    def _adjust(self, now: float):
+        since_change = now - self.last_change
+        encode_recent = self.last_encode is not None and now - self.last_encode <= self.encode_window
+        encode_latency = self.encode_latency if encode_recent else 0.0
+
+        overloaded = (self.latency > self.latency_budget or encode_latency > self.encode_budget
+                      or self.in_flight > self.max_in_flight)
+        relaxed = (self.latency < self.latency_budget * self.upgrade_ratio
+                   and encode_latency < self.encode_budget * self.upgrade_ratio and self.in_flight <= 1)
+
+        if overloaded and self.level < len(self.levels) - 1 and since_change >= self.downgrade_cooldown:
+            self._set_level(self.level + 1, now)
+        elif relaxed and self.level > 0 and since_change >= self.upgrade_cooldown:
+            self._set_level(self.level - 1, now)
+
+    def _set_level(self, level: int, now: float):
+        self.level = level
+        self.last_change = now
+        self.changes += 1
+
+        stride, scale, upsample = self.levels[level]
+        logger.info(f"İşleme ayarı değişti: seviye {level} (her {stride} frame, ölçek {scale}, upsample {upsample}), "
+                    f"ortalama gecikme {self.latency * 1000:.0f} ms")
+
+    @property
+    def stats(self) -> dict:
+        """Seçilen ayarlar ve ölçümler"""
+        stride, scale, upsample = self.levels[self.level]
+        return {
+            'level': self.level,
+            'process_every_n_frames': stride,
+            'detect_scale': scale,
+            'number_of_times_to_upsample': upsample,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'detect_ms': round(self.compute * 1000, 1) if self.compute is not None else None,
+            'encode_latency_ms': round(self.encode_latency * 1000, 1) if self.encode_latency is not None else None,
+            'encode_ms': round(self.encode_compute * 1000, 1) if self.encode_compute is not None else None,
+            'in_flight': self.in_flight,
+            'changes': self.changes
+        }
@@ -0,0 +1,233 @@
+import cv2
+import logging
+import os
+import time
+import yaml
+from pathlib import Path
+from RecognitionPipeline import RecognitionPipeline
+from ModelTrainer import FaceRecognitionTrainer
+from LogService import AccessLogger
+from GalleryServer import GalleryClient
+from ModelReloader import ModelReloader
+from CooldownStore import CooldownStore
+from RecognitionService import RealtimeFaceRecognition
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class CameraSupervisor:
+    """
+    Bir sitedeki tüm kameraları tek süreç grubunda çalıştıran denetleyici.
+
+    Config'deki 'Cameras' listesindeki her kamera için ayrı bir CaptureService açılır;
+    galeri (model) bir kez yüklenir ve tüm kameralar aynı eşleştiriciyi, aynı tespit /
+    encoding süreç havuzunu ve aynı erişim kaydedicisini paylaşır. Frame'ler kameralar
+    arasında sırası dönen round-robin ile hatta gönderilir; bir kameranın hatta
+    bekleyebilecek iş sayısı sınırlıdır, böylece kalabalık bir giriş diğerlerini aç bırakmaz.
+
+    Config'de 'GallerySocket' verilirse galeri bu süreçte hiç yüklenmez; eşleştirme ve
+    yeniden yükleme GalleryServer'a bırakılır (birden çok denetleyici aynı galeriyi paylaşır).
+    """
+
+    def __init__(self, config_path: str, model_path: str = "face_recognition_model.gallery",
+                 gallery_mode: str = "full", index_config: dict = None, api_base_url: str = "http://127.0.0.1:8000"):
+        """
+        Args:
+            config_path: Kamera listesini içeren config dosyası yolu
+            model_path: Eğitilmiş model dosyası yolu
+            gallery_mode: Eşleştirme galeri modu ('full' veya 'aggregated')
+            index_config: Galeri indeksi ayarları
+            api_base_url: Erişim kayıtlarının gönderileceği API adresi
+        """
+        with open(config_path, 'r') as config_specs:
+            self.config = yaml.safe_load(config_specs)
+
+        camera_specs = self.config.get('Cameras') or []
+        if not camera_specs:
+            raise ValueError("Config dosyasında 'Cameras' listesi yok")
+
+        self.model_path = Path(model_path)
+        self.trainer = None
+        self.gallery_client = None
+
+        if self.config.get('GallerySocket'):
+            self.gallery_client = GalleryClient(self.config['GallerySocket'])
+            encoding_settings = self.gallery_client.info()['encoding_settings']
+        else:
+            # Galeri tüm kameralar için bir kez yüklenir
+            self.trainer = FaceRecognitionTrainer(model_save_path=model_path, gallery_mode=gallery_mode,
+                                                  index_config=index_config, use_cache=False)
+            if not self.trainer.load_model():
+                raise RuntimeError("Model yüklenemedi! Önce modeli eğitin.")
+            encoding_settings = self.trainer.encoding_settings
+
+        # Galeri arka planda yeniden yüklenir, döngü yalnızca referansı değiştirir
+        self.reloader = None
+        if self.trainer is not None:
+            self.reloader = ModelReloader(self.model_path, lambda: self.trainer.load_snapshot())
+
+        self.access_logger = AccessLogger(api_base_url)
+        # API bekleme süresi tüm kameralarda ortaktır: iki girişte birden görülen kişi için tek
+        # geçiş kaydı gönderilir. Selamlama bekleme süresi her kameranın kendisindedir.
+        self.api_cooldowns = CooldownStore(self.config.get('ApiCooldown', 300),
+                                           max_entries=self.config.get('CooldownMaxEntries', 10000))
+
+        # Ortak süreç havuzu; kamera başına bekleyen iş sınırı adil paylaşımı sağlar
+        workers = max(1, ((os.cpu_count() or 2) - 1) // 2)
+        self.pipeline = RecognitionPipeline(
+            dict(encoding_settings),
+            detect_workers=self.config.get('DetectWorkers', workers),
+            encode_workers=self.config.get('EncodeWorkers', workers),
+            queue_size=self.config.get('PipelineQueueSize', 4),
+            max_result_age=self.config.get('MaxResultAge', 1.0),
+            max_in_flight_per_tag=self.config.get('MaxInFlightPerCamera', 2)
+        )
+
+        self.cameras = []
+        try:
+            for index, spec in enumerate(camera_specs):
+                self.cameras.append(self._create_camera(index, spec))
+        except Exception:
+            for camera in self.cameras:
+                camera.capture_service.stop()
+            raise
+
+        # Round-robin'in bu turda başlayacağı kamera
+        self._next_camera = 0
+        self.running = False
+
+    def _create_camera(self, index: int, spec: dict) -> RealtimeFaceRecognition:
+        """Kamera tanımını ortak ayarlarla birleştirip paylaşılan kaynaklarla bir kamera oluşturur"""
+        camera_config = {key: value for key, value in self.config.items() if key != 'Cameras'}
+        camera_config.update({key: value for key, value in spec.items() if key not in ('Name', 'Source', 'Location')})
+
+        if 'Source' in spec:
+            camera_config['CameraSource'] = spec['Source']
+        location = spec.get('Location') or spec.get('Name') or f"Kamera {index + 1}"
+
+        camera = RealtimeFaceRecognition(
+            config_path=None,
+            model_path=str(self.model_path),
+            trainer=self.trainer,
+            pipeline=self.pipeline,
+            access_logger=self.access_logger,
+            camera_config=camera_config,
+            camera_location=location,
+            tag=index,
+            gallery_client=self.gallery_client,
+            api_cooldowns=self.api_cooldowns
+        )
+        logger.info(f"Kamera eklendi: {location} (kaynak: {camera_config['CameraSource']})")
+        return camera
+
+    def _check_and_reload_model(self):
+        """Arka planda yüklenmiş yeni galeri hazırsa tüm kameralarda devreye al"""
+        # Galeri servisi kullanılıyorsa yeniden yükleme sunucudadır
+        if self.reloader is None:
+            return
+
+        trainer = self.reloader.take()
+        if trainer is None:
+            return
+
+        self.trainer = trainer
+        for camera in self.cameras:
+            camera.trainer = trainer
+        # Bekleme süreleri korunur: kadrajdaki kişiler yeniden selamlanmaz ve kaydedilmez
+        logger.info(f"Model yeniden yüklendi: {len(trainer.known_face_encodings)} encoding (v{trainer.model_version})")
+
+    def _dispatch_results(self):
+        """Hattan gelen sonuçları kaynak kameraya iletir"""
+        for result in self.pipeline.results():
+            tag = result['tag']
+            if tag is not None and 0 <= tag < len(self.cameras):
+                self.cameras[tag].apply_result(result)
+
+    def _poll_cameras(self, show_window: bool) -> bool:
+        """
+        Her kameradan hazır frame'i bloklamadan alıp işler
+
+        Returns:
+            En az bir kamerada frame işlendiyse True
+        """
+        count = len(self.cameras)
+        start = self._next_camera
+        self._next_camera = (start + 1) % count
+
+        handled = False
+        for offset in range(count):
+            camera = self.cameras[(start + offset) % count]
+
+            frame = camera.capture_service.get_frame(timeout=0)
+            if frame is None:
+                continue
+
+            processed_frame = camera.handle_frame(frame)
+            handled = True
+
+            if show_window:
+                cv2.imshow(camera.camera_location, processed_frame)
+
+        return handled
+
+    def start(self, show_window: bool = True):
+        """Tüm kameraları başlat ve ortak döngüyü çalıştır"""
+        self.running = True
+
+        self.pipeline.start()
+        if self.reloader is not None:
+            self.reloader.start()
+        for camera in self.cameras:
+            camera.running = True
+            camera.capture_service.start()
+            camera.log_startup()
+
+        logger.info(f"{len(self.cameras)} kamera ortak galeri ve süreç havuzuyla çalışıyor")
+
+        try:
+            while self.running:
+                self._check_and_reload_model()
+                self._dispatch_results()
+
+                handled = self._poll_cameras(show_window)
+
+                if show_window:
+                    # 'q' tuşu ile çıkış
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        logger.info("Kullanıcı çıkış yaptı")
+                        break
+                elif not handled:
+                    # Hiçbir kamerada yeni frame yoksa kısa bekle
+                    time.sleep(0.005)
+
+        except KeyboardInterrupt:
+            logger.info("Program KeyboardInterrupt ile durduruldu")
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Kameraları, ortak hattı durdur ve istatistikleri göster"""
+        self.running = False
+
+        # Kameralar paylaşılan hattı durdurmaz; önce kameralar, sonra hat kapanır
+        for camera in self.cameras:
+            camera.stop()
+
+        self.pipeline.stop()
+        if self.reloader is not None:
+            self.reloader.stop()
+        self.access_logger.close()
+
+        print("\n" + "="*60)
+        print("HAT İSTATİSTİKLERİ")
+        print("="*60)
+        for key, value in self.pipeline.stats.items():
+            print(f"{key}: {value}")
+        print(f"Gönderilen / Bekleyen Geçiş Kaydı: {self.access_logger.stats['sent']} / "
+              f"{self.access_logger.stats['pending']}")
+        print("="*60 + "\n")
@@ -5,6 +5,7 @@ import time
 import numpy as np
 import logging
 import yaml
+from multiprocessing.shared_memory import SharedMemory
 
 logger = logging.getLogger(__name__)
 
@@ -15,29 +16,132 @@ logging.basicConfig(
 )
 
 
+class FrameRing:
+    """
+    Önceden ayrılmış frame tamponlarından oluşan halka ("en son frame kazanır").
+
+    Üretici her frame'i sıradaki boş tampona yerinde yazar ve en son frame olarak
+    yayınlar; tüketici her zaman en yeni frame'i kopyalamadan (view) alır. Tüketicinin
+    elindeki tampon, bir sonraki okumaya kadar üzerine yazılmaz. Bekleme Condition ile
+    yapılır, uyku/yoklama (polling) yoktur.
+    """
+
+    def __init__(self, shape: tuple, size: int = 3, shared: bool = False):
+        """
+        Args:
+            shape: Frame boyutu (yükseklik, genişlik, kanal)
+            size: Tampon sayısı (en az 3: yazılan, yayınlanan, okunan)
+            shared: True ise tamponlar multiprocessing.shared_memory üzerinde ayrılır
+        """
+        self.size = max(3, size)
+        self.shm = None
+
+        if shared:
+            nbytes = int(np.prod(shape)) * self.size
+            self.shm = SharedMemory(create=True, size=nbytes)
+            self.buffers = np.ndarray((self.size, *shape), dtype=np.uint8, buffer=self.shm.buf)
+        else:
+            self.buffers = np.empty((self.size, *shape), dtype=np.uint8)
+
+        self.condition = threading.Condition()
+        self.latest_slot = -1
+        self.reader_slot = -1
+        self.seq = 0
+        self.closed = False
+
+    @property
+    def shm_name(self):
+        """Paylaşımlı bellek bloğunun adı (diğer süreçler bağlanmak için kullanır)"""
+        return self.shm.name if self.shm else None
+
+    def next_slot(self) -> int:
+        """Üreticinin yazacağı tamponu seçer (yayınlanan ve okunan tamponlar hariç)"""
+        with self.condition:
+            busy = (self.latest_slot, self.reader_slot)
+        for offset in range(1, self.size + 1):
+            slot = (self.latest_slot + offset) % self.size
+            if slot not in busy:
+                return slot
+        return (self.latest_slot + 1) % self.size
+
+    def publish(self, slot: int):
+        """Yazılan tamponu en son frame olarak yayınlar ve bekleyenleri uyandırır"""
+        with self.condition:
+            self.latest_slot = slot
+            self.seq += 1
+            self.condition.notify_all()
+
+    def wait_latest(self, last_seq: int = 0, timeout: float = None):
+        """
+        last_seq'ten yeni bir frame gelene kadar bekler
+
+        Returns:
+            (sıra numarası, frame view) - zaman aşımında ya da kapanışta (last_seq, None)
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.seq > last_seq or self.closed, timeout):
+                return last_seq, None
+            if self.seq <= last_seq:
+                return last_seq, None
+
+            self.reader_slot = self.latest_slot
+            return self.seq, self.buffers[self.reader_slot]
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+        if self.shm is not None:
+            self.shm.unlink()
+            try:
+                self.shm.close()
+            except BufferError:
+                # Tüketicide hâlâ view var; blok son referansla birlikte serbest kalır
+                pass
+            self.shm = None
+
+
 class CaptureService(threading.Thread):
-    def __init__(self, config_path):
-        super().__init__()
+    def __init__(self, config_path=None, config: dict = None):
+        super().__init__(daemon=True)
+
+        # Çoklu kamera kurulumunda ayarlar doğrudan sözlük olarak verilir
+        if config is None:
+            with open(config_path, 'r') as config_specs:
+
+                config = yaml.safe_load(config_specs)
+
+        self.config = config
 
-        with open(config_path, 'r') as config_specs:
-        
-            self.config = yaml.safe_load(config_specs)
 
-        
         self.capture = cv2.VideoCapture(self.config['CameraSource'])
 
         if not self.capture.isOpened() :
             logger.error("Camera connection is lost")
             raise RuntimeError("Camera connection is lost")
-        
+
+
+        # 'queue': eski FIFO davranışı, 'latest': her zaman en yeni frame (düşük gecikme)
+        self.mode = self.config.get('CaptureMode', 'queue')
+        self.scale = self.config.get('Scale', 0.5)
 
         self.que = queue.Queue(maxsize=self.config['QueueSize'])
 
+        # Halka ilk frame'in boyutu bilindiğinde ayrılır
+        self.ring = None
+        self.ring_ready = threading.Event()
+        self.last_seq = 0
+
         self.thread_start = False
 
 
     def run(self):
 
+        if self.mode == 'latest':
+            self._run_latest()
+            return
+
         last_processes = 0
 
         self.thread_start = True
@@ -55,20 +159,79 @@ class CaptureService(threading.Thread):
 
                     logging.error("Couldn't captured frame from camera")
 
-                    
+
 
                     break
 
-                small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+                small_frame = cv2.resize(frame, (0, 0), fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
 
 
                 self.que.put(small_frame)
 
-            
+
             else:
                 time.sleep(0.01)
 
+    def _run_latest(self):
+        """Frame'leri yeniden kullanılan tamponlara okuyup küçültür, en yenisini yayınlar"""
+        self.thread_start = True
+
+        logger.info("Capture service is starting (latest-frame mode)")
+
+        raw = None
+        try:
+            while self.thread_start:
+                # Ham frame her seferinde aynı tampona okunur
+                success, raw = self.capture.read(raw)
+
+                if not success:
+                    logger.error("Couldn't captured frame from camera")
+                    break
+
+                if self.ring is None:
+                    height, width = raw.shape[:2]
+                    self.target_size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+                    self.ring = FrameRing(
+                        (self.target_size[1], self.target_size[0], raw.shape[2]),
+                        size=self.config.get('RingSize', 3),
+                        shared=self.config.get('SharedMemory', False)
+                    )
+                    self.ring_ready.set()
+
+                # Küçültme doğrudan halkadaki tampona yapılır (ara kopya yok)
+                slot = self.ring.next_slot()
+                cv2.resize(raw, self.target_size, dst=self.ring.buffers[slot], interpolation=cv2.INTER_AREA)
+                self.ring.publish(slot)
+        finally:
+            if self.ring is not None:
+                self.ring.close()
+            self.ring_ready.set()
+
+    def get_frame(self, timeout: float = 0.1):
+        """
+        Sıradaki frame'i bekleyerek döndürür
+
+        'latest' modunda en yeni frame döner (aradaki frame'ler atlanır); dönen dizi
+        halkadaki tamponun kendisidir ve bir sonraki get_frame çağrısına kadar geçerlidir.
+
+        Returns:
+            Frame ya da zaman aşımında None
+        """
+        if self.mode != 'latest':
+            try:
+                return self.que.get(timeout=timeout)
+            except queue.Empty:
+                return None
+
+        if not self.ring_ready.wait(timeout) or self.ring is None:
+            return None
+
+        self.last_seq, frame = self.ring.wait_latest(self.last_seq, timeout)
+        return frame
+
 
     def stop(self):
         self.thread_start = False
+        if self.is_alive() and self is not threading.current_thread():
+            self.join(timeout=1.0)
         self.capture.release()
@@ -2,12 +2,18 @@ import requests
 import re
 from collections import deque,ChainMap
 import logging
-from config import API_BASE_URL, CUSTOMER_FACES, TIMEOUT
+from config import API_BASE_URL, CUSTOMER_FACES, CUSTOMER_FACES_MANIFEST, CLIENT_CACHE_DIR, TIMEOUT, DOWNLOAD_WORKERS, DOWNLOAD_RETRIES, DOWNLOAD_BACKOFF
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pprint import pprint
 from PIL import Image, ImageFilter
 from io import BytesIO
 from pathlib import Path
 import numpy as np
+import hashlib
+import json
+import os
 logger = logging.getLogger(__name__)
 
 logging.basicConfig(
@@ -18,13 +24,31 @@ logging.basicConfig(
 
 class RecognizerClient:
 
-    def __init__(self, base_url = API_BASE_URL, user_output_directories:str = None):
+    def __init__(self, base_url = API_BASE_URL, user_output_directories:str = None, max_in_flight:int = DOWNLOAD_WORKERS,
+                 cache_dir = CLIENT_CACHE_DIR):
         
         self.base_url = base_url.rstrip("/")
+        self.max_in_flight = max(1, max_in_flight)
+
+        # None ise manifest ve görüntü baytları önbelleğe alınmaz
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            (self.cache_dir / "images").mkdir(parents=True, exist_ok=True)
 
         self.session = requests.Session();
         self.session.headers.update({'Authorization':'Bearer{token}'})
 
+        # Eşzamanlı indirmeler için bağlantı havuzu ve üstel beklemeli tekrar deneme
+        retry = Retry(
+            total=DOWNLOAD_RETRIES,
+            backoff_factor=DOWNLOAD_BACKOFF,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET'])
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.max_in_flight, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
         self.face_config = {
             'thumbnail_size': (512, 512)
         }
@@ -34,63 +58,250 @@ class RecognizerClient:
         }
 
 
-    @property
-    def customer_faces(self):
+    def fetch_customers(self):
+        """Müşteri listesini yüz kayıtlarının meta verileriyle (id, image, uploaded_at) döndürür"""
         faces_url = f"{self.base_url}/{CUSTOMER_FACES}"
         try: 
             response = self.session.get(faces_url,timeout=TIMEOUT)
             if response.status_code == 200:
-                raw_json = response.json()
-                user_datas = deque([])
+                return response.json()
+            else:
+                raise requests.exceptions.HTTPError()
 
-                for person in raw_json:
-                    logger.info(f"Processing {person['full_name']} faces")
+        except requests.RequestException as e:
+            logger.error("API Error: API Endpoint didn't return response")
+            return 
 
-                    user_fullname = person['full_name']
+    def fetch_manifest(self, etag:str = None):
+        """
+        Yüz manifest'ini koşullu olarak çeker.
 
-                    user_id = person['id']
-                    face_data =  deque([])
-                    
+        etag verilirse If-None-Match ile gönderilir; sunucudaki durum değişmediyse
+        304 döner ve hiçbir veri aktarılmaz. Önbellekte önceki manifest varsa yalnızca
+        sonrasında yüklenen yüzler (?since=) istenir ve yerel kopyayla birleştirilir.
 
-                    for raw_face in person['face_data']:
-                        
-                        image  = self.download_raw_faces(raw_face['image'])
+        Args:
+            etag: Çağıranın en son eşitlendiği manifest ETag'i
 
-                        reshaped_image = self.optimize_face_image(image)
+        Returns:
+            (manifest, değişmedi mi) - manifest: {'etag', 'generated_at', 'customers', 'faces'};
+            304'te (None, True), hata durumunda (None, False)
+        """
+        manifest_url = f"{self.base_url}/{CUSTOMER_FACES_MANIFEST}"
+        cached = self._read_cached_manifest()
 
-                        face_data.appendleft(reshaped_image['data'])
+        headers = {'If-None-Match': etag} if etag else {}
+        params = {'since': cached['generated_at']} if cached else {}
 
-                    user = {
-                        'username': re.sub(r"\s+", "", user_fullname, flags=re.UNICODE),
-                        'userid': user_id,
-                        'faces': face_data
-                    }
+        try:
+            response = self.session.get(manifest_url, headers=headers, params=params, timeout=TIMEOUT)
+            if response.status_code == 304:
+                return None, True
+            response.raise_for_status()
+            body = response.json()
 
-                    user_datas.append(user)
+            faces = {face['id']: face for face in body['faces']}
+            if body.get('since') and cached:
+                # Delta: silinmemiş eski kayıtlar + yeni yüklenenler
+                for face in cached['faces']:
+                    faces.setdefault(face['id'], face)
+                faces = {face_id: faces[face_id] for face_id in body['face_ids'] if face_id in faces}
 
-                return user_datas
-                    
-                        
-                        
+                if len(faces) != len(body['face_ids']):
+                    # Yerel kopyada eksik kayıt var (ör. aynı anda yüklenen yüz); tam manifest iste
+                    logger.warning("Manifest delta'sı eksik, tam manifest çekiliyor")
+                    self._drop_cached_manifest()
+                    return self.fetch_manifest(etag)
 
-            else:
-                raise requests.exceptions.HTTPError()
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.error(f"API Error: Manifest alınamadı: {e}")
+            return None, False
 
-        except requests.RequestException as e:
-            logger.error("API Error: API Endpoint didn't return response")
-            return 
+        manifest = {
+            'etag': response.headers.get('ETag'),
+            'generated_at': body['generated_at'],
+            'customers': body['customers'],
+            'faces': sorted(faces.values(), key=lambda face: (face['customer_id'], face['id']))
+        }
+        self._write_cached_manifest(manifest)
+        return manifest, False
+
+    @staticmethod
+    def customers_from_manifest(manifest:dict):
+        """Manifest'i fetch_customers() ile aynı biçime (müşteri -> face_data) dönüştürür"""
+        customers = {person['id']: {**person, 'face_data': []} for person in manifest['customers']}
+        for face in manifest['faces']:
+            if face['customer_id'] in customers:
+                customers[face['customer_id']]['face_data'].append(face)
+        return list(customers.values())
+
+    def _manifest_path(self):
+        return self.cache_dir / "manifest.json" if self.cache_dir else None
+
+    def _read_cached_manifest(self):
+        path = self._manifest_path()
+        if path is None or not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Önbellekteki manifest okunamadı: {e}")
+            return None
+
+    def _write_cached_manifest(self, manifest:dict):
+        path = self._manifest_path()
+        if path is None:
+            return
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def _drop_cached_manifest(self):
+        path = self._manifest_path()
+        if path is not None and path.exists():
+            path.unlink()
+
+    def load_face_image(self, data_url:str, content_hash:str = None):
+        """
+        Yüz görüntüsünü indirir ve eğitim için numpy dizisine çevirir.
+        content_hash verilirse baytlar yerel önbellekten okunur / önbelleğe yazılır.
+        """
+        raw = self._read_cached_image(content_hash)
+        if raw is None:
+            raw = self.download_face_bytes(data_url)
+            self._write_cached_image(content_hash, raw)
+
+        image = Image.open(BytesIO(raw)).convert('RGB')
+        reshaped_image = self.optimize_face_image(image)
+        return reshaped_image['data']
+
+    def _image_path(self, content_hash:str):
+        if not self.cache_dir or not content_hash:
+            return None
+        return self.cache_dir / "images" / content_hash[:2] / content_hash
+
+    def _read_cached_image(self, content_hash:str):
+        path = self._image_path(content_hash)
+        if path is None or not path.exists():
+            return None
+        return path.read_bytes()
+
+    def _write_cached_image(self, content_hash:str, raw:bytes):
+        path = self._image_path(content_hash)
+        if path is None:
+            return
+        if hashlib.sha256(raw).hexdigest() != content_hash:
+            logger.warning(f"İndirilen görüntünün özeti manifest ile uyuşmuyor, önbelleğe alınmadı: {content_hash}")
+            return
+
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(raw)
+        os.replace(tmp_path, path)
+
+    def iter_face_images(self, faces):
+        """
+        Yüz görüntülerini eşzamanlı indirir ve geldikçe sırayla döndürür.
+
+        Uçuştaki indirme sayısı max_in_flight ile sınırlıdır; tüketici yavaşsa
+        yeni indirme başlatılmaz, bu yüzden bellekte en fazla o kadar görüntü bekler.
+
+        Args:
+            faces: 'image' URL'si içeren yüz kayıtları
+
+        Yields:
+            (yüz kaydı, numpy görüntü) - indirilemeyen görüntü için None
+        """
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            window = deque()
+
+            for face in faces:
+                window.append((face, executor.submit(self.load_face_image, face['image'], face.get('content_hash'))))
+                if len(window) >= self.max_in_flight:
+                    yield self._resolve_download(*window.popleft())
+
+            while window:
+                yield self._resolve_download(*window.popleft())
+
+    @staticmethod
+    def _resolve_download(face, future):
+        try:
+            return face, future.result()
+        except Exception as e:
+            logger.warning(f"Görüntü indirilemedi ({face['image']}): {e}")
+            return face, None
+
+    @staticmethod
+    def display_name(full_name:str):
+        return re.sub(r"\s+", "", full_name, flags=re.UNICODE)
+
+    def iter_customer_faces(self, customers=None):
+        """
+        Müşterileri yüz görüntüleriyle birlikte tek tek, tembel (lazy) olarak döndürür.
+
+        Bellekte yalnızca o an işlenen müşterinin görüntüleri ve indirme penceresi
+        tutulur; galeri boyutundan bağımsız olarak bellek kullanımı sınırlı kalır.
+
+        Args:
+            customers: fetch_customers() çıktısı (None ise API'dan çekilir)
+
+        Yields:
+            {'username', 'userid', 'faces', 'face_ids', 'uploaded_at'}
+        """
+        if customers is None:
+            customers = self.fetch_customers()
+        if customers is None:
+            return
+
+        # İndirme penceresi müşteri sınırlarını aşar; sonuçlar müşteri sırasıyla gelir
+        faces = (raw_face for person in customers for raw_face in person['face_data'])
+        downloads = self.iter_face_images(faces)
+
+        for person in customers:
+            logger.info(f"Processing {person['full_name']} faces")
+
+            user = {
+                'username': self.display_name(person['full_name']),
+                'userid': person['id'],
+                'faces': [],
+                'face_ids': [],
+                'uploaded_at': []
+            }
+
+            for _ in person['face_data']:
+                raw_face, image = next(downloads)
+                if image is None:
+                    continue
+
+                user['faces'].append(image)
+                user['face_ids'].append(raw_face['id'])
+                user['uploaded_at'].append(raw_face['uploaded_at'])
+
+            yield user
+
+    @property
+    def customer_faces(self):
+        raw_json = self.fetch_customers()
+        if raw_json is None:
+            return
+
+        return deque(self.iter_customer_faces(raw_json))
         
     
-    def download_raw_faces(self, data_url:str):
-        with self.session.get(data_url, stream=True,timeout=3) as response:
+    def download_face_bytes(self, data_url:str):
+        with self.session.get(data_url, stream=True,timeout=TIMEOUT) as response:
 
             response.raise_for_status()
 
             logger.info("Downloading {0}".format(data_url))
 
-            img = Image.open(BytesIO(response.content)).convert('RGB')
-            
-            return img
+            return response.content
+
+    def download_raw_faces(self, data_url:str):
+        img = Image.open(BytesIO(self.download_face_bytes(data_url))).convert('RGB')
+        return img
         
 
     def optimize_face_image(self, image_data):
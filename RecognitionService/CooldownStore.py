@@ -0,0 +1,74 @@
+import heapq
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class CooldownStore:
+    """
+    Anahtar (user_id) başına süresi dolan bekleme kayıtları.
+
+    Kayıtlar bitiş zamanına göre bir min-heap'te tutulur; her erişimde süresi dolanlar
+    heap'in başından atılır, böylece yapı yalnızca bekleme süresindeki kişiler kadar
+    büyür. Kayıt sayısı max_entries'i aşarsa bitişi en yakın olan kayıt erken atılır.
+    Galeri yeniden yüklemelerinden bağımsızdır: yeniden eğitim sonrası kadrajdaki
+    kişiler tekrar selamlanmaz ve tekrar kaydedilmez.
+    """
+
+    def __init__(self, cooldown: float, max_entries: int = 10000):
+        """
+        Args:
+            cooldown: Bekleme süresi (saniye)
+            max_entries: Aynı anda tutulacak en fazla kayıt
+        """
+        self.cooldown = cooldown
+        self.max_entries = max(1, max_entries)
+        self._expires = {}
+        self._heap = []
+        self.stats = {'evicted': 0}
+
+    def __len__(self) -> int:
+        self._expire(time.monotonic())
+        return len(self._expires)
+
+    def _expire(self, now: float):
+        """Süresi dolan kayıtları heap'in başından atar"""
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            # Kayıt yenilendiyse heap'teki eski bitiş zamanı geçersizdir
+            if self._expires.get(key) == expires_at:
+                del self._expires[key]
+
+    def remaining(self, key) -> float:
+        """Anahtarın kalan bekleme süresi (saniye, bekleme yoksa 0)"""
+        now = time.monotonic()
+        self._expire(now)
+        expires_at = self._expires.get(key)
+        return expires_at - now if expires_at is not None else 0.0
+
+    def start(self, key):
+        """Anahtar için bekleme süresini şimdiden başlatır"""
+        now = time.monotonic()
+        self._expire(now)
+
+        expires_at = now + self.cooldown
+        self._expires[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+
+        # Sınır aşıldıysa bitişi en yakın kayıt atılır
+        while len(self._expires) > self.max_entries:
+            oldest_expires_at, oldest_key = heapq.heappop(self._heap)
+            if self._expires.get(oldest_key) == oldest_expires_at:
+                del self._expires[oldest_key]
+                self.stats['evicted'] += 1
+
+        # Yenilenen kayıtların eski heap girdileri heap'i şişirmesin
+        if len(self._heap) > 2 * len(self._expires) + 64:
+            self._heap = [(expires_at, key) for key, expires_at in self._expires.items()]
+            heapq.heapify(self._heap)
@@ -0,0 +1,116 @@
+import numpy as np
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class EncodingCache:
+    """
+    Görüntü içeriğine göre adreslenen kalıcı encoding önbelleği.
+
+    Anahtar: görüntü piksellerinin SHA-256 özeti + dedektör/encoder ayarları.
+    Değer: 128 boyutlu encoding ya da "yüz bulunamadı" kararı (NULL).
+    Kayıt sayısı max_entries ile sınırlıdır; en uzun süre kullanılmayanlar silinir.
+    Yazımlar commit_every kayıtta bir commit edilir: eğitim yarıda kesilse de o ana
+    kadar encode edilen görüntüler kaybolmaz, veritabanı kilidi de uzun süre tutulmaz.
+    """
+
+    def __init__(self, path: Path, settings: dict, max_entries: int = 50000, commit_every: int = 256):
+        """
+        Args:
+            path: SQLite önbellek dosyası
+            settings: Encoding'i etkileyen ayarlar (anahtarın parçası olur)
+            max_entries: Saklanacak en fazla kayıt
+            commit_every: Kaç yazımda bir commit edileceği
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.commit_every = max(1, commit_every)
+        self._uncommitted = 0
+        self.settings_key = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS encodings ("
+            " key TEXT PRIMARY KEY,"
+            " encoding BLOB,"
+            " last_used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS encodings_last_used ON encodings (last_used)")
+        self.connection.commit()
+
+    def key_for(self, image: np.ndarray) -> str:
+        """Görüntü içeriği ve ayarlar için önbellek anahtarı üretir"""
+        digest = hashlib.sha256()
+        digest.update(str(image.shape).encode('ascii'))
+        digest.update(str(image.dtype).encode('ascii'))
+        digest.update(np.ascontiguousarray(image).data)
+        return f"{self.settings_key}:{digest.hexdigest()}"
+
+    def get(self, key: str) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Returns:
+            (bulundu mu, encoding) - encoding None ise görüntüde yüz yoktur
+        """
+        row = self.connection.execute("SELECT encoding FROM encodings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return False, None
+
+        self.hits += 1
+        self.connection.execute("UPDATE encodings SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._written()
+
+        if row[0] is None:
+            return True, None
+        return True, np.frombuffer(row[0], dtype=np.float64).copy()
+
+    def put(self, key: str, encoding: Optional[np.ndarray]):
+        """Encoding'i ya da 'yüz yok' kararını önbelleğe yazar"""
+        blob = None if encoding is None else np.asarray(encoding, dtype=np.float64).tobytes()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO encodings (key, encoding, last_used) VALUES (?, ?, ?)",
+            (key, blob, time.time())
+        )
+        self._written()
+
+    def _written(self):
+        """Yazımı sayar, commit_every'ye ulaşınca commit eder"""
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.connection.commit()
+            self._uncommitted = 0
+
+    def flush(self):
+        """Bekleyen yazımları kaydeder ve boyut sınırını uygular"""
+        count = self.connection.execute("SELECT COUNT(*) FROM encodings").fetchone()[0]
+        overflow = count - self.max_entries
+
+        if overflow > 0:
+            self.connection.execute(
+                "DELETE FROM encodings WHERE key IN "
+                "(SELECT key FROM encodings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
+            logger.info(f"Encoding önbelleğinden {overflow} eski kayıt silindi")
+
+        self.connection.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.flush()
+        self.connection.close()
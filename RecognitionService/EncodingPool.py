@@ -0,0 +1,136 @@
+import face_recognition
+import numpy as np
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+def detect_and_encode(image: np.ndarray, settings: dict) -> Optional[np.ndarray]:
+    """Görüntüdeki ilk yüzün encoding'ini döndürür, yüz yoksa None (hatalar yükseltilir)"""
+    # Görüntüdeki yüzlerin konumlarını bul
+    face_locations = face_recognition.face_locations(
+        image,
+        number_of_times_to_upsample=settings['number_of_times_to_upsample'],
+        model=settings['detector']
+    )
+
+    if not face_locations:
+        logger.warning("Görüntüde yüz bulunamadı")
+        return None
+
+    # İlk yüzün encoding'ini al
+    face_encodings = face_recognition.face_encodings(
+        image,
+        face_locations,
+        num_jitters=settings['num_jitters'],
+        model=settings['landmark_model']
+    )
+
+    if face_encodings:
+        return face_encodings[0]
+    return None
+
+
+def _encode_chunk(shm_name: str, layout: List[Tuple[int, tuple, str]], settings: dict) -> List[Tuple[bool, Optional[np.ndarray]]]:
+    """
+    Worker süreci: paylaşımlı bellekteki görüntüleri kopyalamadan okuyup encode eder
+
+    Returns:
+        Her görüntü için (başarılı mı, encoding)
+    """
+    # Worker'lar ana sürecin resource tracker'ını paylaşır; bloğu yalnızca ana süreç siler
+    shm = SharedMemory(name=shm_name)
+
+    results = []
+    try:
+        for offset, shape, dtype in layout:
+            image = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            try:
+                results.append((True, detect_and_encode(image, settings)))
+            except Exception as e:
+                logger.warning(f"Face encoding çıkarılamadı: {e}")
+                results.append((False, None))
+            del image
+    finally:
+        shm.close()
+
+    return results
+
+
+class ParallelEncoder:
+    """
+    Yüz encoding işini süreç havuzuna dağıtan sınıf.
+
+    Görüntüler parça (chunk) halinde tek bir paylaşımlı bellek bloğuna kopyalanır,
+    worker'lar yalnızca bloğun adını ve yerleşimini alır (pickle ile dizi taşınmaz).
+    Sonuçlar gönderim sırasıyla döndürülür, böylece çıktı deterministiktir.
+    """
+
+    def __init__(self, settings: dict, workers: int, chunk_size: int = 8):
+        """
+        Args:
+            settings: Dedektör/encoder ayarları
+            workers: Süreç sayısı
+            chunk_size: Bir worker görevine verilecek görüntü sayısı
+        """
+        self.settings = settings
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    def _submit_chunk(self, images: List[np.ndarray]):
+        """Görüntüleri paylaşımlı belleğe kopyalar ve worker'a gönderir"""
+        layout = []
+        offset = 0
+        for image in images:
+            layout.append((offset, image.shape, image.dtype.str))
+            offset += image.nbytes
+
+        shm = SharedMemory(create=True, size=max(offset, 1))
+        for image, (start, shape, dtype) in zip(images, layout):
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = image
+
+        future = self.executor.submit(_encode_chunk, shm.name, layout, self.settings)
+        return shm, future
+
+    def encode(self, images: List[np.ndarray]) -> List[Tuple[bool, Optional[np.ndarray]]]:
+        """
+        Görüntüleri paralel encode eder
+
+        Returns:
+            Girdi sırasıyla (başarılı mı, encoding) listesi
+        """
+        chunks = [images[i:i + self.chunk_size] for i in range(0, len(images), self.chunk_size)]
+        pending = deque()
+        results = []
+
+        # Paylaşımlı bellek kullanımını sınırlamak için worker başına en fazla iki parça uçuşta
+        for chunk in chunks:
+            if len(pending) >= self.workers * 2:
+                results.extend(self._collect(*pending.popleft()))
+            pending.append(self._submit_chunk(chunk))
+
+        while pending:
+            results.extend(self._collect(*pending.popleft()))
+
+        return results
+
+    @staticmethod
+    def _collect(shm: SharedMemory, future):
+        try:
+            return future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        self.executor.shutdown()
@@ -0,0 +1,289 @@
+import numpy as np
+import logging
+from typing import Sequence
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+ENCODING_DIM = 128
+
+
+class FaceMatcher:
+    """
+    Galeriyi tek bir bitişik float32 matris olarak tutan toplu yüz eşleştirici.
+
+    face_recognition.compare_faces / face_distance her yüz için listeyi yeniden
+    diziye çevirir; burada galeri bir kez hazırlanır ve bir frame'deki tüm yüzler
+    tek bir matris çarpımı ile bütün galeriye karşı skorlanır:
+        ||q - g||^2 = ||q||^2 + ||g||^2 - 2 q·g
+    """
+
+    def __init__(self, encodings: Sequence[np.ndarray], names: Sequence[str] = None, ids: Sequence[int] = None,
+                 index=None, sq_norms: np.ndarray = None):
+        """
+        Args:
+            encodings: 128 boyutlu yüz encoding'leri (liste ya da (N, 128) dizi)
+            names: Her satırın kişi adı
+            ids: Her satırın kullanıcı ID'si
+            index: Aday satırları daraltan galeri indeksi (None = tüm galeri taranır)
+            sq_norms: Önceden hesaplanmış galeri norm kareleri (galeri dosyasından)
+        """
+        matrix = np.asarray(encodings, dtype=np.float32)
+        self.encodings = np.ascontiguousarray(matrix.reshape(-1, ENCODING_DIM))
+        # Galeri normlarının karesi bir kez hesaplanır
+        if sq_norms is None:
+            sq_norms = np.einsum('ij,ij->i', self.encodings, self.encodings)
+        self.sq_norms = sq_norms
+        # Bellek eşlemeli galeride isim/ID dizileri kopyalanmadan tutulur
+        self.names = names if names is not None else []
+        self.ids = ids if ids is not None else []
+        self.index = index
+
+    def __len__(self) -> int:
+        return self.encodings.shape[0]
+
+    @classmethod
+    def empty(cls) -> 'FaceMatcher':
+        """Boş galerili eşleştirici döndürür"""
+        return cls(np.empty((0, ENCODING_DIM), dtype=np.float32))
+
+    def distances(self, face_encodings: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Sorgu yüzleri ile tüm galeri arasındaki öklid mesafelerini hesaplar
+
+        Returns:
+            (sorgu sayısı, galeri boyutu) şeklinde float32 mesafe matrisi
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        query_sq_norms = np.einsum('ij,ij->i', queries, queries)
+
+        # Tek GEMM çağrısı: (Q, 128) x (128, N)
+        squared = queries @ self.encodings.T
+        squared *= -2.0
+        squared += query_sq_norms[:, None]
+        squared += self.sq_norms[None, :]
+
+        # Yuvarlama hataları küçük negatif değerler üretebilir
+        np.maximum(squared, 0.0, out=squared)
+        return np.sqrt(squared, out=squared)
+
+    def match(self, face_encodings: Sequence[np.ndarray], tolerance: float = 0.6) -> dict:
+        """
+        Bir frame'deki tüm yüzleri galeriyle tek seferde eşleştirir
+
+        Args:
+            face_encodings: Sorgu encoding'leri
+            tolerance: Eşleştirme toleransı (düşük = daha katı)
+
+        Returns:
+            {'indices': en yakın galeri satırı (-1 = galeri boş),
+             'distances': en yakın mesafe,
+             'matches': tolerans içinde mi}
+        """
+        query_count = len(face_encodings)
+
+        if query_count == 0 or len(self) == 0:
+            return {
+                'indices': np.full(query_count, -1, dtype=np.intp),
+                'distances': np.full(query_count, np.inf, dtype=np.float32),
+                'matches': np.zeros(query_count, dtype=bool)
+            }
+
+        if self.index is not None and not self.index.exhaustive:
+            return self._match_candidates(face_encodings, tolerance)
+
+        distance_matrix = self.distances(face_encodings)
+        best_indices = np.argmin(distance_matrix, axis=1)
+        best_distances = distance_matrix[np.arange(query_count), best_indices]
+
+        return {
+            'indices': best_indices,
+            'distances': best_distances,
+            'matches': best_distances <= tolerance
+        }
+
+    def match_with_labels(self, face_encodings: Sequence[np.ndarray], tolerance: float = 0.6) -> dict:
+        """
+        match() sonucuna her sorgunun en yakın satırının adını ve kullanıcı ID'sini ekler
+
+        Galeri sunucusu ve yerel eşleştirme aynı sonuç şeklini döndürür; çağıran taraf
+        galeri satırlarına (names / ids) erişmek zorunda kalmaz.
+
+        Returns:
+            match() sonucu + {'names': ad ya da None, 'ids': kullanıcı ID'si ya da None}
+        """
+        result = self.match(face_encodings, tolerance=tolerance)
+        result['names'] = [self.names[index] if index >= 0 else None for index in result['indices']]
+        result['ids'] = [int(self.ids[index]) if index >= 0 else None for index in result['indices']]
+        return result
+
+    def _match_candidates(self, face_encodings: Sequence[np.ndarray], tolerance: float) -> dict:
+        """Yalnızca indeksin önerdiği aday satırlar üzerinde kesin mesafe hesaplar"""
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        query_sq_norms = np.einsum('ij,ij->i', queries, queries)
+
+        best_indices = np.full(len(queries), -1, dtype=np.intp)
+        best_distances = np.full(len(queries), np.inf, dtype=np.float32)
+
+        for i, rows in enumerate(self.index.candidates(queries)):
+            if len(rows) == 0:
+                continue
+
+            squared = self.encodings[rows] @ queries[i]
+            squared *= -2.0
+            squared += self.sq_norms[rows]
+            squared += query_sq_norms[i]
+
+            best = int(np.argmin(squared))
+            best_indices[i] = rows[best]
+            best_distances[i] = np.sqrt(max(float(squared[best]), 0.0))
+
+        return {
+            'indices': best_indices,
+            'distances': best_distances,
+            'matches': best_distances <= tolerance
+        }
+
+
+class AggregatedFaceMatcher(FaceMatcher):
+    """
+    Kişi bazlı toplulaştırılmış galeri ile eşleştirici.
+
+    Her user_id'nin encoding'leri bir merkez (centroid) ve birkaç temsilci
+    örneğe indirgenir. Sorgular önce bu kompakt kümeyle eşleştirilir. Merkez gerçek
+    bir görüntü olmadığından yalnızca kişileri sıralamakta kullanılır; kazanan kişinin
+    mesafesi ve galeri satırı her zaman gerçek temsilci satırlarından gelir. Yalnızca
+    tolerans sınırına ya da ikinci adaya çok yakın (belirsiz) skorlar için
+    aday kişilerin tüm satırlarına geri dönülür. Kompakt galeri zaten küçük
+    olduğundan bu modda galeri indeksi kullanılmaz.
+    """
+
+    def __init__(self, encodings: Sequence[np.ndarray], names: Sequence[str] = None, ids: Sequence[int] = None,
+                 index=None, sq_norms: np.ndarray = None, exemplars_per_person: int = 1, ambiguity_margin: float = 0.05, max_fallback_persons: int = 3):
+        """
+        Args:
+            exemplars_per_person: Merkeze ek olarak saklanacak temsilci sayısı
+            ambiguity_margin: Belirsiz kabul edilecek mesafe aralığı
+            max_fallback_persons: Geri dönüşte tam satırları taranacak en fazla kişi
+        """
+        super().__init__(encodings, names, ids, index=None, sq_norms=sq_norms)
+        self.exemplars_per_person = exemplars_per_person
+        self.ambiguity_margin = ambiguity_margin
+        self.max_fallback_persons = max_fallback_persons
+        self.fallback_count = 0
+        self._build_compact_gallery()
+
+    def _build_compact_gallery(self):
+        """Her kişi için merkez + temsilci satırlarından kompakt galeri oluşturur"""
+        keys = list(self.ids) if len(self.ids) == len(self) else list(self.names)
+        person_rows = {}
+        for row, key in enumerate(keys):
+            person_rows.setdefault(key, []).append(row)
+
+        compact_vectors = []
+        compact_rows = []
+        # Kompakt satır kişinin merkezi mi (gerçek bir galeri satırına karşılık gelmez)
+        compact_is_centroid = []
+        person_starts = []
+        self.person_full_rows = []
+
+        for rows in person_rows.values():
+            rows = np.asarray(rows, dtype=np.intp)
+            vectors = self.encodings[rows]
+            centroid = vectors.mean(axis=0)
+
+            # Merkeze en yakın gerçek satır kişiyi temsil eder (medoid)
+            to_centroid = np.linalg.norm(vectors - centroid, axis=1)
+            chosen = [int(np.argmin(to_centroid))]
+
+            # En uzak nokta örneklemesi ile birbirinden farklı temsilciler seç
+            min_dist = np.linalg.norm(vectors - vectors[chosen[0]], axis=1)
+            while len(chosen) < min(self.exemplars_per_person, len(rows)):
+                candidate = int(np.argmax(min_dist))
+                chosen.append(candidate)
+                min_dist = np.minimum(min_dist, np.linalg.norm(vectors - vectors[candidate], axis=1))
+
+            person_starts.append(len(compact_vectors))
+            self.person_full_rows.append(rows)
+
+            # Tek görüntülü kişide merkez ile örnek aynıdır, ayrı merkez satırı eklenmez
+            if len(rows) > 1:
+                compact_vectors.append(centroid)
+                compact_rows.append(-1)
+                compact_is_centroid.append(True)
+
+            # Temsilciler (ilki medoid) gerçek satırlardır
+            for local_row in chosen:
+                compact_vectors.append(vectors[local_row])
+                compact_rows.append(rows[local_row])
+                compact_is_centroid.append(False)
+
+        self.compact = FaceMatcher(compact_vectors if compact_vectors else np.empty((0, ENCODING_DIM)))
+        self.compact_rows = np.asarray(compact_rows, dtype=np.intp)
+        self.compact_is_centroid = np.asarray(compact_is_centroid, dtype=bool)
+        self.person_starts = np.asarray(person_starts, dtype=np.intp)
+
+        logger.info(f"Kompakt galeri: {len(self)} satır -> {len(self.compact)} satır ({len(person_starts)} kişi)")
+
+    def match(self, face_encodings: Sequence[np.ndarray], tolerance: float = 0.6) -> dict:
+        """Önce kompakt galeriyle, belirsiz skorlarda tam satırlarla eşleştirir"""
+        query_count = len(face_encodings)
+
+        if query_count == 0 or len(self) == 0:
+            return super().match(face_encodings, tolerance)
+
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+
+        # Kişi sıralaması: her kişinin kompakt satırları (merkez dahil) üzerinden minimum mesafe
+        compact_distances = self.compact.distances(queries)
+        person_distances = np.minimum.reduceat(compact_distances, self.person_starts, axis=1)
+
+        best_persons = np.argmin(person_distances, axis=1)
+        rank_distances = person_distances[np.arange(query_count), best_persons]
+
+        # Kazanan kişinin mesafesi gerçek temsilci satırlarından hesaplanır (merkez hariç)
+        exemplar_distances = np.where(self.compact_is_centroid, np.inf, compact_distances)
+        best_indices = np.empty(query_count, dtype=np.intp)
+        best_distances = np.empty(query_count, dtype=np.float32)
+        for i, person in enumerate(best_persons):
+            start = self.person_starts[person]
+            end = self.person_starts[person + 1] if person + 1 < len(self.person_starts) else len(self.compact)
+            best = start + int(np.argmin(exemplar_distances[i, start:end]))
+            best_indices[i] = self.compact_rows[best]
+            best_distances[i] = exemplar_distances[i, best]
+
+        # Belirsiz sorgular: tolerans sınırına ya da ikinci kişiye çok yakın olanlar
+        if person_distances.shape[1] > 1:
+            second_distances = np.partition(person_distances, 1, axis=1)[:, 1]
+        else:
+            second_distances = np.full(query_count, np.inf, dtype=np.float32)
+
+        near_threshold = np.abs(best_distances - tolerance) < self.ambiguity_margin
+        close_second = (rank_distances <= tolerance + self.ambiguity_margin) & \
+                       (second_distances - rank_distances < self.ambiguity_margin)
+        ambiguous = near_threshold | close_second
+
+        for i in np.flatnonzero(ambiguous):
+            self.fallback_count += 1
+
+            # En yakın birkaç aday kişinin tüm satırlarıyla tam eşleştirme
+            candidate_count = min(self.max_fallback_persons, person_distances.shape[1])
+            candidates = np.argsort(person_distances[i])[:candidate_count]
+            rows = np.concatenate([self.person_full_rows[p] for p in candidates])
+
+            diff = self.encodings[rows] - queries[i]
+            row_distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+            best = int(np.argmin(row_distances))
+
+            best_indices[i] = rows[best]
+            best_distances[i] = row_distances[best]
+
+        return {
+            'indices': best_indices,
+            'distances': best_distances,
+            'matches': best_distances <= tolerance
+        }
@@ -0,0 +1,193 @@
+import numpy as np
+import logging
+import time
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+def box_iou(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    """İki (top, right, bottom, left) kutusunun kesişim / birleşim oranı"""
+    top, right = max(a[0], b[0]), min(a[1], b[1])
+    bottom, left = min(a[2], b[2]), max(a[3], b[3])
+
+    intersection = max(0, right - left) * max(0, bottom - top)
+    if intersection == 0:
+        return 0.0
+
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    return intersection / float(area_a + area_b - intersection)
+
+
+class Track:
+    """Frame'ler boyunca izlenen tek bir yüz ve taşıdığı kimlik"""
+
+    __slots__ = ('track_id', 'location', 'last_seen', 'hits', 'name', 'user_id', 'confidence',
+                 'encoded_at', 'pending_since')
+
+    def __init__(self, track_id: int, location: tuple, now: float):
+        self.track_id = track_id
+        self.location = location
+        self.last_seen = now
+        self.hits = 1
+
+        # Kimlik (encoding eşleşmesinden sonra dolar)
+        self.name = None
+        self.user_id = None
+        self.confidence = 0.0
+        self.encoded_at = None
+        # Encoding isteği gönderildiyse gönderilme zamanı (tekrar gönderilmez)
+        self.pending_since = None
+
+    @property
+    def centroid(self) -> Tuple[float, float]:
+        top, right, bottom, left = self.location
+        return (left + right) / 2.0, (top + bottom) / 2.0
+
+
+class FaceTracker:
+    """
+    Tespitler arasında yüzleri IoU / merkez uzaklığı ile eşleştiren hafif izleyici.
+
+    Kimlik izle birlikte taşınır; encoding yalnızca iz yeniyse, güveni düşükse ya da
+    periyodik doğrulama zamanı geldiyse yeniden hesaplanır. Kapıda bekleyen bir kişi
+    için her frame'de ResNet encoder çağrılmaz.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, centroid_threshold: float = 0.5, max_age: float = 1.0,
+                 reverify_interval: float = 2.0, reverify_below_confidence: float = 0.55,
+                 pending_timeout: float = 1.0):
+        """
+        Args:
+            iou_threshold: Aynı iz sayılmak için en düşük IoU
+            centroid_threshold: IoU yetmezse merkezler arası uzaklık / kutu genişliği üst sınırı
+            max_age: Bu süre (saniye) görülmeyen izler silinir
+            reverify_interval: Tanınmış izin yeniden encode edilme aralığı (saniye)
+            reverify_below_confidence: Bu güvenin altındaki izler her tespitte yeniden encode edilir
+            pending_timeout: Yanıtı gelmeyen encoding isteğinin yeniden gönderilme süresi
+        """
+        self.iou_threshold = iou_threshold
+        self.centroid_threshold = centroid_threshold
+        self.max_age = max_age
+        self.reverify_interval = reverify_interval
+        self.reverify_below_confidence = reverify_below_confidence
+        self.pending_timeout = pending_timeout
+
+        self.tracks = {}
+        self._next_id = 0
+
+        self.stats = {
+            'tracks_created': 0,
+            'encodings_requested': 0,
+            'encodings_skipped': 0
+        }
+
+    def update(self, face_locations: List[tuple], now: float = None) -> List[Track]:
+        """
+        Yeni tespitleri mevcut izlerle eşleştirir
+
+        Returns:
+            face_locations ile aynı sırada izler (eşleşmeyen tespitler için yeni iz)
+        """
+        now = time.monotonic() if now is None else now
+
+        # Uzun süredir görülmeyen izler düşer
+        for track_id in [tid for tid, track in self.tracks.items() if now - track.last_seen > self.max_age]:
+            del self.tracks[track_id]
+
+        candidates = list(self.tracks.values())
+        assigned = [None] * len(face_locations)
+        used = set()
+
+        # Açgözlü eşleştirme: en yüksek IoU'dan başla
+        pairs = []
+        for i, location in enumerate(face_locations):
+            for track in candidates:
+                iou = box_iou(location, track.location)
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, i, track.track_id))
+                else:
+                    distance = self._centroid_distance(location, track)
+                    if distance <= self.centroid_threshold:
+                        # IoU eşiğin altındaysa merkez uzaklığı daha düşük öncelikli aday
+                        pairs.append((-distance, i, track.track_id))
+
+        for _, i, track_id in sorted(pairs, reverse=True):
+            if assigned[i] is not None or track_id in used:
+                continue
+            assigned[i] = self.tracks[track_id]
+            used.add(track_id)
+
+        result = []
+        for i, location in enumerate(face_locations):
+            track = assigned[i]
+            if track is None:
+                track = Track(self._next_id, tuple(location), now)
+                self.tracks[track.track_id] = track
+                self._next_id += 1
+                self.stats['tracks_created'] += 1
+            else:
+                track.location = tuple(location)
+                track.last_seen = now
+                track.hits += 1
+            result.append(track)
+
+        return result
+
+    @staticmethod
+    def _centroid_distance(location: tuple, track: Track) -> float:
+        top, right, bottom, left = location
+        cx, cy = (left + right) / 2.0, (top + bottom) / 2.0
+        tx, ty = track.centroid
+        width = max(1, right - left)
+        return float(np.hypot(cx - tx, cy - ty)) / width
+
+    def needs_encoding(self, track: Track, now: float = None) -> bool:
+        """İz için encoding (yeniden) hesaplanmalı mı"""
+        now = time.monotonic() if now is None else now
+
+        if track.pending_since is not None and now - track.pending_since < self.pending_timeout:
+            return False
+
+        due = (
+            track.encoded_at is None
+            or track.confidence < self.reverify_below_confidence
+            or now - track.encoded_at >= self.reverify_interval
+        )
+
+        if due:
+            self.stats['encodings_requested'] += 1
+        else:
+            self.stats['encodings_skipped'] += 1
+        return due
+
+    def mark_pending(self, track: Track, now: float = None):
+        track.pending_since = time.monotonic() if now is None else now
+
+    def assign(self, track_id: int, name: Optional[str], user_id: Optional[int], confidence: float,
+               now: float = None) -> Optional[Track]:
+        """
+        Encoding eşleşmesinin sonucunu ize yazar
+
+        Returns:
+            İz; bu arada silindiyse None
+        """
+        track = self.tracks.get(track_id)
+        if track is None:
+            return None
+
+        track.name = name
+        track.user_id = user_id
+        track.confidence = confidence
+        track.encoded_at = time.monotonic() if now is None else now
+        track.pending_since = None
+        return track
+
+    def clear(self):
+        self.tracks.clear()
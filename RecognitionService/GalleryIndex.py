@@ -0,0 +1,221 @@
+import numpy as np
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+def gallery_fingerprint(encodings: np.ndarray) -> int:
+    """Galeri matrisinin içerik özetini (crc32) döndürür"""
+    matrix = np.ascontiguousarray(encodings, dtype=np.float32)
+    return zlib.crc32(matrix.tobytes()) ^ matrix.shape[0]
+
+
+class BruteForceIndex:
+    """Tüm galeriyi tarayan kesin (exact) indeks"""
+
+    kind = "brute"
+    exhaustive = True
+
+    def __init__(self, fingerprint: int = 0):
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, encodings: np.ndarray, **params) -> 'BruteForceIndex':
+        return cls(fingerprint=gallery_fingerprint(encodings))
+
+    def candidates(self, queries: np.ndarray) -> Optional[List[np.ndarray]]:
+        """Kesin indekste aday filtrelemesi yoktur, tüm galeri taranır"""
+        return None
+
+    def _arrays(self) -> dict:
+        return {}
+
+    @classmethod
+    def _from_arrays(cls, arrays: dict, fingerprint: int) -> 'BruteForceIndex':
+        return cls(fingerprint=fingerprint)
+
+
+class IVFIndex:
+    """
+    Saf NumPy ters dosya (IVF) indeksi.
+
+    Galeri k-means ile n_lists kümeye bölünür; sorgu yalnızca merkezine en
+    yakın n_probe kümenin satırlarıyla karşılaştırılır. n_probe, geri çağırma
+    (recall) ile gecikme arasındaki ayardır: n_probe = n_lists kesin aramaya eşittir.
+    """
+
+    kind = "ivf"
+    exhaustive = False
+
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, list_rows: np.ndarray,
+                 n_probe: int = 8, fingerprint: int = 0):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.centroid_sq_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.n_probe = n_probe
+        self.fingerprint = fingerprint
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, encodings: np.ndarray, n_lists: int = None, n_probe: int = 8,
+              iterations: int = 15, seed: int = 0, **params) -> 'IVFIndex':
+        """
+        Galeri üzerinde k-means eğiterek indeksi oluşturur
+
+        Args:
+            n_lists: Küme sayısı (None ise ~sqrt(N))
+            n_probe: Sorgu başına taranacak küme sayısı
+            iterations: k-means iterasyon sayısı
+        """
+        data = np.ascontiguousarray(encodings, dtype=np.float32)
+        count = data.shape[0]
+        n_lists = max(1, min(n_lists or int(np.sqrt(count)), count))
+
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(count, n_lists, replace=False)].copy()
+        data_sq_norms = np.einsum('ij,ij->i', data, data)
+
+        assignments = np.zeros(count, dtype=np.intp)
+        for _ in range(iterations):
+            assignments = cls._nearest_lists(data, data_sq_norms, centroids)
+
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, data)
+            counts = np.bincount(assignments, minlength=n_lists)
+
+            # Boş kalan kümeler eski merkezini korur
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        assignments = cls._nearest_lists(data, data_sq_norms, centroids)
+
+        # Satırları küme sırasına göre diz (CSR benzeri düzen)
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.intp)
+
+        logger.info(f"IVF indeksi oluşturuldu: {count} satır, {n_lists} küme, n_probe={n_probe}")
+
+        return cls(centroids, list_offsets, order.astype(np.intp), n_probe=n_probe,
+                   fingerprint=gallery_fingerprint(data))
+
+    @staticmethod
+    def _nearest_lists(data: np.ndarray, data_sq_norms: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Her satır için en yakın merkezin indeksini döndürür"""
+        scores = data @ centroids.T
+        scores *= -2.0
+        scores += np.einsum('ij,ij->i', centroids, centroids)[None, :]
+        scores += data_sq_norms[:, None]
+        return np.argmin(scores, axis=1)
+
+    def candidates(self, queries: np.ndarray) -> List[np.ndarray]:
+        """Her sorgu için taranacak galeri satırlarını döndürür"""
+        queries = np.asarray(queries, dtype=np.float32)
+        n_probe = max(1, min(self.n_probe, self.n_lists))
+
+        scores = queries @ self.centroids.T
+        scores *= -2.0
+        scores += self.centroid_sq_norms[None, :]
+
+        if n_probe < self.n_lists:
+            probes = np.argpartition(scores, n_probe - 1, axis=1)[:, :n_probe]
+        else:
+            probes = np.broadcast_to(np.arange(self.n_lists), scores.shape)
+
+        return [
+            np.concatenate([self.list_rows[self.list_offsets[list_id]:self.list_offsets[list_id + 1]] for list_id in probe])
+            for probe in probes
+        ]
+
+    def _arrays(self) -> dict:
+        return {
+            'centroids': self.centroids,
+            'list_offsets': self.list_offsets,
+            'list_rows': self.list_rows,
+            'n_probe': np.array(self.n_probe)
+        }
+
+    @classmethod
+    def _from_arrays(cls, arrays: dict, fingerprint: int) -> 'IVFIndex':
+        return cls(arrays['centroids'], arrays['list_offsets'], arrays['list_rows'],
+                   n_probe=int(arrays['n_probe']), fingerprint=fingerprint)
+
+
+INDEX_TYPES = {
+    BruteForceIndex.kind: BruteForceIndex,
+    IVFIndex.kind: IVFIndex
+}
+
+
+def build_index(encodings: np.ndarray, index_type: str = "auto", min_ivf_size: int = 2000, **params):
+    """
+    Galeri için indeks oluşturur
+
+    Args:
+        index_type: 'brute', 'ivf' veya 'auto' (galeri min_ivf_size'dan büyükse ivf)
+        params: İndeks tipine özel parametreler (n_lists, n_probe, ...)
+    """
+    if index_type == "auto":
+        index_type = IVFIndex.kind if len(encodings) >= min_ivf_size else BruteForceIndex.kind
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Geçersiz indeks tipi: {index_type}")
+
+    if len(encodings) == 0:
+        return BruteForceIndex()
+
+    return INDEX_TYPES[index_type].build(encodings, **params)
+
+
+def save_index(index, path: Path) -> bool:
+    """İndeksi model dosyasının yanına .npz olarak kaydeder"""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, kind=np.array(index.kind), fingerprint=np.array(index.fingerprint), **index._arrays())
+        os.replace(tmp_path, path)
+        logger.info(f"İndeks kaydedildi: {path} ({index.kind})")
+        return True
+    except Exception as e:
+        logger.error(f"İndeks kaydedilemedi: {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        return False
+
+
+def load_index(path: Path, expected_fingerprint: int = None):
+    """
+    Önceden oluşturulmuş indeksi yükler
+
+    Returns:
+        İndeks nesnesi; dosya yoksa ya da galeriyle uyuşmuyorsa None
+    """
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+
+        fingerprint = int(arrays.pop('fingerprint'))
+        if expected_fingerprint is not None and fingerprint != expected_fingerprint:
+            logger.warning(f"İndeks galeriyle uyuşmuyor, yok sayılıyor: {path}")
+            return None
+
+        return INDEX_TYPES[str(arrays.pop('kind'))]._from_arrays(arrays, fingerprint)
+    except Exception as e:
+        logger.error(f"İndeks yüklenemedi: {e}")
+        return None
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Yerel galeri / eşleştirme servisi
+Galeriyi tek bir süreçte tutar, kamera süreçleri ve komut satırı araçları Unix soketi
+üzerinden toplu eşleştirme sorgusu gönderir.
+
+Kullanım:
+    python GalleryServer.py --model face_recognition_model.gallery --socket gallery.sock
+"""
+import argparse
+import json
+import logging
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from FaceMatcher import ENCODING_DIM
+from ModelTrainer import FaceRecognitionTrainer
+from ModelReloader import ModelReloader
+from config import GALLERY_SOCKET, GALLERY_CHECK_INTERVAL
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# Mesaj çerçevesi: header uzunluğu, gövde uzunluğu (little-endian uint32)
+FRAME = struct.Struct('<II')
+# Tek sorguda kabul edilen en fazla yüz (bozuk istemcinin sunucuyu şişirmesini önler)
+MAX_QUERY_FACES = 1024
+# JSON header sınırı: yanıt header'ı da yüz başına isim/mesafe taşır, MAX_QUERY_FACES yüz için yeterlidir
+MAX_HEADER_BYTES = 1024 * 1024
+
+
+def send_message(sock: socket.socket, header: dict, body: bytes = b''):
+    """JSON header ve ham gövdeyi tek çerçeve olarak gönderir"""
+    header_bytes = json.dumps(header).encode('utf-8')
+    sock.sendall(FRAME.pack(len(header_bytes), len(body)) + header_bytes + body)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Bağlantı kapandı")
+        received += count
+    return bytes(buffer)
+
+
+def recv_message(sock: socket.socket):
+    """
+    Returns:
+        (header, gövde) - karşı taraf bağlantıyı kapattıysa ConnectionError,
+        çerçeve sınırları aşıyorsa ya da header bozuksa ValueError
+    """
+    header_size, body_size = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    # Boyutlar okumadan önce denetlenir: bozuk çerçeve için 4 GB'lık tampon ayrılmaz
+    if header_size > MAX_HEADER_BYTES:
+        raise ValueError(f"Header çok büyük: {header_size} bayt")
+    if body_size > MAX_QUERY_FACES * ENCODING_DIM * 4:
+        raise ValueError(f"Mesaj çok büyük: {body_size} bayt")
+    header = json.loads(_recv_exact(sock, header_size))
+    body = _recv_exact(sock, body_size) if body_size else b''
+    return header, body
+
+
+class _GalleryRequestHandler(socketserver.BaseRequestHandler):
+    """Bir istemci bağlantısı: bağlantı kapanana kadar sorguları sırayla yanıtlar"""
+
+    def setup(self):
+        with self.server.connections_lock:
+            self.server.connections.add(self.request)
+
+    def finish(self):
+        with self.server.connections_lock:
+            self.server.connections.discard(self.request)
+
+    def handle(self):
+        while True:
+            try:
+                header, body = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            except ValueError as e:
+                # Çerçeve sınırı kaybedildi: hata bildirilip bağlantı kapatılır
+                logger.warning(f"Geçersiz mesaj, bağlantı kapatılıyor: {e}")
+                try:
+                    send_message(self.request, {'error': str(e)})
+                except OSError:
+                    pass
+                return
+
+            try:
+                reply = self.server.gallery.handle_request(header, body)
+            except Exception as e:
+                logger.error(f"Sorgu işlenemedi: {e}")
+                reply = {'error': str(e)}
+
+            try:
+                send_message(self.request, reply)
+            except OSError:
+                return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Kapanışta açık istemci bağlantıları da kapatılır
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+
+    def close_connections(self):
+        with self.connections_lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class GalleryServer:
+    """
+    Galeriyi (eşleştirici, isimler, ID'ler) tek kopya olarak tutan eşleştirme servisi.
+
+    Her kamera sürecinin modeli ayrı ayrı yükleyip dosyayı yoklaması yerine galeri bu
+    süreçte bir kez yüklenir. Model dosyası değiştiğinde (ya da eğitim 'reload' isteği
+    gönderdiğinde) yeni galeri arka planda ayrı bir trainer'a yüklenir ve hazır olunca tek
+    bir referans atamasıyla devreye alınır; her sorgu başladığı andaki galeriyi kullanır,
+    yarım yüklenmiş bir galeri hiçbir zaman görülmez.
+    """
+
+    def __init__(self, model_path: str = "face_recognition_model.gallery", socket_path: str = str(GALLERY_SOCKET),
+                 gallery_mode: str = "full", index_config: dict = None, check_interval: float = GALLERY_CHECK_INTERVAL,
+                 verify: bool = False):
+        """
+        Args:
+            model_path: Eğitilmiş model dosyası yolu
+            socket_path: Dinlenecek Unix soketi yolu
+            gallery_mode: Eşleştirme galeri modu ('full' veya 'aggregated')
+            index_config: Galeri indeksi ayarları
+            check_interval: inotify yoksa model dosyası değişikliği kontrol aralığı (saniye)
+            verify: Açılışta galeri bloklarının checksum'ını doğrula (yeniden yüklemelerde yapılmaz)
+        """
+        self.model_path = Path(model_path)
+        self.socket_path = Path(socket_path)
+        self.gallery_mode = gallery_mode
+        self.index_config = index_config
+        self.check_interval = check_interval
+
+        self.trainer = FaceRecognitionTrainer(model_save_path=str(self.model_path), gallery_mode=gallery_mode,
+                                              index_config=index_config, use_cache=False)
+        if not self.trainer.load_model(verify=verify):
+            raise RuntimeError("Model yüklenemedi! Önce modeli eğitin.")
+
+        self.reloader = ModelReloader(self.model_path, lambda: self.trainer.load_snapshot(),
+                                      on_reload=self._swap_gallery, poll_interval=check_interval)
+
+        self.stats = {'queries': 0, 'faces': 0, 'reloads': 0}
+        self._stats_lock = threading.Lock()
+        self._server = None
+
+    def _swap_gallery(self, trainer: FaceRecognitionTrainer):
+        """Arka planda yüklenen galeriyi devreye alır"""
+        # Tek referans ataması: sorgular ya eski ya yeni galeriyi bütünüyle görür
+        self.trainer = trainer
+        with self._stats_lock:
+            self.stats['reloads'] += 1
+
+        logger.info(f"Galeri yeniden yüklendi: {len(trainer.known_face_encodings)} encoding (v{trainer.model_version})")
+
+    def reload(self):
+        """Dosya değişikliğini beklemeden arka planda yeniden yüklemeyi başlatır"""
+        self.reloader.trigger()
+
+    def info(self) -> dict:
+        """Yüklü galerinin özeti (istemciler encoding ayarlarını buradan alır)"""
+        trainer = self.trainer
+        return {
+            'model_version': trainer.model_version,
+            'encodings': len(trainer.known_face_encodings),
+            'gallery_mode': trainer.gallery_mode,
+            'index': trainer.index.kind if trainer.index is not None else None,
+            'encoding_settings': dict(trainer.encoding_settings)
+        }
+
+    def handle_request(self, header: dict, body: bytes) -> dict:
+        """Tek bir sorguyu yanıtlar"""
+        op = header.get('op')
+
+        if op == 'info':
+            return self.info()
+
+        if op == 'reload':
+            self.reload()
+            return {'model_version': self.trainer.model_version}
+
+        if op != 'match':
+            return {'error': f"Bilinmeyen işlem: {op}"}
+
+        if len(body) % (ENCODING_DIM * 4) != 0:
+            return {'error': "Encoding boyutu geçersiz"}
+
+        face_encodings = np.frombuffer(body, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        tolerance = float(header.get('tolerance', 0.6))
+
+        # Sorgu boyunca aynı galeri kullanılır (yeniden yükleme araya girse de)
+        trainer = self.trainer
+        result = trainer.matcher.match_with_labels(face_encodings, tolerance=tolerance)
+
+        with self._stats_lock:
+            self.stats['queries'] += 1
+            self.stats['faces'] += len(face_encodings)
+
+        return {
+            'model_version': trainer.model_version,
+            'indices': [int(index) for index in result['indices']],
+            'distances': [float(distance) for distance in result['distances']],
+            'matches': [bool(match) for match in result['matches']],
+            'names': result['names'],
+            'ids': result['ids']
+        }
+
+    def start(self):
+        """Soketi açar ve arka planda dinlemeye başlar"""
+        # Önceki çalıştırmadan kalan soket dosyası bağlanmayı engeller
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        self._server = _UnixServer(str(self.socket_path), _GalleryRequestHandler)
+        self._server.gallery = self
+
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.reloader.start()
+
+        logger.info(f"Galeri servisi dinliyor: {self.socket_path} "
+                    f"({len(self.trainer.known_face_encodings)} encoding, v{self.trainer.model_version})")
+
+    def stop(self):
+        self.reloader.stop()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.close_connections()
+            self._server.server_close()
+            self._server = None
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        logger.info(f"Galeri servisi durduruldu: {self.stats['queries']} sorgu, {self.stats['faces']} yüz, "
+                    f"{self.stats['reloads']} yeniden yükleme")
+
+
+class GalleryClient:
+    """
+    GalleryServer istemcisi
+
+    match() yerel FaceMatcher.match_with_labels ile aynı şekilde sonuç döndürür. Bağlantı
+    kalıcıdır; kopmuşsa bir kez yeniden bağlanılır. Sunucuya ulaşılamazsa ConnectionError.
+    """
+
+    def __init__(self, socket_path: str = str(GALLERY_SOCKET), timeout: float = 2.0):
+        """
+        Args:
+            socket_path: GalleryServer'ın dinlediği Unix soketi
+            timeout: Sorgu başına en uzun bekleme (saniye)
+        """
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self.model_version = None
+        self._sock = None
+        # Aynı bağlantı üzerinde istek/yanıt sırası korunur
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _request(self, header: dict, body: bytes = b'') -> dict:
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                    send_message(self._sock, header, body)
+                    reply, _ = recv_message(self._sock)
+                    break
+                except (OSError, ValueError) as e:
+                    self.close()
+                    if attempt == 1:
+                        raise ConnectionError(f"Galeri servisine ulaşılamadı: {e}") from e
+
+        if 'error' in reply:
+            raise RuntimeError(f"Galeri servisi hatası: {reply['error']}")
+        return reply
+
+    def info(self) -> dict:
+        """Sunucudaki galerinin özeti"""
+        reply = self._request({'op': 'info'})
+        self.model_version = reply['model_version']
+        return reply
+
+    def reload(self):
+        """Sunucudan modeli arka planda yeniden yüklemesini ister (ör. eğitim bittikten sonra)"""
+        self._request({'op': 'reload'})
+
+    def match(self, face_encodings, tolerance: float = 0.6) -> dict:
+        """
+        Tüm yüzleri sunucudaki galeriyle tek sorguda eşleştirir
+
+        Returns:
+            {'indices', 'distances', 'matches', 'names', 'ids', 'model_version'}
+        """
+        queries = np.ascontiguousarray(np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM))
+        if len(queries) == 0:
+            return {
+                'indices': np.empty(0, dtype=np.intp),
+                'distances': np.empty(0, dtype=np.float32),
+                'matches': np.zeros(0, dtype=bool),
+                'names': [],
+                'ids': [],
+                'model_version': self.model_version
+            }
+
+        reply = self._request({'op': 'match', 'tolerance': tolerance}, queries.tobytes())
+        self.model_version = reply['model_version']
+
+        return {
+            'indices': np.asarray(reply['indices'], dtype=np.intp),
+            'distances': np.asarray(reply['distances'], dtype=np.float32),
+            'matches': np.asarray(reply['matches'], dtype=bool),
+            'names': reply['names'],
+            'ids': reply['ids'],
+            'model_version': reply['model_version']
+        }
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Galeriyi tek süreçte tutan yerel eşleştirme servisi")
+    parser.add_argument('--model', default="face_recognition_model.gallery", help="Model dosyası")
+    parser.add_argument('--socket', default=str(GALLERY_SOCKET), help="Dinlenecek Unix soketi")
+    parser.add_argument('--gallery-mode', choices=['full', 'aggregated'], default='full', help="Galeri modu")
+    parser.add_argument('--n-probe', type=int, default=None, help="Sorgu başına taranacak IVF kümesi")
+    parser.add_argument('--check-interval', type=float, default=GALLERY_CHECK_INTERVAL,
+                        help="inotify yoksa model değişikliği kontrol aralığı (saniye)")
+    parser.add_argument('--verify', action='store_true', help="Açılışta galeri checksum'larını doğrula")
+    args = parser.parse_args()
+
+    server = GalleryServer(args.model, args.socket, gallery_mode=args.gallery_mode,
+                           index_config={'n_probe': args.n_probe}, check_interval=args.check_interval,
+                           verify=args.verify)
+    server.start()
+
+    # SIGHUP: model dosyası değişikliğini beklemeden yeniden yükle
+    signal.signal(signal.SIGHUP, lambda signum, frame: server.reload())
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Galeri servisi KeyboardInterrupt ile durduruldu")
+    finally:
+        server.stop()
@@ -0,0 +1,221 @@
+"""
+Sürümlü, bellek eşlemeli (memory-mapped) galeri dosya formatı
+
+Düzen:
+    MAGIC (8 bayt) | header uzunluğu (uint32) | JSON header | dolgu
+    blok 1 | blok 2 | ...   (her blok BLOCK_ALIGNMENT sınırında başlar)
+
+Bloklar:
+    encodings     float32 (N, 128)  -> np.memmap ile kopyasız okunur
+    sq_norms      float32 (N,)      -> eşleştiricinin önceden hesaplanmış normları
+    ids           int64   (N,)
+    name_offsets  int64   (N + 1,)  -> names bloğundaki UTF-8 isim sınırları
+    names         uint8             -> tüm isimlerin ardışık UTF-8 baytları
+    ...                             -> isteğe bağlı ek bloklar (ör. face_data_ids, uploaded_at)
+
+Dosya salt okunur eşlendiği için aynı makinedeki birden fazla kamera süreci
+aynı sayfaları (page cache) paylaşır; yükleme süresi galeri boyutundan bağımsızdır.
+Bu yüzden yüklemede yalnızca header ve blok yerleşimi denetlenir; blok checksum'ları
+yazımda (dosya yer değiştirmeden önce) ya da istenirse (verify=True) doğrulanır.
+Eşlenmiş dosya yerinde değiştirilmez, yeni sürüm yanına yazılıp yer değiştirilir.
+"""
+import numpy as np
+import json
+import logging
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Sequence
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+MAGIC = b"FRGAL\x00\x00\x01"
+FORMAT_VERSION = 1
+BLOCK_ALIGNMENT = 4096
+
+
+class NameTable(Sequence):
+    """names / name_offsets blokları üzerinde isimleri ihtiyaç anında çözen salt okunur liste"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+
+def is_gallery_file(path: Path) -> bool:
+    """Dosyanın galeri formatında olup olmadığını kontrol eder"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _align(offset: int) -> int:
+    return (offset + BLOCK_ALIGNMENT - 1) // BLOCK_ALIGNMENT * BLOCK_ALIGNMENT
+
+
+def write_gallery(path: Path, encodings, names: Sequence[str], ids: Sequence[int],
+                  model_version: int = 1, fingerprint: int = None, extra_blocks: dict = None,
+                  verify: bool = True) -> dict:
+    """
+    Galeriyi ikili formatta yazar
+
+    Args:
+        encodings: (N, 128) encoding'ler
+        names: Her satırın kişi adı
+        ids: Her satırın kullanıcı ID'si
+        model_version: Header'a yazılacak model sürümü
+        fingerprint: İndeks eşleşmesi için galeri özeti
+        extra_blocks: Ek bloklar {isim: numpy dizisi}; okuyucular tanımadıklarını yok sayar
+        verify: Yazılan dosyayı yer değiştirmeden önce checksum'larıyla yeniden oku
+
+    Returns:
+        Yazılan header
+    """
+    encodings = np.ascontiguousarray(np.asarray(encodings, dtype='<f4').reshape(-1, 128))
+    encoded_names = [name.encode('utf-8') for name in names]
+
+    blocks = {
+        'encodings': encodings,
+        'sq_norms': np.einsum('ij,ij->i', encodings, encodings).astype('<f4'),
+        'ids': np.asarray(ids, dtype='<i8'),
+        'name_offsets': np.concatenate([[0], np.cumsum([len(n) for n in encoded_names], dtype='<i8')]).astype('<i8'),
+        'names': np.frombuffer(b"".join(encoded_names), dtype=np.uint8)
+    }
+    for name, array in (extra_blocks or {}).items():
+        blocks[name] = np.ascontiguousarray(array)
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'model_version': model_version,
+        'created_at': time.time(),
+        'count': encodings.shape[0],
+        'dim': encodings.shape[1],
+        'fingerprint': fingerprint,
+        'blocks': {}
+    }
+
+    # Blok ofsetleri header boyutuna bağlı; header'ı geniş bir sınırla yerleştir
+    offset = _align(len(MAGIC) + 4 + 1024 + 256 * len(blocks))
+    checksum = 0
+    for name, array in blocks.items():
+        data = array.tobytes()
+        header['blocks'][name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+            'nbytes': len(data),
+            'crc32': zlib.crc32(data)
+        }
+        checksum = zlib.crc32(data, checksum)
+        offset = _align(offset + len(data))
+    header['checksum'] = checksum
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    if len(MAGIC) + 4 + len(header_bytes) > header['blocks']['encodings']['offset']:
+        raise ValueError("Galeri header'ı ayrılan alana sığmadı")
+
+    # Dosya eşlenmiş durumdayken üzerine yazılmamalı: geçici dosyaya yaz, sonra yer değiştir
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header_bytes).to_bytes(4, 'little'))
+            f.write(header_bytes)
+            for name, array in blocks.items():
+                f.seek(header['blocks'][name]['offset'])
+                f.write(array.tobytes())
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+        # Sayfalar henüz page cache'te: doğrulama ucuzdur, bozuk dosya eskisinin yerine geçmez
+        if verify:
+            read_gallery(tmp_path, verify=True)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    return header
+
+
+def read_header(path: Path) -> dict:
+    """Galeri dosyasının header'ını okur"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Geçersiz galeri dosyası: {path}")
+        header_length = int.from_bytes(f.read(4), 'little')
+        header = json.loads(f.read(header_length).decode('utf-8'))
+
+    if header['format_version'] > FORMAT_VERSION:
+        raise ValueError(f"Desteklenmeyen galeri formatı: v{header['format_version']}")
+    return header
+
+
+def _check_layout(header: dict, file_size: int):
+    """Blokların dosya içinde kaldığını ve boyutlarının header'la tutarlı olduğunu denetler"""
+    for name in ('encodings', 'sq_norms', 'ids', 'name_offsets', 'names'):
+        if name not in header['blocks']:
+            raise ValueError(f"Galeri dosyasında {name} bloğu yok")
+
+    for name, block in header['blocks'].items():
+        expected = int(np.prod(block['shape'], dtype=np.int64)) * np.dtype(block['dtype']).itemsize
+        if block['nbytes'] != expected or block['offset'] + block['nbytes'] > file_size:
+            raise ValueError(f"Galeri dosyası bozuk ya da eksik: {name} bloğu")
+
+    if header['blocks']['encodings']['shape'] != [header['count'], header['dim']]:
+        raise ValueError("Galeri header'ı encoding bloğuyla uyuşmuyor")
+
+
+def read_gallery(path: Path, verify: bool = False) -> dict:
+    """
+    Galeriyi bellek eşlemeli olarak açar
+
+    Varsayılan olarak yalnızca header ve blok yerleşimi denetlenir: checksum hesaplamak
+    tüm encoding sayfalarını okur, yüklemeyi galeri boyutuna bağlar ve paylaşılan
+    sayfaları gereksiz yere diske indirir. Galerinin indeksle eşleşmesi header'daki
+    fingerprint ile denetlenir.
+
+    Args:
+        verify: Blok checksum'larını da doğrula (ör. doğrulama aracı, yazım sonrası)
+
+    Returns:
+        {'header': dict, 'encodings': memmap, 'sq_norms': memmap, 'ids': memmap, 'names': NameTable, ...}
+    """
+    header = read_header(path)
+    _check_layout(header, os.path.getsize(path))
+    arrays = {}
+
+    for name, block in header['blocks'].items():
+        if block['nbytes'] == 0:
+            arrays[name] = np.empty(block['shape'], dtype=block['dtype'])
+            continue
+
+        arrays[name] = np.memmap(path, dtype=block['dtype'], mode='r',
+                                 offset=block['offset'], shape=tuple(block['shape']))
+
+        if verify and zlib.crc32(arrays[name]) != block['crc32']:
+            raise ValueError(f"Galeri checksum hatası: {name} bloğu bozuk")
+
+    gallery = {'header': header, **arrays}
+    gallery['names'] = NameTable(arrays['names'], arrays['name_offsets'])
+    return gallery
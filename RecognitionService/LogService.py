@@ -1,77 +1,412 @@
 import requests
-import base64
 import cv2
+import json
 import logging
+import queue
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
 from datetime import datetime
+from pathlib import Path
+from config import ACCESS_LOG_OUTBOX, ACCESS_LOG_BATCH_SIZE, ACCESS_LOG_FLUSH_INTERVAL, ACCESS_LOG_MAX_BACKOFF
+from config import ACCESS_LOG_SNAPSHOT_QUALITY, ACCESS_LOG_SNAPSHOT_FACE_CROP, ACCESS_LOG_SNAPSHOT_RATE
 
 logger = logging.getLogger(__name__)
 
 
 class AccessLogger:
-    """Geçiş kayıtlarını server'a gönderen servis"""
-    
-    def __init__(self, api_base_url: str, api_token: str = None):
+    """
+    Geçiş kayıtlarını server'a gönderen servis.
+
+    log_access olayı yalnızca bellekteki kuyruğa koyar, tanıma döngüsü HTTP beklemez.
+    Arka plandaki gönderici olayları önce yerel SQLite kuyruğuna (outbox) yazar, sonra
+    toplu uç noktaya tek istekte gönderir; sunucuya ulaşılamazsa üstel beklemeyle tekrar
+    dener. Outbox'ta kalan olaylar servis yeniden başladığında gönderilir. Her olay
+    istemcide üretilen bir client_event_id taşır; sunucu tekrar gönderilen olayları
+    ikinci kez kaydetmez.
+
+    Snapshot'lar JSON'a gömülmez: ham JPEG olarak ayrı tabloda bekler ve bekleyen olay
+    kalmadığında olay kimliğiyle PUT edilir.
+    """
+
+    # Tekrar denenen 4xx durum kodları (diğer 4xx yanıtlar kalıcı hata sayılır)
+    RETRYABLE_STATUS = (408, 429)
+    # Bugünkü kayıtlar okunurken istenen sayfa boyutu (sunucu en fazla 500 verir)
+    TODAY_PAGE_SIZE = 500
+
+    def __init__(self, api_base_url: str, api_token: str = None, outbox_path: Path = ACCESS_LOG_OUTBOX,
+                 batch_size: int = ACCESS_LOG_BATCH_SIZE, flush_interval: float = ACCESS_LOG_FLUSH_INTERVAL,
+                 max_backoff: float = ACCESS_LOG_MAX_BACKOFF, snapshot_config: dict = None):
+        """
+        Args:
+            api_base_url: API sunucu adresi
+            api_token: Yetkilendirme token'ı (opsiyonel)
+            outbox_path: Gönderilmemiş olayların saklandığı SQLite dosyası
+            batch_size: Tek seferde gönderilecek en fazla olay
+            flush_interval: Yeni olay yokken göndericinin uyanma aralığı (saniye)
+            max_backoff: Başarısız gönderimler arası en uzun bekleme (saniye)
+            snapshot_config: Snapshot ayarlarını ezmek için (jpeg_quality, face_crop, crop_margin,
+                max_per_minute, uploads_per_flush)
+        """
         self.api_base_url = api_base_url.rstrip('/')
         self.api_url = f"{self.api_base_url}/api/access-logs/"
-        
+        self.bulk_url = f"{self.api_url}bulk/"
+        self.snapshot_url = f"{self.api_url}snapshots/"
+
         self.session = requests.Session()
         if api_token:
             self.session.headers.update({'Authorization': f'Bearer {api_token}'})
-        
-    def log_access(self, customer_id: int, confidence: float, 
-                   frame: 'np.ndarray' = None, camera_location: str = "Ana Giriş") -> bool:
+
+        self.outbox_path = Path(outbox_path)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+
+        self.snapshot_config = {
+            'jpeg_quality': ACCESS_LOG_SNAPSHOT_QUALITY,
+            'face_crop': ACCESS_LOG_SNAPSHOT_FACE_CROP,
+            'crop_margin': 0.5,  # Yüz kutusunun her yanına eklenecek pay (kutu boyutuna oranla)
+            'max_per_minute': ACCESS_LOG_SNAPSHOT_RATE,
+            'uploads_per_flush': 5  # Bir turda yüklenecek en fazla snapshot
+        }
+        self.snapshot_config.update(snapshot_config or {})
+        # Son bir dakikada kuyruğa alınan snapshot zamanları
+        self.snapshot_times = deque()
+
+        # Tanıma döngüsünden göndericiye (None = kapat)
+        self.events = queue.SimpleQueue()
+        # Kuyruktan alınıp henüz outbox'a yazılamamış olaylar ve snapshot'lar
+        self._unsaved_rows = []
+        self._unsaved_snapshots = []
+        self.backoff = 0.0
+        self.retry_at = 0.0
+
+        self.stats = {
+            'queued': 0,
+            'sent': 0,
+            'rejected': 0,
+            'failed_attempts': 0,
+            'pending': 0,
+            'snapshots_sent': 0,
+            'snapshots_dropped': 0,
+            'snapshots_pending': 0
+        }
+
+        self.sender = threading.Thread(target=self._run, name="AccessLogSender", daemon=True)
+        self.sender.start()
+
+    def log_access(self, customer_id: int, confidence: float,
+                   frame: 'np.ndarray' = None, camera_location: str = "Ana Giriş",
+                   face_location: tuple = None) -> bool:
         """
-        Geçiş kaydını server'a gönder
-        
+        Geçiş kaydını gönderim kuyruğuna al (bloklamaz)
+
         Args:
             customer_id: Müşteri ID
             confidence: Tanınma güven skoru
             frame: Görüntü frame'i (opsiyonel)
             camera_location: Kamera konumu
-            
+            face_location: Frame'deki yüz kutusu (top, right, bottom, left); face_crop açıksa yalnızca bu bölge gönderilir
+
         Returns:
-            bool: Başarılı ise True
+            bool: Kuyruğa alındıysa True
         """
+        if not self.sender.is_alive():
+            logger.error("✗ Geçiş kaydı göndericisi çalışmıyor, kayıt alınamadı")
+            return False
+
+        event = {
+            'client_event_id': uuid.uuid4().hex,
+            'customer_id': customer_id,
+            'confidence_score': confidence,
+            'camera_location': camera_location,
+            # Gecikmeli gönderimde geçiş anı kaybolmasın
+            'entry_time': datetime.now().astimezone().isoformat()
+        }
+
+        # Frame tanıma döngüsünde yeniden kullanılabilir; yalnızca gönderilecek bölge kopyalanır,
+        # JPEG'e gönderici çevirir
+        snapshot = self._snapshot_region(frame, face_location) if frame is not None else None
+        self.events.put((event, snapshot.copy() if snapshot is not None else None))
+        self.stats['queued'] += 1
+        return True
+
+    def _snapshot_region(self, frame: 'np.ndarray', face_location: tuple = None):
+        """Hız sınırı aşılmadıysa gönderilecek frame bölgesini (view) döndürür"""
+        now = time.monotonic()
+        while self.snapshot_times and now - self.snapshot_times[0] > 60:
+            self.snapshot_times.popleft()
+
+        if len(self.snapshot_times) >= self.snapshot_config['max_per_minute']:
+            self.stats['snapshots_dropped'] += 1
+            return None
+        self.snapshot_times.append(now)
+
+        if not self.snapshot_config['face_crop'] or face_location is None:
+            return frame
+
+        height, width = frame.shape[:2]
+        top, right, bottom, left = face_location
+        margin_y = int((bottom - top) * self.snapshot_config['crop_margin'])
+        margin_x = int((right - left) * self.snapshot_config['crop_margin'])
+        return frame[max(0, top - margin_y):min(height, bottom + margin_y),
+                     max(0, left - margin_x):min(width, right + margin_x)]
+
+    def _run(self):
+        """Gönderici döngüsü: olayları outbox'a yazar ve gönderir"""
+        connection = self._open_outbox()
+
+        pending = self._count_pending(connection)
+        if pending:
+            logger.info(f"Outbox'ta gönderilmemiş {pending} geçiş kaydı bulundu")
+
+        # Döngüyü yalnızca kapatma isteği bitirir; bir turdaki hata sonraki turları durdurmaz
+        while True:
+            stopping = self._collect(connection, self._wait_time())
+
+            try:
+                if time.monotonic() >= self.retry_at:
+                    self._flush(connection)
+
+                # Snapshot'lar ertelenir: bekleyen geçiş kaydı kalmadığında yüklenir
+                if not self.stats['pending'] and self.stats['snapshots_pending'] and time.monotonic() >= self.retry_at:
+                    self._upload_snapshots(connection)
+            except Exception as e:
+                logger.error(f"✗ Geçiş kayıtları gönderilemedi: {e}")
+                self._schedule_retry()
+
+            if stopping:
+                break
+
         try:
-            payload = {
-                'customer_id': customer_id,
-                'confidence_score': confidence,
-                'camera_location': camera_location
-            }
-            
-            # Frame varsa base64'e çevir
-            if frame is not None:
-                try:
-                    _, buffer = cv2.imencode('.jpg', frame)
-                    snapshot_base64 = base64.b64encode(buffer).decode('utf-8')
-                    payload['snapshot_base64'] = snapshot_base64
-                except Exception as e:
-                    logger.warning(f"Snapshot encode edilemedi: {e}")
-            
-            response = self.session.post(self.api_url, json=payload, timeout=5)
-            
-            if response.status_code == 201:
-                logger.info(f"✓ Geçiş kaydı oluşturuldu: Customer ID {customer_id}")
-                return True
+            remaining = self._count_pending(connection)
+            if remaining or self.stats['snapshots_pending']:
+                logger.warning(f"{remaining} geçiş kaydı, {self.stats['snapshots_pending']} snapshot outbox'ta bekliyor, "
+                               f"sonraki başlangıçta gönderilecek")
+        except sqlite3.Error as e:
+            logger.error(f"Outbox okunamadı: {e}")
+        if self._unsaved_rows:
+            logger.error(f"{len(self._unsaved_rows)} geçiş kaydı outbox'a yazılamadı ve kayboldu")
+        connection.close()
+
+    def _open_outbox(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.outbox_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " event_id TEXT NOT NULL UNIQUE,"
+            " payload TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " event_id TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL)"
+        )
+        connection.commit()
+        return connection
+
+    def _count_pending(self, connection: sqlite3.Connection) -> int:
+        self.stats['pending'] = connection.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+        self.stats['snapshots_pending'] = connection.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+        return self.stats['pending']
+
+    def _wait_time(self) -> float:
+        """Yeni olay için ne kadar beklenebileceği"""
+        if not self.stats['pending'] and not self.stats['snapshots_pending']:
+            return self.flush_interval
+        return max(0.0, self.retry_at - time.monotonic())
+
+    def _collect(self, connection: sqlite3.Connection, timeout: float) -> bool:
+        """
+        Kuyruktaki olayları tek işlemde outbox'a yazar
+
+        Returns:
+            Kapatma isteği geldiyse True
+        """
+        try:
+            item = self.events.get(timeout=timeout) if timeout > 0 else self.events.get_nowait()
+        except queue.Empty:
+            self._store_unsaved(connection)
+            return False
+
+        stopping = False
+        rows = self._unsaved_rows
+        snapshots = self._unsaved_snapshots
+        while True:
+            if item is None:
+                stopping = True
             else:
-                logger.error(f"✗ Geçiş kaydı oluşturulamadı: {response.status_code} - {response.text}")
-                return False
-                
+                event, frame = item
+                if frame is not None:
+                    try:
+                        _, buffer = cv2.imencode('.jpg', frame,
+                                                 [cv2.IMWRITE_JPEG_QUALITY, self.snapshot_config['jpeg_quality']])
+                        snapshots.append((event['client_event_id'], buffer.tobytes()))
+                    except Exception as e:
+                        logger.warning(f"Snapshot encode edilemedi: {e}")
+                rows.append((event['client_event_id'], json.dumps(event)))
+
+            try:
+                item = self.events.get_nowait()
+            except queue.Empty:
+                break
+
+        self._store_unsaved(connection)
+        return stopping
+
+    def _store_unsaved(self, connection: sqlite3.Connection):
+        """Bekleyen olayları tek işlemde outbox'a yazar; yazılamazsa bir sonraki turda tekrar denenir"""
+        if not self._unsaved_rows:
+            return
+
+        try:
+            with connection:
+                connection.executemany("INSERT OR IGNORE INTO outbox (event_id, payload) VALUES (?, ?)",
+                                       self._unsaved_rows)
+                connection.executemany("INSERT OR IGNORE INTO snapshots (event_id, data) VALUES (?, ?)",
+                                       self._unsaved_snapshots)
+        except sqlite3.Error as e:
+            logger.error(f"✗ Outbox'a yazılamadı, tekrar denenecek: {e}")
+            return
+
+        self.stats['pending'] += len(self._unsaved_rows)
+        self.stats['snapshots_pending'] += len(self._unsaved_snapshots)
+        self._unsaved_rows = []
+        self._unsaved_snapshots = []
+
+    def _flush(self, connection: sqlite3.Connection):
+        """Outbox'taki en eski olayları tek istekte gönderir; ulaşılamazsa bekleme süresini artırır"""
+        rows = connection.execute(
+            "SELECT id, payload FROM outbox ORDER BY id LIMIT ?", (self.batch_size,)
+        ).fetchall()
+        if not rows:
+            return
+
+        events = [json.loads(payload) for _, payload in rows]
+        row_ids = [(row_id,) for row_id, _ in rows]
+
+        failed = False
+        try:
+            response = self.session.post(self.bulk_url, json={'events': events}, timeout=10)
         except requests.exceptions.RequestException as e:
-            logger.error(f"✗ API isteği başarısız: {e}")
-            return False
-    
+            logger.warning(f"✗ API isteği başarısız: {e}")
+            failed = True
+        else:
+            if response.status_code == 200:
+                # Her olay ya eklendi, ya daha önce eklenmişti, ya da kalıcı olarak reddedildi
+                try:
+                    result = response.json()
+                    created, duplicates, rejected = result['created'], result['duplicates'], result['rejected']
+                except (ValueError, KeyError, TypeError) as e:
+                    # Beklenmeyen yanıt (ör. araya giren bir proxy): olaylar outbox'ta kalır
+                    logger.warning(f"✗ Geçersiz toplu kayıt yanıtı: {e}")
+                    failed = True
+                else:
+                    self.stats['sent'] += len(created) + len(duplicates)
+                    self.stats['rejected'] += len(rejected)
+                    if created:
+                        logger.info(f"✓ {len(created)} geçiş kaydı oluşturuldu")
+                    for item in rejected:
+                        logger.error(f"✗ Geçiş kaydı reddedildi: {item.get('client_event_id')} - {item.get('errors')}")
+            elif 400 <= response.status_code < 500 and response.status_code not in self.RETRYABLE_STATUS:
+                # Tekrar göndermek sonucu değiştirmez
+                logger.error(f"✗ Geçiş kayıtları reddedildi: {response.status_code} - {response.text}")
+                self.stats['rejected'] += len(rows)
+            else:
+                logger.warning(f"✗ Geçiş kayıtları oluşturulamadı: {response.status_code}")
+                failed = True
+
+        with connection:
+            if failed:
+                connection.executemany("UPDATE outbox SET attempts = attempts + 1 WHERE id = ?", row_ids)
+            else:
+                connection.executemany("DELETE FROM outbox WHERE id = ?", row_ids)
+
+        if failed:
+            self._schedule_retry()
+            return
+
+        self.stats['pending'] -= len(rows)
+        self.backoff = 0.0
+        self.retry_at = 0.0
+
+    def _upload_snapshots(self, connection: sqlite3.Connection):
+        """Bekleyen snapshot'ları ham JPEG olarak olay kimliğine PUT eder"""
+        rows = connection.execute(
+            "SELECT event_id, data FROM snapshots LIMIT ?", (self.snapshot_config['uploads_per_flush'],)
+        ).fetchall()
+
+        done = []
+        failed = False
+        for event_id, data in rows:
+            try:
+                response = self.session.put(
+                    f"{self.snapshot_url}{event_id}/",
+                    data=data,
+                    headers={'Content-Type': 'image/jpeg'},
+                    timeout=10
+                )
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"✗ Snapshot yüklenemedi: {e}")
+                failed = True
+                break
+
+            if response.status_code in (200, 201, 204):
+                self.stats['snapshots_sent'] += 1
+                done.append((event_id,))
+            elif 400 <= response.status_code < 500 and response.status_code not in self.RETRYABLE_STATUS:
+                # Kayıt reddedilmiş ya da dosya kabul edilmiyor; tekrar denemek sonucu değiştirmez
+                logger.error(f"✗ Snapshot reddedildi: {event_id} - {response.status_code}")
+                self.stats['snapshots_dropped'] += 1
+                done.append((event_id,))
+            else:
+                logger.warning(f"✗ Snapshot yüklenemedi: {response.status_code}")
+                failed = True
+                break
+
+        with connection:
+            connection.executemany("DELETE FROM snapshots WHERE event_id = ?", done)
+        self.stats['snapshots_pending'] -= len(done)
+
+        if failed:
+            self._schedule_retry()
+
+    def _schedule_retry(self):
+        """Üstel bekleme; birden çok kamera kutusu aynı anda yüklenmesin diye rastgele kaydırılır"""
+        self.stats['failed_attempts'] += 1
+        self.backoff = min(self.max_backoff, max(self.flush_interval, self.backoff * 2))
+        self.retry_at = time.monotonic() + self.backoff * random.uniform(0.5, 1.0)
+        logger.warning(f"{self.stats['pending']} geçiş kaydı, {self.stats['snapshots_pending']} snapshot bekliyor, "
+                       f"{self.backoff:.1f} sn içinde tekrar denenecek")
+
+    def close(self, timeout: float = 10.0):
+        """Göndericiyi durdurur; gönderilemeyen olaylar outbox'ta kalır"""
+        if self.sender.is_alive():
+            self.events.put(None)
+            self.sender.join(timeout=timeout)
+
     def get_today_logs(self):
-        """Bugünkü kayıtları getir"""
+        """Bugünkü kayıtları getir (sayfalı yanıtın 'next' cursor'ı izlenerek tüm sayfalar)"""
+        logs = []
+        url = f"{self.api_url}today/?page_size={self.TODAY_PAGE_SIZE}"
         try:
-            response = self.session.get(f"{self.api_url}today/", timeout=5)
-            if response.status_code == 200:
-                return response.json()
-            return []
+            while url:
+                response = self.session.get(url, timeout=5)
+                if response.status_code != 200:
+                    return []
+                page = response.json()
+                logs.extend(page['results'])
+                url = page.get('next')
+            return logs
         except Exception as e:
             logger.error(f"Kayıtlar getirilemedi: {e}")
             return []
-    
+
     def get_stats(self):
         """İstatistikleri getir"""
         try:
@@ -0,0 +1,199 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# linux/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+_EVENT = struct.Struct('iIII')
+
+
+class _Inotify:
+    """libc inotify çağrılarının ctypes sarmalayıcısı (yalnızca Linux)"""
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 başarısız")
+
+        # Dosyanın kendisi değil dizin izlenir: model yerine yeni dosya taşındığında
+        # (os.replace) dosya izleyicisi eski inode'da kalırdı
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch başarısız: {directory}")
+
+    def read_names(self) -> list:
+        """Bekleyen olaylardaki dosya adlarını döndürür"""
+        names = []
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return names
+
+            offset = 0
+            while offset + _EVENT.size <= len(data):
+                _, _, _, name_length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                names.append(data[offset:offset + name_length].rstrip(b'\0').decode('utf-8', 'replace'))
+                offset += name_length
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ModelReloader:
+    """
+    Model dosyası değişince galeriyi arka planda yeniden yükleyen izleyici.
+
+    Değişiklik inotify ile anında yakalanır; inotify yoksa (Linux dışı, limit dolu) model
+    dosyasının mtime'ı belirli aralıkla yoklanır. trigger() (ör. SIGHUP ya da eğitim
+    sonrası gelen istek) beklemeden yüklemeyi başlatır. Yükleme tanıma döngüsünü bekletmez:
+    yeni galeri ayrı bir nesneye yüklenir, hazır olunca on_reload ile verilir ya da take()
+    ile alınmak üzere saklanır.
+    """
+
+    def __init__(self, model_path, loader: Callable[[], Optional[object]], on_reload: Callable = None,
+                 poll_interval: float = 30.0, settle_time: float = 0.2):
+        """
+        Args:
+            model_path: İzlenecek model dosyası
+            loader: Yeni galeriyi yükleyip döndüren fonksiyon (başarısızsa None)
+            on_reload: Yüklenen galeriyle çağrılır (None ise take() ile alınır)
+            poll_interval: inotify yoksa mtime yoklama aralığı (saniye)
+            settle_time: Olaydan sonra ardışık yazmaların bitmesi için bekleme (saniye)
+        """
+        self.model_path = Path(model_path)
+        self.loader = loader
+        self.on_reload = on_reload
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+
+        self.last_model_mtime = self._get_model_mtime()
+        self.stats = {'reloads': 0, 'failed': 0, 'mode': None}
+
+        self._pending = None
+        self._lock = threading.Lock()
+        self._trigger = threading.Event()
+        self._stopping = False
+        self._wake_read, self._wake_write = os.pipe()
+        self._inotify = None
+        self._thread = None
+
+    def _get_model_mtime(self) -> float:
+        """Model dosyasının son değişiklik zamanını döndür"""
+        try:
+            if self.model_path.exists():
+                return os.path.getmtime(self.model_path)
+        except Exception:
+            pass
+        return 0
+
+    def start(self):
+        try:
+            self._inotify = _Inotify(self.model_path.resolve().parent)
+            self.stats['mode'] = 'inotify'
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify kullanılamıyor ({e}), model dosyası {self.poll_interval} sn'de bir yoklanacak")
+            self.stats['mode'] = 'poll'
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def trigger(self):
+        """Değişiklik beklemeden yeniden yüklemeyi başlatır (sinyal işleyiciden çağrılabilir)"""
+        self._trigger.set()
+        os.write(self._wake_write, b'\0')
+
+    def take(self):
+        """Hazır bekleyen yeni galeriyi bir kez döndürür (yoksa None)"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        return pending
+
+    def _wait_for_change(self) -> bool:
+        """
+        Model değişikliği ya da tetikleme gelene kadar bekler
+
+        Returns:
+            Yeniden yükleme gerekiyorsa True
+        """
+        timeout = None if self._inotify is not None else self.poll_interval
+        watched = [self._wake_read] + ([self._inotify.fd] if self._inotify is not None else [])
+        ready, _, _ = select.select(watched, [], [], timeout)
+
+        if self._wake_read in ready:
+            os.read(self._wake_read, 64)
+
+        if self._inotify is not None and self._inotify.fd in ready:
+            if self.model_path.name in self._inotify.read_names():
+                return True
+
+        if self._trigger.is_set():
+            return True
+
+        # Yoklama modu: mtime değiştiyse yükle
+        return self._inotify is None and self._get_model_mtime() > self.last_model_mtime
+
+    def _run(self):
+        while not self._stopping:
+            if not self._wait_for_change() or self._stopping:
+                continue
+
+            # Kısa aralıklı ardışık kayıtlar tek yüklemede birleştirilir
+            self._trigger.wait(self.settle_time)
+            self._trigger.clear()
+            if self._inotify is not None:
+                self._inotify.read_names()
+
+            self._reload()
+
+    def _reload(self):
+        current_mtime = self._get_model_mtime()
+        logger.info("Model dosyası değişti, arka planda yeniden yükleniyor...")
+
+        gallery = self.loader()
+        if gallery is None:
+            self.stats['failed'] += 1
+            logger.error("Model yeniden yüklenemedi, eski galeri kullanılmaya devam ediyor")
+            return
+
+        self.last_model_mtime = current_mtime
+        self.stats['reloads'] += 1
+
+        if self.on_reload is not None:
+            self.on_reload(gallery)
+        else:
+            with self._lock:
+                self._pending = gallery
+
+    def stop(self):
+        self._stopping = True
+        os.write(self._wake_write, b'\0')
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        os.close(self._wake_read)
+        os.close(self._wake_write)
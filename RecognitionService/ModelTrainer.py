@@ -2,9 +2,15 @@ import face_recognition
 import numpy as np
 import pickle
 import logging
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, Tuple, Optional
 from pathlib import Path
+from datetime import datetime
 from ClientService import RecognizerClient
+from FaceMatcher import FaceMatcher, AggregatedFaceMatcher
+from GalleryIndex import build_index, save_index, load_index, gallery_fingerprint
+from GalleryStore import write_gallery, read_gallery, read_header, is_gallery_file
+from EncodingCache import EncodingCache
+from EncodingPool import ParallelEncoder, detect_and_encode
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -14,139 +20,565 @@ logging.basicConfig(
 )
 
 
+def parse_timestamp(value) -> float:
+    """API'dan gelen ISO 8601 zamanını epoch saniyesine çevirir"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
 class FaceRecognitionTrainer:
     """RecognizerClient kullanarak yüz tanıma modeli eğiten sınıf"""
     
-    def __init__(self, client: RecognizerClient = None, model_save_path: str = "face_recognition_model.pkl"):
+    def __init__(self, client: RecognizerClient = None, model_save_path: str = "face_recognition_model.gallery",
+                 gallery_mode: str = "full", index_config: dict = None, cache_path: str = None,
+                 cache_max_entries: int = 50000, use_cache: bool = True, workers: int = 1, chunk_size: int = 8):
         """
         Args:
             client: RecognizerClient instance (None ise yeni oluşturulur)
             model_save_path: Eğitilen modelin kaydedileceği dosya yolu
+            gallery_mode: 'full' (her encoding ayrı satır) veya 'aggregated' (kişi başı merkez + temsilciler)
+            index_config: Galeri indeksi ayarları (type, n_lists, n_probe, ...)
+            cache_path: Encoding önbelleği dosyası (None ise model dosyasının yanında)
+            cache_max_entries: Önbellekte tutulacak en fazla görüntü
+            use_cache: False ise her görüntü yeniden encode edilir
+            workers: Encoding için süreç sayısı (1 = sıralı)
+            chunk_size: Bir worker görevine gönderilecek görüntü sayısı
         """
+        if gallery_mode not in ("full", "aggregated"):
+            raise ValueError(f"Geçersiz galeri modu: {gallery_mode}")
+
         self.client = client if client else RecognizerClient()
         self.model_save_path = Path(model_save_path)
+        self.gallery_mode = gallery_mode
+
+        # Galeri indeksi ayarları
+        self.index_config = {
+            'type': 'auto',  # 'brute', 'ivf' veya 'auto'
+            'min_ivf_size': 2000,  # 'auto' modunda IVF'e geçilecek galeri boyutu
+            'n_lists': None,  # IVF küme sayısı (None = ~sqrt(N))
+            'n_probe': None  # Sorgu başına taranacak küme (None = indeksle kaydedilen değer)
+        }
+        if index_config:
+            self.index_config.update(index_config)
+        self.index = None
         self.known_face_encodings = []
         self.known_face_names = []
         self.known_face_ids = []
+        # Artımlı eğitim için satır meta verileri (FaceData id, uploaded_at)
+        self.known_face_data_ids = []
+        self.known_face_uploaded_at = []
+        # Yüz bulunamayan görüntüler {FaceData id: uploaded_at}
+        self.rejected_faces = {}
+        self.last_training_changes = {}
+        # Galerinin eşitlendiği yüz manifest'inin ETag'i (değişmediyse sunucu 304 döner)
+        self.manifest_etag = None
+
+        # Encoding'i etkileyen ayarlar (önbellek anahtarının parçası)
+        self.encoding_settings = {
+            'detector': 'hog',
+            'number_of_times_to_upsample': 1,
+            'num_jitters': 1,
+            'landmark_model': 'small'
+        }
+        # Önbellek ilk encoding'de açılır: yalnızca tanıma yapan trainer'lar SQLite dosyası açmaz
+        self.cache = None
+        self.use_cache = use_cache
+        self.cache_path = Path(cache_path) if cache_path else self.model_save_path.with_name('encoding_cache.sqlite3')
+        self.cache_max_entries = cache_max_entries
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self._encoder = None
+        self.model_version = 0
+        self._sq_norms = None
+        self.matcher = FaceMatcher.empty()
+
+    def _rebuild_matcher(self):
+        """Bilinen encoding'lerden eşleştirici galerisini yeniden oluşturur"""
+        matcher_cls = AggregatedFaceMatcher if self.gallery_mode == "aggregated" else FaceMatcher
+        self.matcher = matcher_cls(self.known_face_encodings, self.known_face_names, self.known_face_ids,
+                                   index=self.index, sq_norms=self._sq_norms)
+
+    @property
+    def index_path(self) -> Path:
+        """Önceden oluşturulmuş indeksin model dosyasının yanındaki yolu"""
+        return self.model_save_path.with_suffix('.index.npz')
+
+    def build_index(self):
+        """Mevcut encoding'ler için galeri indeksini oluşturur"""
+        params = {'n_lists': self.index_config['n_lists']}
+        if self.index_config['n_probe'] is not None:
+            params['n_probe'] = self.index_config['n_probe']
+
+        self.index = build_index(
+            np.asarray(self.known_face_encodings, dtype=np.float32).reshape(-1, 128),
+            index_type=self.index_config['type'],
+            min_ivf_size=self.index_config['min_ivf_size'],
+            **params
+        )
         
     def extract_face_encoding(self, image: np.ndarray) -> Optional[np.ndarray]:
         """Görüntüden yüz encoding'i çıkarır"""
         try:
-            # Görüntüdeki yüzlerin konumlarını bul
-            face_locations = face_recognition.face_locations(image, model='hog')
-            
-            if not face_locations:
-                logger.warning("Görüntüde yüz bulunamadı")
-                return None
-            
-            # İlk yüzün encoding'ini al
-            face_encodings = face_recognition.face_encodings(image, face_locations)
-            
-            if face_encodings:
-                return face_encodings[0]
-            return None
+            return detect_and_encode(image, self.encoding_settings)
         except Exception as e:
             logger.warning(f"Face encoding çıkarılamadı: {e}")
             return None
+
+    def _open_cache(self):
+        """Encoding önbelleğini gerektiğinde açar"""
+        if self.cache is None and self.use_cache:
+            self.cache = EncodingCache(self.cache_path, self.encoding_settings, max_entries=self.cache_max_entries)
+
+    def encode_face_images(self, images: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        """
+        Görüntüleri encode eder; önbellekte olanlar atlanır, kalanlar
+        workers > 1 ise süreç havuzunda paralel işlenir.
+        "Yüz yok" kararları da önbelleğe alınır, geçici hatalar alınmaz.
+
+        Returns:
+            Girdi sırasıyla encoding listesi (yüz yoksa None)
+        """
+        self._open_cache()
+        encodings = [None] * len(images)
+        keys = [None] * len(images)
+        missing = []
+
+        for i, image in enumerate(images):
+            if self.cache is not None:
+                keys[i] = self.cache.key_for(image)
+                found, encodings[i] = self.cache.get(keys[i])
+                if found:
+                    continue
+            missing.append(i)
+
+        if not missing:
+            return encodings
+
+        if self.workers > 1 and len(missing) > 1:
+            if self._encoder is None:
+                self._encoder = ParallelEncoder(self.encoding_settings, self.workers, self.chunk_size)
+            results = self._encoder.encode([images[i] for i in missing])
+        else:
+            results = []
+            for i in missing:
+                try:
+                    results.append((True, detect_and_encode(images[i], self.encoding_settings)))
+                except Exception as e:
+                    logger.warning(f"Face encoding çıkarılamadı: {e}")
+                    results.append((False, None))
+
+        for i, (ok, encoding) in zip(missing, results):
+            encodings[i] = encoding
+            if ok and self.cache is not None:
+                self.cache.put(keys[i], encoding)
+
+        return encodings
+
+    def encode_face_image(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """Tek görüntü için önbellekli encoding"""
+        return self.encode_face_images([image])[0]
+
+    def _encode_records(self, records: Iterable[Tuple[np.ndarray, tuple]]) -> Iterator[Tuple[tuple, Optional[np.ndarray]]]:
+        """
+        (görüntü, meta) kayıtlarını partiler halinde encode eder ve sırayla döndürür.
+        Parti boyutu tüm worker'ları dolduracak kadar, bellekte tutulacak kadar küçüktür.
+        """
+        batch_size = self.workers * self.chunk_size * 2
+        batch = []
+
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield from zip((meta for _, meta in batch), self.encode_face_images([image for image, _ in batch]))
+                batch = []
+
+        if batch:
+            yield from zip((meta for _, meta in batch), self.encode_face_images([image for image, _ in batch]))
+
+    def _close_encoder(self):
+        """Süreç havuzunu kapatır"""
+        if self._encoder is not None:
+            self._encoder.close()
+            self._encoder = None
     
-    def train_model(self) -> Tuple[int, int]:
-        """Modeli eğitir ve başarı oranını döndürür"""
+    def train_model(self, incremental: bool = False) -> Tuple[int, int]:
+        """
+        Modeli eğitir ve başarı oranını döndürür
+
+        Args:
+            incremental: True ise yalnızca yeni/değişen yüz kayıtları encode edilir,
+                silinen kayıtlar galeriden çıkarılır
+        """
+        if incremental:
+            return self._train_incremental()
+
         logger.info("API'dan yüz verileri çekiliyor...")
         
-        # RecognizerClient kullanarak verileri çek
-        customers_data = self.client.customer_faces
+        # RecognizerClient kullanarak yüz manifest'ini çek (görüntüler akış halinde gelir)
+        manifest, _ = self.client.fetch_manifest()
         
-        if not customers_data:
+        if not manifest or not manifest['customers']:
             logger.error("API'dan veri çekilemedi")
             return 0, 0
+
+        customers_data = self.client.customers_from_manifest(manifest)
+        self.manifest_etag = manifest['etag']
         
         total_images = 0
         successful_encodings = 0
+
+        # Galeri sıfırdan oluşturulur
+        self._reset_gallery()
         
-        # Her müşteri için
-        for customer in customers_data:
-            username = customer['username']
-            user_id = customer['userid']
-            faces = customer['faces']
-            
-            logger.info(f"İşleniyor: {username} (ID: {user_id}) - {len(faces)} görüntü")
-            
-            # Her yüz görüntüsü için
-            for face_image in faces:
+        def records():
+            # Her müşteri için (bellekte yalnızca işlenen müşterinin görüntüleri tutulur)
+            for customer in self.client.iter_customer_faces(customers_data):
+                username = customer['username']
+                user_id = customer['userid']
+                faces = customer['faces']
+
+                logger.info(f"İşleniyor: {username} (ID: {user_id}) - {len(faces)} görüntü")
+
+                # Her yüz görüntüsü için (image zaten numpy array olarak geliyor)
+                for face_image, face_data_id, uploaded_at in zip(faces, customer['face_ids'], customer['uploaded_at']):
+                    yield face_image, (username, user_id, face_data_id, parse_timestamp(uploaded_at))
+
+        try:
+            for (username, user_id, face_data_id, uploaded_at), encoding in self._encode_records(records()):
                 total_images += 1
-                
-                # Face encoding çıkar (image zaten numpy array olarak geliyor)
-                encoding = self.extract_face_encoding(face_image)
-                
+
                 if encoding is not None:
-                    self.known_face_encodings.append(encoding)
-                    self.known_face_names.append(username)
-                    self.known_face_ids.append(user_id)
+                    self._append_row(encoding, username, user_id, face_data_id, uploaded_at)
                     successful_encodings += 1
                     logger.info(f"✓ Encoding eklendi: {username} (ID: {user_id})")
+                else:
+                    self.rejected_faces[face_data_id] = uploaded_at
+        finally:
+            self._close_encoder()
         
+        self.build_index()
+        self._rebuild_matcher()
+
+        self.last_training_changes = {
+            'added': successful_encodings,
+            'removed': 0,
+            'kept': 0,
+            'rejected': len(self.rejected_faces),
+            'manifest_updated': True
+        }
+        self._flush_cache()
+
         logger.info(f"\n{'='*50}")
         logger.info(f"Eğitim tamamlandı: {successful_encodings}/{total_images} görüntü başarılı")
         logger.info(f"{'='*50}\n")
         
         return successful_encodings, total_images
+
+    def _flush_cache(self):
+        """Önbelleği diske yazar ve isabet oranını raporlar"""
+        if self.cache is None:
+            return
+
+        self.cache.flush()
+        lookups = self.cache.hits + self.cache.misses
+        if lookups:
+            logger.info(f"Encoding önbelleği: {self.cache.hits}/{lookups} isabet")
+
+    def _reset_gallery(self):
+        """Galeriyi ve satır meta verilerini boşaltır"""
+        self.known_face_encodings = []
+        self.known_face_names = []
+        self.known_face_ids = []
+        self.known_face_data_ids = []
+        self.known_face_uploaded_at = []
+        self.rejected_faces = {}
+        self._sq_norms = None
+
+    def _append_row(self, encoding: np.ndarray, name: str, user_id: int, face_data_id: int, uploaded_at: float):
+        """Galeriye tek bir encoding satırı ekler"""
+        self.known_face_encodings.append(encoding)
+        self.known_face_names.append(name)
+        self.known_face_ids.append(user_id)
+        self.known_face_data_ids.append(face_data_id)
+        self.known_face_uploaded_at.append(uploaded_at)
+
+    def _train_incremental(self) -> Tuple[int, int]:
+        """
+        Mevcut galeriyi API'daki FaceData kayıtlarıyla eşitler.
+
+        Kayıtlar FaceData id ve uploaded_at ile izlenir: değişmeyen satırlar korunur,
+        yeni ya da yeniden yüklenen görüntüler encode edilir, artık var olmayan
+        kayıtların (silinen müşteriler dahil) satırları çıkarılır.
+        """
+        if len(self.known_face_encodings) == 0 and self.model_save_path.exists():
+            self.load_model()
+
+        if len(self.known_face_data_ids) != len(self.known_face_encodings) or len(self.known_face_encodings) == 0:
+            logger.info("Artımlı eğitim için galeri meta verisi yok, tam eğitim yapılıyor")
+            return self.train_model(incremental=False)
+
+        logger.info("API'dan yüz kayıtları çekiliyor (artımlı)...")
+        manifest, not_modified = self.client.fetch_manifest(etag=self.manifest_etag)
+
+        if not_modified:
+            logger.info("Yüz manifest'i değişmedi (304), galeri güncel")
+            self.last_training_changes = {
+                'added': 0,
+                'removed': 0,
+                'kept': len(self.known_face_encodings),
+                'rejected': len(self.rejected_faces),
+                'manifest_updated': False
+            }
+            return 0, 0
+
+        if manifest is None:
+            logger.error("API'dan veri çekilemedi")
+            return 0, 0
+
+        customers = self.client.customers_from_manifest(manifest)
+        manifest_updated = manifest['etag'] != self.manifest_etag
+
+        existing_rows = {int(face_data_id): row for row, face_data_id in enumerate(self.known_face_data_ids)}
+        kept = []
+        pending = []
+        seen_face_ids = set()
+
+        for person in customers:
+            username = self.client.display_name(person['full_name'])
+            user_id = person['id']
+
+            for raw_face in person['face_data']:
+                face_data_id = raw_face['id']
+                uploaded_at = parse_timestamp(raw_face['uploaded_at'])
+                seen_face_ids.add(face_data_id)
+
+                row = existing_rows.get(face_data_id)
+                if row is not None and self.known_face_uploaded_at[row] == uploaded_at:
+                    kept.append((row, username, user_id))
+                elif self.rejected_faces.get(face_data_id) == uploaded_at:
+                    # Daha önce yüz bulunamayan, değişmemiş görüntü
+                    continue
+                else:
+                    pending.append((raw_face, username, user_id, uploaded_at))
+
+        removed = len(existing_rows) - len(kept)
+
+        # Korunan satırlar (isim güncellemeleri manifest'ten alınır)
+        kept_rows = np.asarray([row for row, _, _ in kept], dtype=np.intp)
+        encodings = np.asarray(self.known_face_encodings, dtype=np.float32).reshape(-1, 128)[kept_rows]
+        uploaded = np.asarray(self.known_face_uploaded_at, dtype=np.float64)[kept_rows]
+        data_ids = np.asarray(self.known_face_data_ids, dtype=np.int64)[kept_rows]
+        rejected_faces = {face_id: ts for face_id, ts in self.rejected_faces.items() if face_id in seen_face_ids}
+
+        self._reset_gallery()
+        self.known_face_encodings = list(encodings)
+        self.known_face_names = [username for _, username, _ in kept]
+        self.known_face_ids = [user_id for _, _, user_id in kept]
+        self.known_face_data_ids = [int(face_id) for face_id in data_ids]
+        self.known_face_uploaded_at = [float(ts) for ts in uploaded]
+        self.rejected_faces = rejected_faces
+        self.manifest_etag = manifest['etag']
+
+        def records():
+            # Yalnızca yeni / değişen görüntüler eşzamanlı indirilir, geldikçe encode edilir
+            faces = ({**raw_face, 'meta': (raw_face['id'], username, user_id, uploaded_at)}
+                     for raw_face, username, user_id, uploaded_at in pending)
+            for face, face_image in self.client.iter_face_images(faces):
+                if face_image is not None:
+                    yield face_image, face['meta']
+
+        added = 0
+        try:
+            for (face_data_id, username, user_id, uploaded_at), encoding in self._encode_records(records()):
+                if encoding is not None:
+                    self._append_row(encoding, username, user_id, face_data_id, uploaded_at)
+                    added += 1
+                    logger.info(f"✓ Encoding eklendi: {username} (ID: {user_id})")
+                else:
+                    self.rejected_faces[face_data_id] = uploaded_at
+        finally:
+            self._close_encoder()
+
+        self.build_index()
+        self._rebuild_matcher()
+
+        self.last_training_changes = {
+            'added': added,
+            'removed': removed,
+            'kept': len(kept),
+            'rejected': len(self.rejected_faces),
+            # İsim değişikliği ya da yeni ETag: satır değişmese de galeri kaydedilmeli
+            'manifest_updated': manifest_updated
+        }
+        self._flush_cache()
+
+        logger.info(f"\n{'='*50}")
+        logger.info(f"Artımlı eğitim tamamlandı: +{added} / -{removed} satır, {len(kept)} satır korundu")
+        logger.info(f"{'='*50}\n")
+
+        return added, len(pending)
     
-    def save_model(self) -> bool:
-        """Eğitilen modeli dosyaya kaydeder"""
-        if not self.known_face_encodings:
+    def save_model(self, allow_empty: bool = False) -> bool:
+        """
+        Eğitilen modeli bellek eşlemeli galeri formatında kaydeder
+
+        Args:
+            allow_empty: Boş galeriyi de kaydet (ör. son müşteri silindiğinde)
+        """
+        if len(self.known_face_encodings) == 0 and not allow_empty:
             logger.warning("Kaydedilecek encoding bulunamadı")
             return False
-        
-        model_data = {
-            'encodings': self.known_face_encodings,
-            'names': self.known_face_names,
-            'ids': self.known_face_ids,
-            'total_faces': len(self.known_face_encodings)
-        }
+
+        encodings = np.asarray(self.known_face_encodings, dtype=np.float32).reshape(-1, 128)
+
+        # Model sürümü her kayıtta bir artar
+        model_version = 1
+        if is_gallery_file(self.model_save_path):
+            try:
+                model_version = read_header(self.model_save_path)['model_version'] + 1
+            except Exception:
+                pass
         
         try:
-            with open(self.model_save_path, 'wb') as f:
-                pickle.dump(model_data, f)
-            
-            logger.info(f"Model kaydedildi: {self.model_save_path}")
+            # Önce indeks yazılır: galeri değişikliğini gören okuyucu yeni indeksi bulur
+            if self.index is not None:
+                save_index(self.index, self.index_path)
+
+            header = write_gallery(
+                self.model_save_path,
+                encodings,
+                self.known_face_names,
+                self.known_face_ids,
+                model_version=model_version,
+                fingerprint=gallery_fingerprint(encodings),
+                extra_blocks=self._metadata_blocks()
+            )
+            self.model_version = header['model_version']
+
+            logger.info(f"Model kaydedildi: {self.model_save_path} (v{self.model_version})")
             logger.info(f"Toplam encoding sayısı: {len(self.known_face_encodings)}")
             return True
         except Exception as e:
             logger.error(f"Model kaydedilemedi: {e}")
             return False
+
+    def _metadata_blocks(self) -> dict:
+        """Artımlı eğitim meta verilerini galeri blokları olarak döndürür"""
+        if len(self.known_face_data_ids) != len(self.known_face_encodings):
+            return {}
+
+        return {
+            'face_data_ids': np.asarray(self.known_face_data_ids, dtype='<i8'),
+            'uploaded_at': np.asarray(self.known_face_uploaded_at, dtype='<f8'),
+            'rejected_face_data_ids': np.asarray(list(self.rejected_faces.keys()), dtype='<i8'),
+            'rejected_uploaded_at': np.asarray(list(self.rejected_faces.values()), dtype='<f8'),
+            'manifest_etag': np.frombuffer((self.manifest_etag or '').encode('utf-8'), dtype=np.uint8)
+        }
+
+    def _load_legacy_pickle(self, path: Path):
+        """Eski pickle formatındaki modeli yükler"""
+        logger.warning(f"Eski pickle model formatı yükleniyor: {path} (yeniden eğitimde galeri formatına geçilir)")
+
+        with open(path, 'rb') as f:
+            model_data = pickle.load(f)
+
+        encodings = np.asarray(model_data['encodings'], dtype=np.float32).reshape(-1, 128)
+        self.known_face_encodings = encodings
+        self.known_face_names = model_data['names']
+        self.known_face_ids = model_data.get('ids', [])
+        self.known_face_data_ids = []
+        self.known_face_uploaded_at = []
+        self.rejected_faces = {}
+        self.manifest_etag = None
+        self.model_version = 0
+        self._sq_norms = None
+        return gallery_fingerprint(encodings)
     
-    def load_model(self) -> bool:
-        """Kaydedilmiş modeli yükler"""
-        if not self.model_save_path.exists():
+    def load_model(self, verify: bool = False) -> bool:
+        """
+        Kaydedilmiş modeli yükler
+
+        Args:
+            verify: Galeri bloklarının checksum'ını da doğrula (varsayılan: yalnızca header ve
+                blok yerleşimi; checksum yazımda doğrulanır)
+        """
+        model_path = self.model_save_path
+
+        # Eski kurulumlar: yalnızca .pkl dosyası varsa onu kullan
+        if not model_path.exists() and model_path.with_suffix('.pkl').exists():
+            model_path = model_path.with_suffix('.pkl')
+
+        if not model_path.exists():
             logger.error(f"Model dosyası bulunamadı: {self.model_save_path}")
             return False
         
         try:
-            with open(self.model_save_path, 'rb') as f:
-                model_data = pickle.load(f)
-            
-            self.known_face_encodings = model_data['encodings']
-            self.known_face_names = model_data['names']
-            self.known_face_ids = model_data.get('ids', [])
+            if is_gallery_file(model_path):
+                # Encoding'ler kopyalanmadan dosyadan eşlenir
+                gallery = read_gallery(model_path, verify=verify)
+                self.known_face_encodings = gallery['encodings']
+                self.known_face_names = gallery['names']
+                self.known_face_ids = gallery['ids']
+                self.model_version = gallery['header']['model_version']
+                self._sq_norms = gallery['sq_norms']
+                self.known_face_data_ids = gallery.get('face_data_ids', [])
+                self.known_face_uploaded_at = gallery.get('uploaded_at', [])
+                self.rejected_faces = dict(zip(
+                    (int(face_id) for face_id in gallery.get('rejected_face_data_ids', [])),
+                    (float(ts) for ts in gallery.get('rejected_uploaded_at', []))
+                ))
+                self.manifest_etag = bytes(gallery.get('manifest_etag', b'')).decode('utf-8') or None
+                fingerprint = gallery['header']['fingerprint']
+            else:
+                fingerprint = self._load_legacy_pickle(model_path)
+
+            # Eğitimde oluşturulan indeksi yükle (yeniden oluşturma yok)
+            self.index = load_index(self.index_path, expected_fingerprint=fingerprint)
+            if self.index is None:
+                logger.warning("Geçerli indeks bulunamadı, tüm galeri taranacak")
+            elif self.index_config['n_probe'] is not None and hasattr(self.index, 'n_probe'):
+                self.index.n_probe = self.index_config['n_probe']
+
+            self._rebuild_matcher()
             
-            logger.info(f"Model yüklendi: {len(self.known_face_encodings)} encoding")
+            logger.info(f"Model yüklendi: {len(self.known_face_encodings)} encoding (v{self.model_version})")
             return True
         except Exception as e:
             logger.error(f"Model yüklenemedi: {e}")
             return False
+
+    def load_snapshot(self) -> Optional['FaceRecognitionTrainer']:
+        """
+        Modeli aynı ayarlarla yeni bir trainer'a yükler, bu nesneye dokunmaz
+
+        load_model alanları tek tek atar; tanıma sürerken yeniden yüklemede galeri yarım
+        görünmesin diye yeni galeri ayrı bir nesnede hazırlanır ve çağıran taraf referansı
+        tek atamayla değiştirir.
+
+        Returns:
+            Yüklenmiş yeni trainer ya da yükleme başarısızsa None
+        """
+        trainer = FaceRecognitionTrainer(client=self.client, model_save_path=str(self.model_save_path),
+                                         gallery_mode=self.gallery_mode, index_config=self.index_config,
+                                         use_cache=False)
+        if not trainer.load_model():
+            return None
+        return trainer
     
-    def recognize_face(self, image_path: str, tolerance: float = 0.6) -> List[dict]:
+    def recognize_face(self, image_path: str, tolerance: float = 0.6, gallery_client=None) -> List[dict]:
         """
         Verilen görüntüdeki yüzleri tanır
         
         Args:
             image_path: Tanınacak görüntünün yolu
             tolerance: Eşleştirme toleransı (düşük = daha katı)
+            gallery_client: GalleryClient (verilirse model yüklenmeden galeri servisine sorulur)
             
         Returns:
             Tanınan yüzlerin listesi [{'name': str, 'user_id': int, 'confidence': float}]
         """
-        if not self.known_face_encodings:
+        if gallery_client is None and len(self.known_face_encodings) == 0:
             logger.error("Model yüklenmemiş veya eğitilmemiş")
             return []
         
@@ -161,31 +593,23 @@ class FaceRecognitionTrainer:
         
         recognized_faces = []
         
-        for face_encoding in face_encodings:
-            # Bilinen yüzlerle karşılaştır
-            matches = face_recognition.compare_faces(
-                self.known_face_encodings, 
-                face_encoding, 
-                tolerance=tolerance
-            )
-            
+        # Tüm yüzleri galeriyle tek seferde eşleştir
+        if gallery_client is not None:
+            match_result = gallery_client.match(face_encodings, tolerance=tolerance)
+        else:
+            match_result = self.matcher.match_with_labels(face_encodings, tolerance=tolerance)
+
+        for i in range(len(face_encodings)):
             name = "Bilinmeyen"
             user_id = None
             confidence = 0.0
-            
-            # Eşleşme varsa en yakın olanı bul
-            if True in matches:
-                face_distances = face_recognition.face_distance(
-                    self.known_face_encodings, 
-                    face_encoding
-                )
-                best_match_index = np.argmin(face_distances)
-                
-                if matches[best_match_index]:
-                    name = self.known_face_names[best_match_index]
-                    user_id = self.known_face_ids[best_match_index]
-                    # Güven skoru (0-1 arası, 1 = en yüksek güven)
-                    confidence = 1 - face_distances[best_match_index]
+
+            # Eşleşme varsa en yakın olanı kullan
+            if match_result['matches'][i]:
+                name = match_result['names'][i]
+                user_id = match_result['ids'][i]
+                # Güven skoru (0-1 arası, 1 = en yüksek güven)
+                confidence = 1 - float(match_result['distances'][i])
             
             recognized_faces.append({
                 'name': name,
@@ -197,7 +621,7 @@ class FaceRecognitionTrainer:
     
     def get_model_stats(self) -> dict:
         """Model istatistiklerini döndürür"""
-        if not self.known_face_encodings:
+        if len(self.known_face_encodings) == 0:
             return {'status': 'Model yüklenmemiş'}
         
         unique_names = set(self.known_face_names)
@@ -205,6 +629,9 @@ class FaceRecognitionTrainer:
         return {
             'total_encodings': len(self.known_face_encodings),
             'unique_persons': len(unique_names),
+            'model_version': self.model_version,
+            'gallery_mode': self.gallery_mode,
+            'index': self.index.kind if self.index is not None else None,
             'persons': list(unique_names),
             'model_path': str(self.model_save_path)
         }
\ No newline at end of file
@@ -0,0 +1,137 @@
+import cv2
+import numpy as np
+import logging
+import time
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class MotionGate:
+    """
+    Yüz tespitinin önündeki ucuz hareket kapısı.
+
+    Frame küçültülmüş gri tonlu bir kopyaya indirgenir ve bir önceki kopyayla
+    farkı alınır. Değişen piksel oranı eşiği aşarsa "aktif" moda geçilir ve
+    tespit hemen, ardından her active_stride frame'de bir çalıştırılır. Son
+    hareketten hold_seconds sonra "boşta" moduna dönülür; boştayken tespit yalnızca
+    idle_interval saniyede bir (hareketsiz duran biri için) çalıştırılır.
+    """
+
+    def __init__(self, width: int = 96, pixel_threshold: int = 25, min_changed_fraction: float = 0.01,
+                 roi: Optional[Tuple[float, float, float, float]] = None, active_stride: int = 2,
+                 hold_seconds: float = 3.0, idle_interval: float = 10.0):
+        """
+        Args:
+            width: Fark alınacak kopyanın genişliği (piksel, en-boy oranı korunur)
+            pixel_threshold: Bir pikselin değişmiş sayılacağı gri seviye farkı
+            min_changed_fraction: Hareket sayılması için değişmesi gereken piksel oranı
+            roi: İlgi bölgesi (x0, y0, x1, y1) frame'e oranla 0-1 arası; None ise tüm frame
+            active_stride: Aktif modda kaç frame'de bir tespit yapılacağı
+            hold_seconds: Son hareketten sonra aktif modda kalma süresi
+            idle_interval: Boştayken periyodik tespit aralığı (saniye, 0 = hiç)
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.roi = roi
+        self.active_stride = max(1, active_stride)
+        self.hold_seconds = hold_seconds
+        self.idle_interval = idle_interval
+
+        # Küçük gri kopyalar ve fark tamponu frame boyutu bilinince bir kez ayrılır
+        self._size = None
+        self._small = None
+        self._gray = None
+        self._previous = None
+        self._diff = None
+
+        self.last_motion_time = 0.0
+        self.last_detection_time = 0.0
+        self.frames_since_detection = 0
+        self.changed_fraction = 0.0
+
+        self.stats = {
+            'frames': 0,
+            'motion_frames': 0,
+            'skipped': 0
+        }
+
+    @property
+    def active(self) -> bool:
+        return time.monotonic() - self.last_motion_time < self.hold_seconds
+
+    def _crop(self, frame: np.ndarray) -> np.ndarray:
+        if self.roi is None:
+            return frame
+
+        height, width = frame.shape[:2]
+        x0, y0, x1, y1 = self.roi
+        return frame[int(y0 * height):int(y1 * height), int(x0 * width):int(x1 * width)]
+
+    def detect_motion(self, frame: np.ndarray) -> bool:
+        """Frame'de önceki frame'e göre hareket olup olmadığını döndürür"""
+        region = self._crop(frame)
+
+        if self._size is None:
+            height, width = region.shape[:2]
+            small_height = max(1, int(height * self.width / max(1, width)))
+            self._size = (self.width, small_height)
+            self._small = np.empty((small_height, self.width) + region.shape[2:], dtype=region.dtype)
+            self._gray = np.empty((small_height, self.width), dtype=np.uint8)
+            self._previous = np.empty_like(self._gray)
+            self._diff = np.empty_like(self._gray)
+
+            cv2.resize(region, self._size, dst=self._small, interpolation=cv2.INTER_AREA)
+            self._to_gray(self._small, self._previous)
+            return True
+
+        cv2.resize(region, self._size, dst=self._small, interpolation=cv2.INTER_AREA)
+        self._to_gray(self._small, self._gray)
+
+        cv2.absdiff(self._gray, self._previous, dst=self._diff)
+        changed = cv2.countNonZero(cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY,
+                                                 dst=self._diff)[1])
+        self.changed_fraction = changed / self._diff.size
+
+        # Tamponlar yer değiştirir, kopya yapılmaz
+        self._previous, self._gray = self._gray, self._previous
+
+        return self.changed_fraction >= self.min_changed_fraction
+
+    @staticmethod
+    def _to_gray(image: np.ndarray, dst: np.ndarray):
+        if image.ndim == 2:
+            dst[...] = image
+        else:
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=dst)
+
+    def should_process(self, frame: np.ndarray) -> bool:
+        """Bu frame'de yüz tespiti çalıştırılmalı mı"""
+        now = time.monotonic()
+        self.stats['frames'] += 1
+        was_active = self.active
+
+        if self.detect_motion(frame):
+            self.stats['motion_frames'] += 1
+            self.last_motion_time = now
+
+        if self.active:
+            # Hareket başlar başlamaz tespit yap, sonra active_stride aralığıyla devam et
+            due = not was_active or self.frames_since_detection + 1 >= self.active_stride
+        else:
+            due = self.idle_interval > 0 and now - self.last_detection_time >= self.idle_interval
+
+        if not due:
+            self.frames_since_detection += 1
+            self.stats['skipped'] += 1
+            return False
+
+        self.frames_since_detection = 0
+        self.last_detection_time = now
+        return True
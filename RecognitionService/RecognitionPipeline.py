@@ -0,0 +1,326 @@
+"""
+Çok aşamalı gerçek zamanlı tanıma hattı
+
+    ana süreç --(frame)--> tespit worker'ları --(konumlar + yüz kırpıntıları)--> ana süreç (izleme)
+    ana süreç --(yalnızca encode edilmesi gereken kırpıntılar)--> encoding worker'ları --> ana süreç (eşleştirme)
+
+Tespit (HOG) ve encoding ayrı süreç havuzlarında çalışır; izleme, eşleştirme, selamlama
+ve çizim ana süreçte kalır. Tespit aşaması tüm frame yerine yalnızca yüz çevresindeki
+küçük kırpıntıları geri gönderir, böylece ana süreç hangi yüzlerin encode edileceğine
+(yeni / düşük güvenli / doğrulama zamanı gelmiş izler) karar verebilir.
+
+Aşamalar arası kuyruklar sınırlıdır: kuyruk doluysa iş beklemeden atlanır, böylece yavaş
+bir encoding çağrısı ekranı ve kamera kuyruğunu durdurmaz. Her frame bir sıra numarası
+taşır; worker'lar paralel çalıştığı için sonuçlar sırasız gelebilir, daha yeni bir
+frame'in tespitinden sonra gelen ya da fazla gecikmiş tespit sonuçları atılır.
+"""
+import cv2
+import face_recognition
+import numpy as np
+import logging
+import multiprocessing
+import queue
+import signal
+import time
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+def crop_face(image: np.ndarray, location: tuple, margin: float = 0.25):
+    """
+    Yüzü kenar payıyla kırpar
+
+    Returns:
+        (kırpıntı, kırpıntı içindeki (top, right, bottom, left) konumu)
+    """
+    top, right, bottom, left = location
+    pad_y = int((bottom - top) * margin)
+    pad_x = int((right - left) * margin)
+
+    y0, x0 = max(0, top - pad_y), max(0, left - pad_x)
+    y1, x1 = min(image.shape[0], bottom + pad_y), min(image.shape[1], right + pad_x)
+
+    crop = np.ascontiguousarray(image[y0:y1, x0:x1])
+    return crop, (top - y0, right - x0, bottom - y0, left - x0)
+
+
+def detect_faces(rgb_frame: np.ndarray, settings: dict) -> list:
+    """
+    Yüzleri (isteğe bağlı küçültülmüş kopyada) tespit eder
+
+    settings['detect_scale'] < 1 ise tespit küçültülmüş frame'de yapılır, konumlar
+    orijinal frame koordinatlarına geri ölçeklenir (kırpıntılar tam çözünürlükten alınır).
+    """
+    scale = settings.get('detect_scale', 1.0)
+    image = rgb_frame
+    if scale != 1.0:
+        image = cv2.resize(rgb_frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    face_locations = face_recognition.face_locations(
+        image,
+        model=settings['detector'],
+        number_of_times_to_upsample=settings['number_of_times_to_upsample']
+    )
+
+    if scale == 1.0:
+        return face_locations
+
+    height, width = rgb_frame.shape[:2]
+    return [(
+        max(0, int(top / scale)),
+        min(width, int(right / scale)),
+        min(height, int(bottom / scale)),
+        max(0, int(left / scale))
+    ) for top, right, bottom, left in face_locations]
+
+
+def _detect_worker(detect_queue, result_queue, settings: dict):
+    """Tespit aşaması: yüz konumlarını bulur ve yüz kırpıntılarını ana sürece gönderir"""
+    # Ctrl+C ana süreçte yakalanır; worker'lar nöbetçi (None) ile kapanır
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        task = detect_queue.get()
+        if task is None:
+            break
+
+        seq, captured_at, tag, frame, detect_params = task
+        started = time.perf_counter()
+        try:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Frame bazlı ayarlar (ör. uyarlamalı küçültme / upsample) varsayılanları ezer
+            face_locations = detect_faces(rgb_frame, {**settings, **detect_params})
+        except Exception as e:
+            logger.warning(f"Yüz tespiti başarısız (frame {seq}): {e}")
+            face_locations = []
+
+        crops = [crop_face(rgb_frame, location) for location in face_locations]
+        result_queue.put(('detected', seq, captured_at, time.perf_counter() - started, tag, face_locations, crops))
+
+
+def _encode_worker(encode_queue, result_queue, settings: dict):
+    """Encoding aşaması: istenen yüz kırpıntılarının encoding'lerini çıkarır"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        task = encode_queue.get()
+        if task is None:
+            break
+
+        seq, captured_at, tag, keys, crops = task
+        started = time.perf_counter()
+        encoded_keys, encodings = [], []
+
+        for key, (crop, location) in zip(keys, crops):
+            try:
+                face_encodings = face_recognition.face_encodings(
+                    crop,
+                    [location],
+                    num_jitters=settings['num_jitters'],
+                    model=settings['landmark_model']
+                )
+            except Exception as e:
+                logger.warning(f"Face encoding çıkarılamadı (frame {seq}): {e}")
+                continue
+
+            if face_encodings:
+                encoded_keys.append(key)
+                encodings.append(face_encodings[0])
+
+        result_queue.put(('encoded', seq, captured_at, time.perf_counter() - started, tag, encoded_keys,
+                          np.asarray(encodings, dtype=np.float32).reshape(-1, 128)))
+
+
+class RecognitionPipeline:
+    """Tespit ve encoding aşamalarını süreç havuzlarında çalıştıran hat"""
+
+    def __init__(self, settings: dict, detect_workers: int = 1, encode_workers: int = 1,
+                 queue_size: int = 4, max_result_age: float = 1.0, max_in_flight_per_tag: int = None):
+        """
+        Args:
+            settings: Dedektör/encoder ayarları (detector, number_of_times_to_upsample, num_jitters, landmark_model)
+            detect_workers: Tespit süreç sayısı
+            encode_workers: Encoding süreç sayısı
+            queue_size: Aşamalar arası kuyruk kapasitesi (worker başına)
+            max_result_age: Bu süreden (saniye) eski tespit sonuçları atılır
+            max_in_flight_per_tag: Bir kaynağın (ör. kamera) hatta aynı anda bekleyebilecek en fazla
+                frame'i; paylaşılan worker'ları tek bir kaynağın doldurmasını önler (None = sınırsız)
+        """
+        self.settings = settings
+        self.detect_workers = max(1, detect_workers)
+        self.encode_workers = max(1, encode_workers)
+        self.max_result_age = max_result_age
+        self.max_in_flight_per_tag = max_in_flight_per_tag
+
+        self.detect_queue = multiprocessing.Queue(maxsize=queue_size * self.detect_workers)
+        self.encode_queue = multiprocessing.Queue(maxsize=queue_size * self.encode_workers)
+        self.result_queue = multiprocessing.Queue()
+
+        self.processes = []
+        self.next_seq = 0
+        # Kaynak (tag) bazında son uygulanan tespit ve bekleyen iş sayısı
+        self.last_result_seq = {}
+        self.tag_in_flight = {}
+        self.in_flight = 0
+
+        self.stats = {
+            'submitted': 0,
+            'dropped_full': 0,
+            'dropped_fair': 0,
+            'dropped_stale': 0,
+            'completed': 0,
+            'encode_requests': 0,
+            'encode_dropped_full': 0
+        }
+
+    def start(self):
+        """Worker süreçlerini başlatır"""
+        for _ in range(self.detect_workers):
+            self.processes.append(multiprocessing.Process(
+                target=_detect_worker,
+                args=(self.detect_queue, self.result_queue, self.settings),
+                daemon=True
+            ))
+        for _ in range(self.encode_workers):
+            self.processes.append(multiprocessing.Process(
+                target=_encode_worker,
+                args=(self.encode_queue, self.result_queue, self.settings),
+                daemon=True
+            ))
+
+        for process in self.processes:
+            process.start()
+
+        logger.info(f"Tanıma hattı başlatıldı: {self.detect_workers} tespit, {self.encode_workers} encoding worker'ı")
+
+    def submit(self, frame: np.ndarray, detect_params: dict = None, tag=None) -> Optional[int]:
+        """
+        Frame'i tespit aşamasına gönderir (bloklamaz)
+
+        Args:
+            detect_params: Bu frame için tespit ayarları (detect_scale, number_of_times_to_upsample)
+            tag: Frame'in kaynağı (ör. kamera); sonuçla birlikte geri döner
+
+        Returns:
+            Frame sıra numarası; hat ya da kaynağın payı doluysa None (frame atlanır)
+        """
+        if self.max_in_flight_per_tag is not None and self.tag_in_flight.get(tag, 0) >= self.max_in_flight_per_tag:
+            self.stats['dropped_fair'] += 1
+            return None
+
+        seq = self.next_seq
+        try:
+            self.detect_queue.put_nowait((seq, time.monotonic(), tag, frame, detect_params or {}))
+        except queue.Full:
+            self.stats['dropped_full'] += 1
+            return None
+
+        self.next_seq += 1
+        self._track_in_flight(tag, 1)
+        self.stats['submitted'] += 1
+        return seq
+
+    def _track_in_flight(self, tag, delta: int):
+        self.in_flight += delta
+        self.tag_in_flight[tag] = self.tag_in_flight.get(tag, 0) + delta
+
+    def submit_encoding(self, seq: int, captured_at: float, keys: list, crops: list, tag=None) -> bool:
+        """
+        Seçilen yüz kırpıntılarını encoding aşamasına gönderir (bloklamaz)
+
+        Args:
+            keys: Her kırpıntının anahtarı (ör. iz id'si), sonuçla birlikte geri döner
+            crops: crop_face() çıktıları
+
+        Returns:
+            Gönderildiyse True; kuyruk doluysa False
+        """
+        try:
+            self.encode_queue.put_nowait((seq, captured_at, tag, keys, crops))
+        except queue.Full:
+            self.stats['encode_dropped_full'] += 1
+            return False
+
+        self._track_in_flight(tag, 1)
+        self.stats['encode_requests'] += 1
+        return True
+
+    def results(self) -> Iterator[dict]:
+        """
+        Hazır sonuçları bloklamadan döndürür; eski ya da sırası geçmiş tespit sonuçları atılır.
+        Encoding sonuçları yaşından bağımsız uygulanır: iz kimliğine bağlıdır, iz hâlâ
+        geçerlidir ve tespit + encoding süresi yavaş makinede max_result_age'i aşabilir.
+
+        Yields:
+            {'stage': 'detected', 'seq', 'tag', 'captured_at', 'latency', 'compute', 'locations', 'crops'},
+            {'stage': 'encoded', 'seq', 'tag', 'captured_at', 'latency', 'compute', 'keys', 'encodings'} ya da
+            {'stage': 'stale', 'seq', 'tag', 'captured_at', 'latency', 'compute'} - atılan tespit sonucu;
+            içeriği yoktur ama gecikmesi uyarlamalı denetleyiciye bildirilir (her sonuç gecikmişse
+            denetleyici başka ölçüm göremez)
+            (latency: yakalamadan bu yana geçen süre, compute: worker'daki işlem süresi)
+        """
+        while True:
+            try:
+                stage, seq, captured_at, compute, tag, *payload = self.result_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            self._track_in_flight(tag, -1)
+            latency = time.monotonic() - captured_at
+
+            if stage == 'detected':
+                # Gecikmiş ya da aynı kaynaktan daha yeni bir frame'in tespiti zaten uygulandıysa at
+                if latency > self.max_result_age or seq < self.last_result_seq.get(tag, -1):
+                    self.stats['dropped_stale'] += 1
+                    yield {'stage': 'stale', 'seq': seq, 'tag': tag, 'captured_at': captured_at,
+                           'latency': latency, 'compute': compute}
+                    continue
+
+                self.last_result_seq[tag] = seq
+                self.stats['completed'] += 1
+                face_locations, crops = payload
+                yield {'stage': stage, 'seq': seq, 'tag': tag, 'captured_at': captured_at, 'latency': latency,
+                       'compute': compute, 'locations': face_locations, 'crops': crops}
+            else:
+                keys, encodings = payload
+                yield {'stage': stage, 'seq': seq, 'tag': tag, 'captured_at': captured_at, 'latency': latency,
+                       'compute': compute, 'keys': keys, 'encodings': encodings}
+
+    def stop(self, timeout: float = 2.0):
+        """Worker'ları nöbetçi değerlerle kapatır, kapanmayanları sonlandırır"""
+        detect_processes = self.processes[:self.detect_workers]
+        encode_processes = self.processes[self.detect_workers:]
+
+        # Önce tespit aşaması boşaltılır, ardından encoding aşaması
+        for processes, stage_queue in ((detect_processes, self.detect_queue), (encode_processes, self.encode_queue)):
+            for _ in processes:
+                try:
+                    stage_queue.put(None, timeout=timeout)
+                except queue.Full:
+                    break
+            deadline = time.monotonic() + timeout
+            for process in processes:
+                # Kuyruğa yazan süreç, tampon boşalmadan kapanamaz; sonuçlar bu arada atılır
+                while process.is_alive() and time.monotonic() < deadline:
+                    self._discard_results()
+                    process.join(0.05)
+                if process.is_alive():
+                    process.terminate()
+
+        self.processes = []
+        self.in_flight = 0
+        self.tag_in_flight.clear()
+        logger.info("Tanıma hattı durduruldu")
+
+    def _discard_results(self):
+        try:
+            while True:
+                self.result_queue.get_nowait()
+        except queue.Empty:
+            pass
@@ -5,11 +5,19 @@ import logging
 import time
 import os
 from collections import deque
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from CaptureService import CaptureService
+from RecognitionPipeline import RecognitionPipeline, detect_faces
+from AdaptiveController import AdaptiveController
+from FaceTracker import FaceTracker
+from MotionGate import MotionGate
 from ModelTrainer import FaceRecognitionTrainer
+from FaceMatcher import FaceMatcher
 from LogService import AccessLogger
+from GalleryServer import GalleryClient
+from ModelReloader import ModelReloader
+from CooldownStore import CooldownStore
 logger = logging.getLogger(__name__)
 logging.basicConfig(
     level=logging.INFO,
@@ -21,28 +29,56 @@ logging.basicConfig(
 class RealtimeFaceRecognition:
     """Gerçek zamanlı yüz tanıma servisi"""
     
-    def __init__(self, config_path: str, model_path: str = "face_recognition_model.pkl"):
+    def __init__(self, config_path: str, model_path: str = "face_recognition_model.gallery", gallery_mode: str = "full",
+                 index_config: dict = None, trainer: FaceRecognitionTrainer = None, pipeline: RecognitionPipeline = None,
+                 access_logger: AccessLogger = None, camera_config: dict = None, camera_location: str = None, tag=None,
+                 gallery_client: GalleryClient = None, api_cooldowns: CooldownStore = None):
         """
         Args:
             config_path: CaptureService config dosyası yolu
             model_path: Eğitilmiş model dosyası yolu
+            gallery_mode: Eşleştirme galeri modu ('full' veya 'aggregated')
+            index_config: Galeri indeksi ayarları (ör. {'n_probe': 16} ile recall/gecikme dengesi)
+            trainer: Paylaşılan, yüklenmiş galeri (verilirse model yüklenmez ve yeniden yüklemeyi sahibi yapar)
+            pipeline: Paylaşılan tanıma hattı (verilirse başlatma/durdurma sahibine aittir)
+            access_logger: Paylaşılan erişim kaydedici
+            camera_config: Kamera ayarları sözlüğü (verilirse config_path okunmaz)
+            camera_location: Erişim kayıtlarına yazılacak kamera konumu
+            tag: Paylaşılan hatta bu kameranın sonuçlarını ayıran anahtar
+            gallery_client: Galeri servisi istemcisi (verilirse model bu süreçte yüklenmez, eşleştirme servise sorulur)
+            api_cooldowns: Paylaşılan API bekleme süreleri (aynı kişi birden çok kamerada görülse de tek kayıt)
         """
         # CaptureService'i başlat
-        self.capture_service = CaptureService(config_path)
+        self.capture_service = CaptureService(config_path, config=camera_config)
+        self.camera_location = camera_location or self.capture_service.config.get('CameraLocation', "Ana Giriş Kamera 1")
+        self.tag = tag
         
         # Face Recognition Trainer'ı yükle
         self.model_path = Path(model_path)
-        self.trainer = FaceRecognitionTrainer(model_save_path=model_path)
-
-        if not self.trainer.load_model():
-            raise RuntimeError("Model yüklenemedi! Önce modeli eğitin.")
-
-        # Model hot reload için son değişiklik zamanını tut
-        self.last_model_mtime = self._get_model_mtime()
-        self.model_check_interval = 30  # Her 30 saniyede bir kontrol et
-        self.last_model_check = time.time()
-
-        self.access_logger = AccessLogger("http://127.0.0.1:8000")
+        self.gallery_client = gallery_client
+        self.owns_trainer = trainer is None and gallery_client is None
+        if self.owns_trainer:
+            trainer = FaceRecognitionTrainer(model_save_path=model_path, gallery_mode=gallery_mode,
+                                             index_config=index_config, use_cache=False)
+
+            if not trainer.load_model():
+                raise RuntimeError("Model yüklenemedi! Önce modeli eğitin.")
+        self.trainer = trainer
+
+        # Tespit / encoding ayarları galeriyi tutan taraftan alınır
+        if gallery_client is not None:
+            self.encoding_settings = gallery_client.info()['encoding_settings']
+        else:
+            self.encoding_settings = self.trainer.encoding_settings
+
+        # Model hot reload: değişiklik arka planda yüklenir, döngü yalnızca referansı değiştirir
+        self.reloader = None
+        if self.owns_trainer:
+            self.reloader = ModelReloader(self.model_path, lambda: self.trainer.load_snapshot())
+
+        # Kayıtlar arka planda gönderilir, tanıma döngüsü HTTP beklemez
+        self.owns_access_logger = access_logger is None
+        self.access_logger = access_logger or AccessLogger("http://127.0.0.1:8000")
 
         # Tanıma ayarları
         self.recognition_config = {
@@ -50,67 +86,122 @@ class RealtimeFaceRecognition:
             'process_every_n_frames': 2,  # Her N frame'de bir işle (performans için)
             'min_confidence': 0.5,  # Minimum güven skoru
             'greeting_cooldown': 5,  # Aynı kişiye kaç saniyede bir selam ver
-            'api_cooldown': 300  # Aynı kişi için API'ye kaç saniyede bir istek at (5 dakika)
+            'api_cooldown': 300,  # Aynı kişi için API'ye kaç saniyede bir istek at (5 dakika)
+            'cooldown_max_entries': 10000,  # Bekleme süresinde tutulacak en fazla kişi
+            'send_snapshot': True,  # Geçiş kaydıyla birlikte snapshot gönder (kalite / yüz kırpma AccessLogger'da)
+            # Tespit / encoding süreç sayısı (0 = her şey ana süreçte, sıralı)
+            'detect_workers': max(1, ((os.cpu_count() or 2) - 1) // 2),
+            'encode_workers': max(1, ((os.cpu_count() or 2) - 1) // 2),
+            'max_result_age': 1.0,  # Bu süreden (saniye) eski tespit sonuçları atılır
+            # Hareket kapısı: hareket yoksa yüz tespiti hiç çalıştırılmaz
+            'motion_gate': True,
+            'motion_roi': None,  # (x0, y0, x1, y1) 0-1 arası oran, ör. kapı bölgesi; None = tüm frame
+            'motion_threshold': 0.01,  # Hareket sayılması için değişen piksel oranı
+            'motion_hold_seconds': 3.0,  # Son hareketten sonra aktif kalma süresi
+            'idle_detect_interval': 10.0,  # Boştayken periyodik tespit aralığı (saniye)
+            # Yüz izleme: kimlik izle taşınır, encoding yalnızca gerektiğinde hesaplanır
+            'tracking': True,
+            'track_iou_threshold': 0.3,  # Aynı iz sayılmak için en düşük IoU
+            'track_max_age': 1.0,  # Bu süre (saniye) görülmeyen iz silinir
+            'reverify_interval': 2.0,  # Tanınmış izin periyodik yeniden doğrulama aralığı (saniye)
+            'reverify_below_confidence': 0.55,  # Bu güvenin altındaki izler her tespitte yeniden encode edilir
+            # Uyarlamalı ayar: işleme aralığı, tespit ölçeği ve upsample gecikme bütçesine göre seçilir
+            'adaptive': True,
+            'latency_budget_ms': 250  # Yakalamadan tespit sonucuna hedef gecikme
         }
 
-        # Son selamlama zamanlarını tut
-        self.last_greeting_time = {}
+        self.controller = None
+        if self.recognition_config['adaptive']:
+            self.controller = AdaptiveController(
+                latency_budget=self.recognition_config['latency_budget_ms'] / 1000,
+                max_in_flight=2 * max(1, self.recognition_config['detect_workers'])
+            )
+
+        # İzleme kapalıysa her tespitte tüm yüzler encode edilir
+        tracking = self.recognition_config['tracking']
+        self.tracker = FaceTracker(
+            iou_threshold=self.recognition_config['track_iou_threshold'],
+            max_age=self.recognition_config['track_max_age'],
+            reverify_interval=self.recognition_config['reverify_interval'] if tracking else 0.0,
+            reverify_below_confidence=self.recognition_config['reverify_below_confidence']
+        )
+
+        self.motion_gate = None
+        if self.recognition_config['motion_gate']:
+            self.motion_gate = MotionGate(
+                roi=self.recognition_config['motion_roi'],
+                min_changed_fraction=self.recognition_config['motion_threshold'],
+                active_stride=self.recognition_config['process_every_n_frames'],
+                hold_seconds=self.recognition_config['motion_hold_seconds'],
+                idle_interval=self.recognition_config['idle_detect_interval']
+            )
 
-        # Son API çağrısı zamanlarını tut (user_id bazlı)
-        self.last_api_call_time = {}
+        # Tespit ve encoding süreç havuzlarında, eşleştirme ana süreçte yapılır
+        self.owns_pipeline = pipeline is None
+        self.pipeline = pipeline
+        if self.owns_pipeline and self.recognition_config['detect_workers'] > 0:
+            self.pipeline = RecognitionPipeline(
+                dict(self.encoding_settings),
+                detect_workers=self.recognition_config['detect_workers'],
+                encode_workers=self.recognition_config['encode_workers'],
+                max_result_age=self.recognition_config['max_result_age']
+            )
+        # Son tespitteki izlerin yüzleri (yeni tespit gelene kadar sonraki frame'lere çizilir)
+        self.current_faces = []
+        # Encoding'i beklenen izlerin tespit kırpıntıları (snapshot olarak gönderilir)
+        self.pending_crops = {}
+
+        # Selamlama ve API bekleme süreleri (user_id bazlı, model yeniden yüklemelerinde korunur).
+        # Selamlama kameraya özeldir; API bekleme süresi verilirse kameralar arasında paylaşılır
+        self.greeting_cooldowns = CooldownStore(self.recognition_config['greeting_cooldown'],
+                                                max_entries=self.recognition_config['cooldown_max_entries'])
+        self.api_cooldowns = api_cooldowns or CooldownStore(self.recognition_config['api_cooldown'],
+                                                            max_entries=self.recognition_config['cooldown_max_entries'])
         
         # İstatistikler
         self.stats = {
             'total_frames': 0,
             'processed_frames': 0,
             'faces_detected': 0,
-            'faces_recognized': 0
+            'faces_recognized': 0,
+            'processing': self._processing_settings()
         }
         
-        self.running = False
+        # FPS ölçümü
+        self.fps = 0.0
+        self._fps_frames = 0
+        self._fps_start_time = time.time()
 
-    def _get_model_mtime(self) -> float:
-        """Model dosyasının son değişiklik zamanını döndür"""
-        try:
-            if self.model_path.exists():
-                return os.path.getmtime(self.model_path)
-        except Exception:
-            pass
-        return 0
+        self.running = False
 
     def _check_and_reload_model(self):
-        """Model dosyası değiştiyse yeniden yükle"""
-        current_time = time.time()
-
-        # Belirli aralıklarla kontrol et
-        if current_time - self.last_model_check < self.model_check_interval:
+        """Arka planda yüklenmiş yeni galeri hazırsa devreye al"""
+        # Paylaşılan galeriyi yalnızca sahibi yeniden yükler
+        if self.reloader is None:
             return
 
-        self.last_model_check = current_time
-        current_mtime = self._get_model_mtime()
-
-        if current_mtime > self.last_model_mtime:
-            logger.info("Model dosyası değişti, yeniden yükleniyor...")
+        trainer = self.reloader.take()
+        if trainer is None:
+            return
 
-            if self.trainer.load_model():
-                self.last_model_mtime = current_mtime
-                logger.info(f"Model yeniden yüklendi: {len(self.trainer.known_face_encodings)} encoding")
+        # Tek referans ataması: eşleştirme ya eski ya yeni galeriyi bütünüyle görür
+        self.trainer = trainer
+        self.encoding_settings = trainer.encoding_settings
+        # Bekleme süreleri korunur: kadrajdaki kişiler yeniden selamlanmaz ve kaydedilmez
+        logger.info(f"Model yeniden yüklendi: {len(trainer.known_face_encodings)} encoding (v{trainer.model_version})")
 
-                # Yeni kullanıcılar için cooldown'ları temizle
-                self.last_greeting_time.clear()
-                self.last_api_call_time.clear()
-            else:
-                logger.error("Model yeniden yüklenemedi!")
+    def greet_person(self, name: str, user_id: int, confidence: float, snapshot: tuple = None):
+        """
+        Kişiye selamlama mesajı göster
 
-    def greet_person(self, name: str, user_id: int, confidence: float):
-        """Kişiye selamlama mesajı göster"""
+        Args:
+            snapshot: (BGR görüntü, görüntüdeki yüz kutusu) - geçiş kaydıyla gönderilir
+        """
         current_time = datetime.now()
 
         # Selamlama cooldown kontrolü
-        if name in self.last_greeting_time:
-            time_diff = current_time - self.last_greeting_time[name]
-            if time_diff < timedelta(seconds=self.recognition_config['greeting_cooldown']):
-                return  # Çok erken, selamlama
+        if self.greeting_cooldowns.remaining(user_id) > 0:
+            return  # Çok erken, selamlama
 
         # Selamlama mesajı
         print("\n" + "="*60)
@@ -122,84 +213,158 @@ class RealtimeFaceRecognition:
 
         logger.info(f"Kişi tanındı: {name} (ID: {user_id}, Güven: %{confidence*100:.1f})")
 
-        # Son selamlama zamanını güncelle
-        self.last_greeting_time[name] = current_time
+        # Selamlama cooldown'unu başlat
+        self.greeting_cooldowns.start(user_id)
         self.stats['faces_recognized'] += 1
 
         # API cooldown kontrolü (5 dakika)
-        should_call_api = True
-        if user_id in self.last_api_call_time:
-            api_time_diff = current_time - self.last_api_call_time[user_id]
-            if api_time_diff < timedelta(seconds=self.recognition_config['api_cooldown']):
-                should_call_api = False
-                logger.debug(f"API cooldown aktif: {name} (ID: {user_id}) - Kalan süre: {self.recognition_config['api_cooldown'] - api_time_diff.total_seconds():.0f} saniye")
-
-        if should_call_api:
+        api_remaining = self.api_cooldowns.remaining(user_id)
+        if api_remaining > 0:
+            logger.debug(f"API cooldown aktif: {name} (ID: {user_id}) - Kalan süre: {api_remaining:.0f} saniye")
+        else:
+            image, face_location = snapshot if snapshot and self.recognition_config['send_snapshot'] else (None, None)
             self.access_logger.log_access(
                 customer_id=user_id,
                 confidence=confidence,
-                camera_location="Ana Giriş Kamera 1"
+                frame=image,
+                camera_location=self.camera_location,
+                face_location=face_location
             )
-            self.last_api_call_time[user_id] = current_time
-            logger.info(f"API'ye erişim kaydı gönderildi: {name} (ID: {user_id})")
+            self.api_cooldowns.start(user_id)
+            logger.info(f"Erişim kaydı gönderim kuyruğuna alındı: {name} (ID: {user_id})")
     
     def process_frame(self, frame: np.ndarray):
-        """Frame'i işle ve yüzleri tanı"""
+        """Frame'i işle ve yüzleri tanı (sıralı yol)"""
         # Frame zaten CaptureService'de 0.5x küçültüldü, tekrar küçültmeye gerek yok
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
-        # Yüz konumlarını bul (number_of_times_to_upsample=1 daha hızlı)
-        face_locations = face_recognition.face_locations(rgb_frame, model='hog', number_of_times_to_upsample=1)
+        # Yüz konumlarını bul (küçültme / upsample uyarlamalı denetleyiciden gelir)
+        started = time.perf_counter()
+        face_locations = detect_faces(rgb_frame, {**self.encoding_settings, **self._detect_params()})
+        detect_elapsed = time.perf_counter() - started
+        self._observe_latency(detect_elapsed, detect_elapsed, 0)
+
+        tracks = self.track_faces(face_locations)
+
+        # Yalnızca yeni / düşük güvenli / doğrulama zamanı gelmiş izler encode edilir
+        pending = [track for track in tracks if self.tracker.needs_encoding(track)]
+        if pending:
+            encode_started = time.perf_counter()
+            face_encodings = face_recognition.face_encodings(rgb_frame, [track.location for track in pending])
+            encode_elapsed = time.perf_counter() - encode_started
+            self._observe_encoding(detect_elapsed + encode_elapsed, encode_elapsed)
+            # Frame henüz çizilmedi; snapshot bölgesi log_access içinde kopyalanır
+            self.identify_tracks([track.track_id for track in pending], face_encodings,
+                                 [(frame, track.location) for track in pending])
+
+        recognized_faces = self.faces_from_tracks(tracks)
+        self.draw_faces(frame, recognized_faces)
 
-        if not face_locations:
-            return frame, []
+        return frame, recognized_faces
 
+    def _detect_params(self) -> dict:
+        """Sıradaki tespit için ölçek / upsample ayarları"""
+        if self.controller is not None:
+            return self.controller.detect_params
+        return {'detect_scale': 1.0, 'number_of_times_to_upsample': 1}
+
+    def _processing_stride(self) -> int:
+        if self.controller is not None:
+            return self.controller.stride
+        return self.recognition_config['process_every_n_frames']
+
+    def _processing_settings(self) -> dict:
+        """Seçili işleme ayarları (istatistiklerde gösterilir)"""
+        if self.controller is not None:
+            return self.controller.stats
+        return {'process_every_n_frames': self._processing_stride(), **self._detect_params()}
+
+    def _observe_latency(self, latency: float, compute: float, in_flight: int):
+        if self.controller is not None:
+            self.controller.observe(latency, compute, in_flight)
+            self.stats['processing'] = self.controller.stats
+
+    def _observe_encoding(self, latency: float, compute: float):
+        if self.controller is not None:
+            self.controller.observe_encoding(latency, compute)
+            self.stats['processing'] = self.controller.stats
+
+    def track_faces(self, face_locations: list) -> list:
+        """Tespitleri izlerle eşleştirir"""
         self.stats['faces_detected'] += len(face_locations)
+        return self.tracker.update(face_locations)
 
-        # Yüz encoding'lerini çıkar
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+    def identify_tracks(self, track_ids: list, face_encodings, snapshots: list = None):
+        """
+        Encoding'leri galeriyle eşleştirir, sonucu izlere yazar ve tanınan kişileri selamlar
 
-        recognized_faces = []
+        Args:
+            snapshots: İz başına (BGR görüntü, yüz kutusu) ya da None
+        """
+        if len(track_ids) == 0:
+            return
 
-        # Her yüz için
-        for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
+        # Tüm yüzleri galeriyle tek bir toplu çağrıda eşleştir
+        match_result = self.match_faces(face_encodings)
 
-            # Bilinen yüzlerle karşılaştır
-            matches = face_recognition.compare_faces(
-                self.trainer.known_face_encodings,
-                face_encoding,
-                tolerance=self.recognition_config['tolerance']
-            )
+        # Her yüz için
+        for i, track_id in enumerate(track_ids):
 
             name = "Bilinmeyen"
             user_id = None
             confidence = 0.0
 
-            # Eşleşme varsa en yakın olanı bul
-            if True in matches:
-                face_distances = face_recognition.face_distance(
-                    self.trainer.known_face_encodings,
-                    face_encoding
-                )
-                best_match_index = np.argmin(face_distances)
+            # Eşleşme varsa en yakın olanı kullan
+            if match_result['matches'][i]:
+                confidence = 1 - float(match_result['distances'][i])
 
-                if matches[best_match_index]:
-                    confidence = 1 - face_distances[best_match_index]
+                # Minimum güven kontrolü
+                if confidence >= self.recognition_config['min_confidence']:
+                    name = match_result['names'][i]
+                    user_id = match_result['ids'][i]
 
-                    # Minimum güven kontrolü
-                    if confidence >= self.recognition_config['min_confidence']:
-                        name = self.trainer.known_face_names[best_match_index]
-                        user_id = self.trainer.known_face_ids[best_match_index]
+            self.tracker.assign(track_id, name, user_id, confidence)
 
-                        # Kişiye selamla
-                        self.greet_person(name, user_id, confidence)
+            # Kişiye selamla (iz bu arada kaybolduysa da giriş gerçekleşmiştir)
+            if user_id is not None:
+                self.greet_person(name, user_id, confidence, snapshots[i] if snapshots else None)
 
-            recognized_faces.append({
-                'name': name,
-                'user_id': user_id,
-                'confidence': confidence,
-                'location': (top, right, bottom, left)
-            })
+    def match_faces(self, face_encodings) -> dict:
+        """
+        Encoding'leri yerel galeriyle ya da galeri servisiyle eşleştirir
+
+        Returns:
+            FaceMatcher.match_with_labels şeklinde sonuç
+        """
+        tolerance = self.recognition_config['tolerance']
+        if self.gallery_client is None:
+            return self.trainer.matcher.match_with_labels(face_encodings, tolerance=tolerance)
+
+        try:
+            return self.gallery_client.match(face_encodings, tolerance=tolerance)
+        except (ConnectionError, RuntimeError) as e:
+            # Servis yokken yüzler bilinmeyen sayılır, döngü durmaz
+            logger.error(f"Galeri servisi sorgulanamadı: {e}")
+            return FaceMatcher.empty().match_with_labels(face_encodings, tolerance=tolerance)
+
+    @staticmethod
+    def faces_from_tracks(tracks: list) -> list:
+        """İzleri çizim / sonuç sözlüklerine çevirir"""
+        return [{
+            'track_id': track.track_id,
+            'name': track.name or "Bilinmeyen",
+            'user_id': track.user_id,
+            'confidence': track.confidence,
+            'location': track.location
+        } for track in tracks]
+
+    @staticmethod
+    def draw_faces(frame: np.ndarray, recognized_faces: list):
+        """Tanınan yüzlerin kutularını ve etiketlerini frame'e çizer"""
+        for face in recognized_faces:
+            top, right, bottom, left = face['location']
+            name = face['name']
+            confidence = face['confidence']
 
             # Yüzün etrafına kutu çiz
             color = (0, 255, 0) if name != "Bilinmeyen" else (0, 0, 255)
@@ -214,49 +379,137 @@ class RealtimeFaceRecognition:
             cv2.putText(frame, label, (left + 6, bottom - 6),
                        cv2.FONT_HERSHEY_DUPLEX, 0.6, (255, 255, 255), 1)
 
-        return frame, recognized_faces
+    def _apply_pipeline_results(self):
+        """Hattan gelen hazır sonuçları uygular"""
+        for result in self.pipeline.results():
+            self.apply_result(result)
+
+    def apply_result(self, result: dict):
+        """Tek bir hat sonucunu uygular: tespitler izlenir, encoding'ler eşleştirilir"""
+        if result['stage'] == 'stale':
+            # Atılan sonucun gecikmesi de ölçümdür: her sonuç gecikiyorsa ayar yalnızca buradan ucuzlar
+            self._observe_latency(result['latency'], result['compute'], self.pipeline.tag_in_flight.get(self.tag, 0))
+            return
+
+        if result['stage'] == 'encoded':
+            self._observe_encoding(result['latency'], result['compute'])
+
+            # Kırpıntılar tespit aşamasından RGB gelir
+            snapshots = []
+            for key in result['keys']:
+                crop = self.pending_crops.pop(key, None)
+                snapshots.append((cv2.cvtColor(crop[0], cv2.COLOR_RGB2BGR), crop[1]) if crop is not None else None)
+            self.identify_tracks(result['keys'], result['encodings'], snapshots)
+
+            # Ekrandaki izlerin kimliklerini yenile
+            tracks = self.tracker.tracks
+            self.current_faces = self.faces_from_tracks(
+                [tracks[face['track_id']] for face in self.current_faces if face['track_id'] in tracks])
+            return
+
+        self._observe_latency(result['latency'], result['compute'], self.pipeline.tag_in_flight.get(self.tag, 0))
+
+        tracks = self.track_faces(result['locations'])
+        self.stats['processed_frames'] += 1
+
+        pending = [i for i, track in enumerate(tracks) if self.tracker.needs_encoding(track)]
+        if pending and self.pipeline.submit_encoding(
+                result['seq'], result['captured_at'],
+                [tracks[i].track_id for i in pending],
+                [result['crops'][i] for i in pending],
+                tag=self.tag):
+            for i in pending:
+                self.tracker.mark_pending(tracks[i])
+                self.pending_crops[tracks[i].track_id] = result['crops'][i]
+
+        # Silinmiş izlerin (yanıtı hiç gelmeyen) kırpıntıları tutulmaz
+        for track_id in [track_id for track_id in self.pending_crops if track_id not in self.tracker.tracks]:
+            del self.pending_crops[track_id]
+
+        self.current_faces = self.faces_from_tracks(tracks)
+
+    def handle_frame(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Kameradan gelen frame'i işler: gerekiyorsa tespite gönderir ve son sonucu çizer
+
+        Returns:
+            Üzerine kutular ve FPS yazılmış frame
+        """
+        self.stats['total_frames'] += 1
+        self._fps_frames += 1
+
+        # FPS hesapla
+        if self._fps_frames % 30 == 0:
+            fps_end_time = time.time()
+            self.fps = 30 / (fps_end_time - self._fps_start_time)
+            self._fps_start_time = fps_end_time
+
+        # Hareket varsa her N frame'de bir işle, hareketsiz koridorda tespiti atla
+        if self.motion_gate is not None:
+            self.motion_gate.active_stride = self._processing_stride()
+            should_process = self.motion_gate.should_process(frame)
+            if not should_process and not self.motion_gate.active:
+                self.current_faces = []
+        else:
+            should_process = self.stats['total_frames'] % self._processing_stride() == 0
+
+        if self.pipeline is not None:
+            # Bloklamadan hatta gönder, son sonucun kutularını çiz
+            if should_process:
+                self.pipeline.submit(frame.copy(), self._detect_params(), tag=self.tag)
+            processed_frame = frame
+            self.draw_faces(processed_frame, self.current_faces)
+        elif should_process:
+            processed_frame, recognized_faces = self.process_frame(frame)
+            self.stats['processed_frames'] += 1
+        else:
+            processed_frame = frame
+
+        # FPS bilgisini frame'e yaz
+        cv2.putText(processed_frame, f"FPS: {self.fps:.1f}", (10, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        return processed_frame
+
+    def log_startup(self):
+        logger.info(f"Gerçek zamanlı yüz tanıma başlatıldı: {self.camera_location}")
+        if self.gallery_client is not None:
+            info = self.gallery_client.info()
+            logger.info(f"Galeri servisi: {self.gallery_client.socket_path} "
+                        f"({info['encodings']} encoding, v{info['model_version']})")
+            logger.info(f"Galeri modu: {info['gallery_mode']}")
+            logger.info(f"Galeri indeksi: {info['index'] or 'yok'}")
+        else:
+            logger.info(f"Model: {len(self.trainer.known_face_encodings)} encoding yüklendi")
+            logger.info(f"Galeri modu: {self.trainer.gallery_mode}")
+            logger.info(f"Galeri indeksi: {self.trainer.index.kind if self.trainer.index is not None else 'yok'}")
+        logger.info(f"Tanıma toleransı: {self.recognition_config['tolerance']}")
+        logger.info(f"Minimum güven: {self.recognition_config['min_confidence']}")
     
     def start(self, show_window: bool = True):
         """Gerçek zamanlı tanımayı başlat"""
         self.running = True
         self.capture_service.start()
-        
-        logger.info("Gerçek zamanlı yüz tanıma başlatıldı")
-        logger.info(f"Model: {len(self.trainer.known_face_encodings)} encoding yüklendi")
-        logger.info(f"Tanıma toleransı: {self.recognition_config['tolerance']}")
-        logger.info(f"Minimum güven: {self.recognition_config['min_confidence']}")
-        
-        frame_count = 0
-        fps_start_time = time.time()
-        fps = 0
+        if self.reloader is not None:
+            self.reloader.start()
+        self.log_startup()
+
+        if self.pipeline is not None and self.owns_pipeline:
+            self.pipeline.start()
         
         try:
             while self.running:
                 # Model değişikliği kontrolü (hot reload)
                 self._check_and_reload_model()
 
-                # Kuyruktan frame al
-                if not self.capture_service.que.empty():
-                    frame = self.capture_service.que.get()
-                    self.stats['total_frames'] += 1
-                    frame_count += 1
-                    
-                    # FPS hesapla
-                    if frame_count % 30 == 0:
-                        fps_end_time = time.time()
-                        fps = 30 / (fps_end_time - fps_start_time)
-                        fps_start_time = fps_end_time
-                    
-                    # Her N frame'de bir işle (performans optimizasyonu)
-                    if self.stats['total_frames'] % self.recognition_config['process_every_n_frames'] == 0:
-                        processed_frame, recognized_faces = self.process_frame(frame)
-                        self.stats['processed_frames'] += 1
-                    else:
-                        processed_frame = frame
-                    
-                    # FPS bilgisini frame'e yaz
-                    cv2.putText(processed_frame, f"FPS: {fps:.1f}", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                # Hattan gelen sonuçları uygula (eşleştirme + selamlama)
+                if self.pipeline is not None:
+                    self._apply_pipeline_results()
+
+                # Sıradaki frame'i bekle ('latest' modunda her zaman en yeni frame gelir)
+                frame = self.capture_service.get_frame(timeout=0.05)
+                if frame is not None:
+                    processed_frame = self.handle_frame(frame)
                     
                     # Pencere göster
                     if show_window:
@@ -266,8 +519,6 @@ class RealtimeFaceRecognition:
                         if cv2.waitKey(1) & 0xFF == ord('q'):
                             logger.info("Kullanıcı çıkış yaptı")
                             break
-                else:
-                    time.sleep(0.01)
                     
         except KeyboardInterrupt:
             logger.info("Program KeyboardInterrupt ile durduruldu")
@@ -278,16 +529,37 @@ class RealtimeFaceRecognition:
         """Servisi durdur"""
         self.running = False
         self.capture_service.stop()
+        if self.reloader is not None:
+            self.reloader.stop()
+        if self.pipeline is not None and self.owns_pipeline:
+            self.pipeline.stop()
+        if self.owns_access_logger:
+            self.access_logger.close()
+        if self.gallery_client is not None:
+            self.gallery_client.close()
         cv2.destroyAllWindows()
         
         # İstatistikleri göster
         print("\n" + "="*60)
-        print("FACE RECOGNITION İSTATİSTİKLERİ")
+        print(f"FACE RECOGNITION İSTATİSTİKLERİ - {self.camera_location}")
         print("="*60)
         print(f"Toplam Frame: {self.stats['total_frames']}")
         print(f"İşlenen Frame: {self.stats['processed_frames']}")
         print(f"Tespit Edilen Yüz: {self.stats['faces_detected']}")
         print(f"Tanınan Yüz: {self.stats['faces_recognized']}")
+        if self.motion_gate is not None:
+            print(f"Hareketsiz Atlanan Frame: {self.motion_gate.stats['skipped']}")
+        if self.pipeline is not None:
+            print(f"Atlanan Frame (hat dolu): {self.pipeline.stats['dropped_full']}")
+            print(f"Atılan Eski Sonuç: {self.pipeline.stats['dropped_stale']}")
+        processing = self.stats['processing']
+        print(f"İşleme Ayarı: her {processing['process_every_n_frames']} frame, "
+              f"ölçek {processing['detect_scale']}, upsample {processing['number_of_times_to_upsample']}")
+        print(f"Hesaplanan / Atlanan Encoding: {self.tracker.stats['encodings_requested']} / "
+              f"{self.tracker.stats['encodings_skipped']}")
+        if self.owns_access_logger:
+            print(f"Gönderilen / Bekleyen Geçiş Kaydı: {self.access_logger.stats['sent']} / "
+                  f"{self.access_logger.stats['pending']}")
         print("="*60 + "\n")
         
         logger.info("Face Recognition servisi durduruldu")
@@ -2,8 +2,12 @@ from CaptureService import CaptureService
 from ClientService import RecognizerClient
 from ModelTrainer import FaceRecognitionTrainer
 from RecognitionService import RealtimeFaceRecognition
+from CameraSupervisor import CameraSupervisor
+from GalleryServer import GalleryClient
 from PIL import Image
 import numpy as np
+import signal
+import yaml
 
 
 
@@ -67,11 +71,24 @@ def main():
 
 if __name__ == "__main__":
     try:
-        # Gerçek zamanlı yüz tanıma servisi oluştur
-        recognition_service = RealtimeFaceRecognition(
-            config_path="camera_config.yaml",
-            model_path="face_recognition_model.pkl"
-        )
+        with open("camera_config.yaml", 'r') as config_specs:
+            camera_config = yaml.safe_load(config_specs)
+
+        # Config'de kamera listesi varsa tümü tek galeriyle çalışır
+        if camera_config.get('Cameras'):
+            recognition_service = CameraSupervisor(
+                config_path="camera_config.yaml",
+                model_path="face_recognition_model.gallery"
+            )
+        else:
+            # Gerçek zamanlı yüz tanıma servisi oluştur
+            # Galeri servisi tanımlıysa model bu süreçte yüklenmez
+            gallery_socket = camera_config.get('GallerySocket')
+            recognition_service = RealtimeFaceRecognition(
+                config_path="camera_config.yaml",
+                model_path="face_recognition_model.gallery",
+                gallery_client=GalleryClient(gallery_socket) if gallery_socket else None
+            )
         
         # Servisi başlat
         print("\n" + "="*60)
@@ -80,6 +97,10 @@ if __name__ == "__main__":
         print("Çıkmak için 'q' tuşuna basın")
         print("="*60 + "\n")
         
+        # SIGHUP: model dosyası değişikliğini beklemeden yeniden yükle
+        if recognition_service.reloader is not None:
+            signal.signal(signal.SIGHUP, lambda signum, frame: recognition_service.reloader.trigger())
+
         recognition_service.start(show_window=True)
         
     except Exception as e:
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Galeri modları için doğruluk / gecikme raporu
+Aynı galeri üzerinde 'full', 'aggregated' ve IVF indeksli eşleştiricileri karşılaştırır
+
+Kullanım:
+    python benchmark_matcher.py --model face_recognition_model.gallery --synthetic-persons 5000
+"""
+import argparse
+import logging
+import time
+import numpy as np
+from ModelTrainer import FaceRecognitionTrainer
+from FaceMatcher import FaceMatcher, AggregatedFaceMatcher
+from GalleryIndex import IVFIndex
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+def add_synthetic_persons(encodings, ids, person_count: int, images_per_person: int = 7, seed: int = 0):
+    """Gerçek galerinin kişi içi dağılımına benzeyen sentetik kişiler ekler"""
+    rng = np.random.default_rng(seed)
+    encodings = np.asarray(encodings, dtype=np.float32)
+    ids = np.asarray(ids)
+
+    # Kişi içi sapmayı gerçek veriden tahmin et
+    spreads = [encodings[ids == pid].std(axis=0).mean() for pid in np.unique(ids) if np.sum(ids == pid) > 1]
+    spread = float(np.mean(spreads)) if spreads else 0.02
+    mean_norm = float(np.linalg.norm(encodings, axis=1).mean()) if len(encodings) else 1.0
+
+    centers = rng.normal(size=(person_count, encodings.shape[1])).astype(np.float32)
+    centers *= mean_norm / np.linalg.norm(centers, axis=1, keepdims=True)
+
+    noise = rng.normal(scale=spread, size=(person_count, images_per_person, encodings.shape[1])).astype(np.float32)
+    synthetic = (centers[:, None, :] + noise).reshape(-1, encodings.shape[1])
+
+    next_id = int(ids.max()) + 1 if len(ids) else 1
+    synthetic_ids = np.repeat(np.arange(next_id, next_id + person_count), images_per_person)
+
+    return np.vstack([encodings, synthetic]), np.concatenate([ids, synthetic_ids])
+
+
+def split_gallery(encodings, ids, impostor_every: int = 5):
+    """
+    Galeriyi sorgu ve referans kümelerine ayırır:
+    - Her kişinin son görüntüsü gerçek (genuine) sorgu olarak ayrılır
+    - Her N. kişi galeriden tamamen çıkarılır ve sahte (impostor) sorgu olur
+    """
+    gallery_rows, genuine_rows, impostor_rows = [], [], []
+
+    for n, pid in enumerate(np.unique(ids)):
+        rows = np.flatnonzero(ids == pid)
+        if impostor_every and n % impostor_every == impostor_every - 1:
+            impostor_rows.extend(rows)
+        elif len(rows) > 1:
+            gallery_rows.extend(rows[:-1])
+            genuine_rows.append(rows[-1])
+        else:
+            gallery_rows.extend(rows)
+
+    return np.asarray(gallery_rows), np.asarray(genuine_rows, dtype=np.intp), np.asarray(impostor_rows, dtype=np.intp)
+
+
+def evaluate(matcher: FaceMatcher, queries, expected_ids, tolerance: float, batch_size: int, repeats: int) -> dict:
+    """Eşleştiricinin doğruluğunu ve sorgu başına gecikmesini ölçer"""
+    correct = 0
+    false_accepts = 0
+
+    result = matcher.match(queries, tolerance=tolerance)
+    gallery_ids = np.asarray(matcher.ids)
+    for i, expected in enumerate(expected_ids):
+        matched = gallery_ids[result['indices'][i]] if result['matches'][i] else None
+        if expected is None:
+            false_accepts += matched is not None
+        else:
+            correct += matched == expected
+
+    # Gecikme: frame başına batch_size yüz ile tekrar tekrar eşleştir
+    batches = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for batch in batches:
+            matcher.match(batch, tolerance=tolerance)
+    elapsed = time.perf_counter() - start
+
+    genuine_count = sum(expected is not None for expected in expected_ids)
+    impostor_count = len(expected_ids) - genuine_count
+
+    return {
+        'gallery_rows': len(matcher.compact) if isinstance(matcher, AggregatedFaceMatcher) else len(matcher),
+        'accuracy': correct / genuine_count if genuine_count else 0.0,
+        'false_accept': false_accepts / impostor_count if impostor_count else 0.0,
+        'ms_per_face': elapsed * 1000 / (repeats * len(queries)),
+        'fallback_rate': getattr(matcher, 'fallback_count', 0) / ((repeats + 1) * len(queries))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Galeri modu doğruluk/gecikme raporu")
+    parser.add_argument('--model', default="face_recognition_model.gallery", help="Model dosyası")
+    parser.add_argument('--synthetic-persons', type=int, default=0, help="Eklenecek sentetik kişi sayısı")
+    parser.add_argument('--tolerance', type=float, default=0.6)
+    parser.add_argument('--batch-size', type=int, default=4, help="Frame başına yüz sayısı")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--n-probe', type=int, default=8, help="IVF sorgu başına taranacak küme")
+    args = parser.parse_args()
+
+    trainer = FaceRecognitionTrainer(model_save_path=args.model, use_cache=False)
+    if not trainer.load_model():
+        raise SystemExit("Model yüklenemedi")
+
+    encodings, ids = np.asarray(trainer.known_face_encodings, dtype=np.float32), np.asarray(trainer.known_face_ids)
+    if args.synthetic_persons:
+        encodings, ids = add_synthetic_persons(encodings, ids, args.synthetic_persons)
+
+    gallery_rows, genuine_rows, impostor_rows = split_gallery(encodings, ids)
+    queries = encodings[np.concatenate([genuine_rows, impostor_rows])]
+    expected_ids = [ids[row] for row in genuine_rows] + [None] * len(impostor_rows)
+
+    gallery = (encodings[gallery_rows], [str(pid) for pid in ids[gallery_rows]], list(ids[gallery_rows]))
+
+    print("\n" + "="*78)
+    print("GALERİ MODU KARŞILAŞTIRMASI")
+    print("="*78)
+    print(f"Galeri: {len(gallery_rows)} encoding, {len(np.unique(ids[gallery_rows]))} kişi | "
+          f"Sorgu: {len(genuine_rows)} gerçek, {len(impostor_rows)} sahte")
+    print("-"*78)
+    print(f"{'Mod':<12}{'Satır':>10}{'Kurulum (ms)':>14}{'Doğruluk':>11}{'Yanlış kabul':>14}{'ms/yüz':>10}{'Geri dönüş':>12}")
+
+    builders = (
+        ('full', lambda: FaceMatcher(*gallery)),
+        ('aggregated', lambda: AggregatedFaceMatcher(*gallery)),
+        (f'ivf/{args.n_probe}', lambda: FaceMatcher(*gallery, index=IVFIndex.build(gallery[0], n_probe=args.n_probe)))
+    )
+
+    for mode, build in builders:
+        start = time.perf_counter()
+        matcher = build()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        report = evaluate(matcher, queries, expected_ids, args.tolerance, args.batch_size, args.repeats)
+        print(f"{mode:<12}{report['gallery_rows']:>10}{build_ms:>14.1f}{report['accuracy']:>11.3f}"
+              f"{report['false_accept']:>14.3f}{report['ms_per_face']:>10.4f}{report['fallback_rate']:>12.3f}")
+
+    print("="*78 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,4 +5,26 @@ API_BASE_URL = f"{HOST}:{PORT}/api/"
 TIMEOUT = 3 #seconds
 
 BASE_DIR = Path(__file__).parent
-CUSTOMER_FACES = "customers/faces/"
\ No newline at end of file
+CUSTOMER_FACES = "customers/faces/"
+CUSTOMER_FACES_MANIFEST = "customers/faces/manifest/"
+
+# Manifest ve içerik özetine göre adreslenen görüntü önbelleği
+CLIENT_CACHE_DIR = BASE_DIR / "client_cache"
+
+# Eğitim görüntüsü indirme ayarları
+DOWNLOAD_WORKERS = 8  # Aynı anda uçuşta olabilecek en fazla indirme
+DOWNLOAD_RETRIES = 3  # İstek başına tekrar deneme
+DOWNLOAD_BACKOFF = 0.5  # Tekrar denemeler arası üstel bekleme katsayısı (saniye)
+
+# Geçiş kayıtları: gönderilemeyen olaylar yerel SQLite kuyruğunda (outbox) saklanır
+ACCESS_LOG_OUTBOX = BASE_DIR / "access_log_outbox.sqlite3"
+ACCESS_LOG_BATCH_SIZE = 50  # Tek seferde gönderilecek en fazla olay
+ACCESS_LOG_FLUSH_INTERVAL = 1.0  # Gönderici uyanma aralığı (saniye)
+ACCESS_LOG_MAX_BACKOFF = 60.0  # Sunucuya ulaşılamazken en uzun bekleme (saniye)
+ACCESS_LOG_SNAPSHOT_QUALITY = 80  # Snapshot JPEG kalitesi (0-100)
+ACCESS_LOG_SNAPSHOT_FACE_CROP = True  # Yalnızca yüz bölgesi gönderilir
+ACCESS_LOG_SNAPSHOT_RATE = 30  # Dakikada en fazla snapshot (fazlası atılır, geçiş kaydı yine gönderilir)
+
+# Galeri servisi: galeri tek süreçte tutulur, kamera süreçleri Unix soketiyle sorgular
+GALLERY_SOCKET = BASE_DIR / "gallery.sock"
+GALLERY_CHECK_INTERVAL = 30  # inotify yoksa model dosyası değişikliği kontrol aralığı (saniye)
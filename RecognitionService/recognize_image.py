@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tek bir görüntüdeki yüzleri tanıyan script
+Galeri servisi çalışıyorsa ona sorar, yoksa modeli kendisi yükler
+"""
+import os
+import sys
+import argparse
+import logging
+from ModelTrainer import FaceRecognitionTrainer
+from GalleryServer import GalleryClient
+from config import GALLERY_SOCKET
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = "face_recognition_model.gallery"
+
+
+def connect_gallery(socket_path: str):
+    """
+    Galeri servisine bağlanır; soket dosyası yoksa ya da servis yanıt vermiyorsa
+    (ör. çöken servisten kalan soket) None döner
+    """
+    if not socket_path or not os.path.exists(socket_path):
+        return None
+
+    gallery_client = GalleryClient(socket_path)
+    try:
+        gallery_client.info()
+    except (ConnectionError, RuntimeError) as e:
+        logger.warning(f"Galeri servisi yanıt vermiyor ({e}), model yerel olarak yüklenecek")
+        gallery_client.close()
+        return None
+
+    logger.info(f"Galeri servisi kullanılıyor: {socket_path}")
+    return gallery_client
+
+
+def recognize(image_path: str, tolerance: float, socket_path: str = None):
+    """Görüntüdeki yüzleri tanır"""
+    trainer = FaceRecognitionTrainer(model_save_path=MODEL_PATH, use_cache=False)
+
+    gallery_client = connect_gallery(socket_path)
+    if gallery_client is not None:
+        try:
+            return trainer.recognize_face(image_path, tolerance=tolerance, gallery_client=gallery_client)
+        except (ConnectionError, RuntimeError) as e:
+            # Servis sorgu sırasında kapandı: yerel eşleştirmeyle devam edilir
+            logger.warning(f"Galeri servisi sorgulanamadı ({e}), model yerel olarak yüklenecek")
+        finally:
+            gallery_client.close()
+
+    if not trainer.load_model():
+        return None
+    return trainer.recognize_face(image_path, tolerance=tolerance)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Görüntüdeki yüzleri tanır")
+    parser.add_argument('image', help="Tanınacak görüntü")
+    parser.add_argument('--tolerance', type=float, default=0.6, help="Eşleştirme toleransı")
+    parser.add_argument('--socket', default=str(GALLERY_SOCKET), help="Galeri servisi soketi (yoksa model yüklenir)")
+    args = parser.parse_args()
+
+    faces = recognize(args.image, args.tolerance, args.socket)
+    if faces is None:
+        sys.exit(1)
+
+    for face in faces:
+        print(f"{face['name']} (ID: {face['user_id']}, Güven: %{face['confidence']*100:.1f})")
+
+    sys.exit(0)
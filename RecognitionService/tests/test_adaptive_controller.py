@@ -0,0 +1,57 @@
+"""
+Uyarlamalı işleme denetleyicisi testleri
+
+Çalıştırma (RecognitionService dizininde):
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AdaptiveController import AdaptiveController
+
+
+def controller(**params):
+    return AdaptiveController(latency_budget=0.25, start_level=2, downgrade_cooldown=0.0, upgrade_cooldown=0.0,
+                              **params)
+
+
+class AdaptiveControllerTests(unittest.TestCase):
+
+    def test_slow_detections_step_down(self):
+        # Yavaş makinede tüm sonuçlar max_result_age'i aşıp atılsa da gecikmeleri ölçülür
+        adaptive = controller()
+        for _ in range(3):
+            adaptive.observe(1.5, compute=0.9)
+        self.assertEqual(adaptive.level, 5)
+
+    def test_fast_detections_step_up(self):
+        adaptive = controller()
+        adaptive.observe(0.05, compute=0.04)
+        self.assertEqual(adaptive.level, 1)
+
+    def test_slow_encoding_steps_down(self):
+        adaptive = controller()
+        adaptive.observe(0.2, compute=0.1)
+        level = adaptive.level
+
+        adaptive.observe_encoding(3.0, compute=2.0)
+
+        self.assertEqual(adaptive.level, level + 1)
+        self.assertEqual(adaptive.stats['encode_ms'], 2000.0)
+
+    def test_old_encoding_measurement_expires(self):
+        adaptive = controller(encode_window=0.0, smoothing=1.0)
+        adaptive.observe(0.2)
+        adaptive.observe_encoding(3.0)
+        level = adaptive.level
+
+        # Kadrajda yeni yüz yok: eski encoding ölçümü ayarı ucuz seviyede tutmaz
+        adaptive.observe(0.05)
+        self.assertEqual(adaptive.level, level - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Eşleştirici testleri
+
+Çalıştırma (RecognitionService dizininde):
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FaceMatcher import FaceMatcher, AggregatedFaceMatcher, ENCODING_DIM
+
+
+def synthetic_gallery(person_count: int = 20, images_per_person: int = 5, spread: float = 0.03, seed: int = 0):
+    """Kişi başına bir merkez etrafında dağılmış sentetik encoding'ler"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0, 0.1, (person_count, ENCODING_DIM))
+    encodings = np.repeat(centers, images_per_person, axis=0)
+    encodings += rng.normal(0, spread, encodings.shape)
+    ids = np.repeat(np.arange(1, person_count + 1), images_per_person)
+    names = [f"kisi-{user_id}" for user_id in ids]
+    return encodings.astype(np.float32), names, ids, centers
+
+
+def brute_force_match(encodings: np.ndarray, queries: np.ndarray):
+    """face_recognition.face_distance ile aynı: her sorgu için float64 np.linalg.norm taraması"""
+    distances = np.array([np.linalg.norm(encodings.astype(np.float64) - query, axis=1) for query in queries])
+    best = np.argmin(distances, axis=1)
+    return best, distances[np.arange(len(queries)), best]
+
+
+class FaceMatcherTests(unittest.TestCase):
+
+    def setUp(self):
+        self.encodings, self.names, self.ids, _ = synthetic_gallery()
+        self.matcher = FaceMatcher(self.encodings, self.names, self.ids)
+        rng = np.random.default_rng(2)
+        self.queries = np.concatenate([
+            self.encodings[::4] + rng.normal(0, 0.02, self.encodings[::4].shape),
+            rng.normal(0, 0.1, (10, ENCODING_DIM))  # galeride olmayan yüzler
+        ]).astype(np.float32)
+
+    def test_matches_brute_force(self):
+        expected_indices, expected_distances = brute_force_match(self.encodings, self.queries)
+
+        result = self.matcher.match(self.queries, tolerance=0.6)
+
+        np.testing.assert_array_equal(result['indices'], expected_indices)
+        np.testing.assert_allclose(result['distances'], expected_distances, rtol=1e-4, atol=1e-5)
+        np.testing.assert_array_equal(result['matches'], expected_distances <= 0.6)
+
+    def test_distance_matrix_matches_brute_force(self):
+        expected = np.array([np.linalg.norm(self.encodings.astype(np.float64) - query, axis=1)
+                             for query in self.queries])
+        np.testing.assert_allclose(self.matcher.distances(self.queries), expected, rtol=1e-4, atol=1e-5)
+
+    def test_labels_follow_indices(self):
+        result = self.matcher.match_with_labels(self.queries[:5], tolerance=0.6)
+        self.assertEqual(result['ids'], [int(self.ids[index]) for index in result['indices']])
+        self.assertEqual(result['names'], [self.names[index] for index in result['indices']])
+
+    def test_empty_gallery_and_no_queries(self):
+        result = FaceMatcher.empty().match_with_labels(self.queries[:2])
+        self.assertEqual(result['indices'].tolist(), [-1, -1])
+        self.assertEqual(result['ids'], [None, None])
+        self.assertFalse(result['matches'].any())
+
+        result = self.matcher.match(np.empty((0, ENCODING_DIM), dtype=np.float32))
+        self.assertEqual(len(result['indices']), 0)
+
+
+class AggregatedFaceMatcherTests(unittest.TestCase):
+
+    def setUp(self):
+        self.encodings, self.names, self.ids, self.centers = synthetic_gallery()
+        self.matcher = AggregatedFaceMatcher(self.encodings, self.names, self.ids, exemplars_per_person=2)
+
+    def test_distance_belongs_to_returned_row(self):
+        rng = np.random.default_rng(1)
+        queries = self.encodings[::3] + rng.normal(0, 0.02, self.encodings[::3].shape).astype(np.float32)
+
+        result = self.matcher.match(queries, tolerance=0.6)
+
+        real = np.linalg.norm(self.encodings[result['indices']] - queries, axis=1)
+        np.testing.assert_allclose(result['distances'], real, rtol=1e-4, atol=1e-5)
+
+    def test_centroid_does_not_inflate_confidence(self):
+        # Sorgu tam kişinin merkezinde: merkez mesafesi 0, gerçek satırlar ise daha uzak
+        person_rows = self.encodings[self.ids == 1]
+        query = person_rows.mean(axis=0, keepdims=True)
+
+        result = self.matcher.match(query, tolerance=0.6)
+
+        self.assertEqual(self.ids[result['indices'][0]], 1)
+        self.assertAlmostEqual(float(result['distances'][0]),
+                               float(np.linalg.norm(person_rows - query, axis=1).min()), places=4)
+        self.assertGreater(float(result['distances'][0]), 0.0)
+
+    def test_compact_gallery_has_no_duplicate_rows(self):
+        real_rows = self.matcher.compact_rows[~self.matcher.compact_is_centroid]
+        self.assertEqual(len(real_rows), len(set(real_rows.tolist())))
+        # Kişi başına bir merkez + iki temsilci
+        self.assertEqual(len(self.matcher.compact), len(self.centers) * 3)
+
+    def test_same_person_as_full_matcher(self):
+        full = FaceMatcher(self.encodings, self.names, self.ids)
+        queries = self.centers.astype(np.float32)
+
+        aggregated = self.matcher.match_with_labels(queries, tolerance=0.6)
+        expected = full.match_with_labels(queries, tolerance=0.6)
+
+        self.assertEqual(aggregated['ids'], expected['ids'])
+
+
+if __name__ == '__main__':
+    unittest.main()
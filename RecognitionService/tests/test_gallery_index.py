@@ -0,0 +1,104 @@
+"""
+Galeri indeksi testleri
+
+Çalıştırma (RecognitionService dizininde):
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FaceMatcher import FaceMatcher, ENCODING_DIM
+from GalleryIndex import BruteForceIndex, IVFIndex, build_index, save_index, load_index, gallery_fingerprint
+from test_face_matcher import synthetic_gallery
+
+
+class IVFIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.encodings, self.names, self.ids, _ = synthetic_gallery(person_count=60, images_per_person=5)
+        rng = np.random.default_rng(3)
+        self.queries = (self.encodings[::2] + rng.normal(0, 0.02, self.encodings[::2].shape)).astype(np.float32)
+        self.exact = FaceMatcher(self.encodings, self.names, self.ids).match(self.queries)
+
+    def test_full_probe_equals_exact_search(self):
+        index = IVFIndex.build(self.encodings, n_lists=16)
+        index.n_probe = index.n_lists
+
+        result = FaceMatcher(self.encodings, self.names, self.ids, index=index).match(self.queries)
+
+        np.testing.assert_array_equal(result['indices'], self.exact['indices'])
+        np.testing.assert_allclose(result['distances'], self.exact['distances'], rtol=1e-4, atol=1e-5)
+
+    def test_every_row_in_exactly_one_list(self):
+        index = IVFIndex.build(self.encodings, n_lists=16)
+        self.assertEqual(sorted(index.list_rows.tolist()), list(range(len(self.encodings))))
+        self.assertEqual(int(index.list_offsets[-1]), len(self.encodings))
+
+    def test_partial_probe_recall(self):
+        index = IVFIndex.build(self.encodings, n_lists=16, n_probe=4)
+
+        result = FaceMatcher(self.encodings, self.names, self.ids, index=index).match(self.queries)
+
+        # Sorgular kişi merkezine yakın: az küme taransa da en yakın satır neredeyse hep bulunur
+        recall = np.mean(result['indices'] == self.exact['indices'])
+        self.assertGreaterEqual(recall, 0.95)
+
+    def test_auto_index_type(self):
+        self.assertIsInstance(build_index(self.encodings, min_ivf_size=len(self.encodings) + 1), BruteForceIndex)
+        self.assertIsInstance(build_index(self.encodings, min_ivf_size=len(self.encodings)), IVFIndex)
+        self.assertIsInstance(build_index(np.empty((0, ENCODING_DIM), dtype=np.float32), index_type='ivf'),
+                              BruteForceIndex)
+        with self.assertRaises(ValueError):
+            build_index(self.encodings, index_type='hnsw')
+
+
+class IndexPersistenceTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.path = self.directory / 'model.index.npz'
+        self.encodings, _, _, _ = synthetic_gallery()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_ivf_round_trip(self):
+        index = IVFIndex.build(self.encodings, n_lists=8, n_probe=3)
+        self.assertTrue(save_index(index, self.path))
+
+        loaded = load_index(self.path, expected_fingerprint=gallery_fingerprint(self.encodings))
+
+        self.assertIsInstance(loaded, IVFIndex)
+        self.assertEqual(loaded.n_probe, 3)
+        self.assertEqual(loaded.fingerprint, index.fingerprint)
+        np.testing.assert_array_equal(loaded.centroids, index.centroids)
+        np.testing.assert_array_equal(loaded.list_offsets, index.list_offsets)
+        np.testing.assert_array_equal(loaded.list_rows, index.list_rows)
+
+        queries = self.encodings[:10]
+        for expected, actual in zip(index.candidates(queries), loaded.candidates(queries)):
+            np.testing.assert_array_equal(np.sort(expected), np.sort(actual))
+
+    def test_brute_round_trip(self):
+        self.assertTrue(save_index(BruteForceIndex.build(self.encodings), self.path))
+        loaded = load_index(self.path, expected_fingerprint=gallery_fingerprint(self.encodings))
+        self.assertIsInstance(loaded, BruteForceIndex)
+
+    def test_stale_or_missing_index_ignored(self):
+        self.assertIsNone(load_index(self.path))
+
+        save_index(IVFIndex.build(self.encodings, n_lists=8), self.path)
+        changed = self.encodings.copy()
+        changed[0, 0] += 1.0
+        self.assertIsNone(load_index(self.path, expected_fingerprint=gallery_fingerprint(changed)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Galeri dosya formatı testleri
+
+Çalıştırma (RecognitionService dizininde):
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FaceMatcher import ENCODING_DIM
+from GalleryStore import BLOCK_ALIGNMENT, write_gallery, read_gallery, read_header, is_gallery_file
+from test_face_matcher import synthetic_gallery
+
+
+class GalleryStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.path = self.directory / 'model.gallery'
+        self.encodings, _, self.ids, _ = synthetic_gallery(person_count=5, images_per_person=3)
+        # Çok baytlı UTF-8 isimler de sınırlardan doğru bölünmeli
+        self.names = [f"Şükrü Çağ-{user_id}" if user_id % 2 else f"ayşe-{user_id}" for user_id in self.ids]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_round_trip(self):
+        uploaded_at = np.arange(len(self.ids), dtype='<f8') + 1.5
+        write_gallery(self.path, self.encodings, self.names, self.ids, model_version=7, fingerprint=42,
+                      extra_blocks={'uploaded_at': uploaded_at})
+
+        gallery = read_gallery(self.path)
+
+        np.testing.assert_array_equal(gallery['encodings'], self.encodings)
+        np.testing.assert_allclose(gallery['sq_norms'], np.einsum('ij,ij->i', self.encodings, self.encodings),
+                                   rtol=1e-6)
+        np.testing.assert_array_equal(gallery['ids'], self.ids)
+        np.testing.assert_array_equal(gallery['uploaded_at'], uploaded_at)
+        self.assertEqual(list(gallery['names']), self.names)
+        self.assertEqual(gallery['names'][-1], self.names[-1])
+        self.assertEqual(gallery['names'][1:3], self.names[1:3])
+
+        header = gallery['header']
+        self.assertEqual((header['model_version'], header['fingerprint']), (7, 42))
+        self.assertEqual((header['count'], header['dim']), (len(self.ids), ENCODING_DIM))
+        for block in header['blocks'].values():
+            self.assertEqual(block['offset'] % BLOCK_ALIGNMENT, 0)
+
+    def test_empty_gallery(self):
+        write_gallery(self.path, np.empty((0, ENCODING_DIM), dtype=np.float32), [], [])
+
+        gallery = read_gallery(self.path)
+
+        self.assertEqual(gallery['encodings'].shape, (0, ENCODING_DIM))
+        self.assertEqual(len(gallery['names']), 0)
+
+    def test_corrupt_block_detected_on_request(self):
+        header = write_gallery(self.path, self.encodings, self.names, self.ids)
+        with open(self.path, 'r+b') as f:
+            f.seek(header['blocks']['encodings']['offset'])
+            f.write(b'\xff\xff\xff\xff')
+
+        with self.assertRaises(ValueError):
+            read_gallery(self.path, verify=True)
+        # Varsayılan yükleme checksum hesaplamaz (tüm sayfaları okumaz)
+        self.assertEqual(len(read_gallery(self.path)['ids']), len(self.ids))
+
+    def test_truncated_file_rejected_without_checksum(self):
+        header = write_gallery(self.path, self.encodings, self.names, self.ids)
+        with open(self.path, 'r+b') as f:
+            f.truncate(header['blocks']['names']['offset'])
+
+        with self.assertRaises(ValueError):
+            read_gallery(self.path)
+
+    def test_rewrite_replaces_file_and_leaves_no_temp(self):
+        write_gallery(self.path, self.encodings, self.names, self.ids, model_version=1)
+        old = read_gallery(self.path)
+
+        write_gallery(self.path, self.encodings[:3], self.names[:3], self.ids[:3], model_version=2)
+
+        # Önceki eşleme eski dosyayı görmeye devam eder, yeni okuma yeni sürümü görür
+        self.assertEqual(len(old['encodings']), len(self.ids))
+        self.assertEqual(read_header(self.path)['model_version'], 2)
+        self.assertEqual(os.listdir(self.directory), ['model.gallery'])
+
+    def test_is_gallery_file(self):
+        write_gallery(self.path, self.encodings, self.names, self.ids)
+        legacy = self.directory / 'model.pkl'
+        legacy.write_bytes(b'\x80\x04legacy pickle')
+
+        self.assertTrue(is_gallery_file(self.path))
+        self.assertFalse(is_gallery_file(legacy))
+        self.assertFalse(is_gallery_file(self.directory / 'yok.gallery'))
+        with self.assertRaises(ValueError):
+            read_header(legacy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Model yükleme testleri
+
+Çalıştırma (RecognitionService dizininde):
+    python -m unittest discover -s tests
+"""
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+
+try:
+    import face_recognition
+except ImportError:
+    face_recognition = None
+
+
+@unittest.skipIf(face_recognition is None, "face_recognition kurulu değil")
+class LegacyPickleTests(unittest.TestCase):
+
+    def setUp(self):
+        from ModelTrainer import FaceRecognitionTrainer
+        self.trainer_cls = FaceRecognitionTrainer
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def load(self, model_path):
+        trainer = self.trainer_cls(client=object(), model_save_path=str(model_path), use_cache=False)
+        self.assertTrue(trainer.load_model())
+        return trainer
+
+    def test_pickle_next_to_missing_gallery(self):
+        rng = np.random.default_rng(0)
+        encodings = [rng.normal(0, 0.1, 128) for _ in range(4)]
+        with open(self.directory / 'model.pkl', 'wb') as f:
+            pickle.dump({'encodings': encodings, 'names': ['a', 'a', 'b', 'c'], 'ids': [1, 1, 2, 3],
+                         'total_faces': 4}, f)
+
+        # Galeri dosyası yoksa yanındaki .pkl kullanılır
+        trainer = self.load(self.directory / 'model.gallery')
+
+        self.assertEqual(len(trainer.known_face_encodings), 4)
+        self.assertEqual(list(trainer.known_face_names), ['a', 'a', 'b', 'c'])
+        result = trainer.matcher.match(np.asarray(encodings[2:3], dtype=np.float32))
+        self.assertEqual(int(result['indices'][0]), 2)
+        self.assertTrue(result['matches'][0])
+
+    def test_shipped_model(self):
+        trainer = self.load(SERVICE_DIR / 'face_recognition_model.pkl')
+        self.assertGreater(len(trainer.known_face_encodings), 0)
+        self.assertEqual(len(trainer.known_face_ids), len(trainer.known_face_encodings))
+
+
+if __name__ == '__main__':
+    unittest.main()
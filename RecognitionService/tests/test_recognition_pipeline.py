@@ -0,0 +1,69 @@
+"""
+Tanıma hattı sonuç filtreleme testleri
+
+Çalıştırma (RecognitionService dizininde):
+    python -m unittest discover -s tests
+"""
+import os
+import queue
+import sys
+import time
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import face_recognition
+except ImportError:
+    face_recognition = None
+
+
+@unittest.skipIf(face_recognition is None, "face_recognition kurulu değil")
+class PipelineResultTests(unittest.TestCase):
+
+    def setUp(self):
+        from RecognitionPipeline import RecognitionPipeline
+        # Worker başlatılmaz; sonuçlar doğrudan kuyruğa konur
+        self.pipeline = RecognitionPipeline({}, max_result_age=1.0)
+        self.pipeline.result_queue = queue.Queue()
+
+    def put_detected(self, seq, age, tag=0):
+        self.pipeline._track_in_flight(tag, 1)
+        self.pipeline.result_queue.put(('detected', seq, time.monotonic() - age, 0.05, tag, [], []))
+
+    def put_encoded(self, seq, age, tag=0):
+        self.pipeline._track_in_flight(tag, 1)
+        self.pipeline.result_queue.put(('encoded', seq, time.monotonic() - age, 0.5, tag, [7],
+                                        np.zeros((1, 128), dtype=np.float32)))
+
+    def test_stale_detection_dropped(self):
+        self.put_detected(0, age=2.0)
+        self.put_detected(1, age=0.1)
+
+        results = list(self.pipeline.results())
+
+        self.assertEqual([(result['stage'], result['seq']) for result in results], [('stale', 0), ('detected', 1)])
+        self.assertGreater(results[0]['latency'], 1.0)
+        self.assertEqual(self.pipeline.stats['dropped_stale'], 1)
+        self.assertEqual(self.pipeline.in_flight, 0)
+
+    def test_out_of_order_detection_reported_stale(self):
+        self.put_detected(1, age=0.1)
+        self.put_detected(0, age=0.2)
+
+        self.assertEqual([result['stage'] for result in self.pipeline.results()], ['detected', 'stale'])
+
+    def test_slow_encoding_still_applied(self):
+        # Tespit + encoding max_result_age'i aştı, ama iz kimliği hâlâ geçerli
+        self.put_encoded(0, age=3.0)
+
+        results = list(self.pipeline.results())
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['keys'], [7])
+        self.assertEqual(self.pipeline.stats['dropped_stale'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,14 @@
 Model eğitim scripti
 Django'dan subprocess olarak çağrılabilir
 """
+import os
 import sys
+import fcntl
+import argparse
 import logging
 from ModelTrainer import FaceRecognitionTrainer
+from GalleryServer import GalleryClient
+from config import GALLERY_SOCKET
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,14 +19,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+MODEL_PATH = "face_recognition_model.gallery"
 
-def train():
+
+def train(index_config: dict = None, incremental: bool = False, workers: int = 1):
     """Modeli eğit ve kaydet"""
     logger.info("Model eğitimi başlatılıyor...")
 
-    trainer = FaceRecognitionTrainer(model_save_path="face_recognition_model.pkl")
+    trainer = FaceRecognitionTrainer(model_save_path=MODEL_PATH, index_config=index_config, workers=workers)
+
+    successful, total = trainer.train_model(incremental=incremental)
+    changes = trainer.last_training_changes
 
-    successful, total = trainer.train_model()
+    if incremental and changes:
+        if not changes['added'] and not changes['removed'] and not changes.get('manifest_updated'):
+            logger.info("Galeri güncel, kaydedilecek değişiklik yok")
+            return True
+
+        trainer.save_model(allow_empty=True)
+        logger.info(f"Model artımlı güncellendi: +{changes['added']} / -{changes['removed']} encoding")
+        return True
 
     if successful > 0:
         trainer.save_model()
@@ -32,6 +49,38 @@ def train():
         return False
 
 
+def notify_gallery_server():
+    """Galeri servisi çalışıyorsa yeni modeli hemen yüklemesini ister"""
+    if not os.path.exists(GALLERY_SOCKET):
+        return
+
+    client = GalleryClient(GALLERY_SOCKET)
+    try:
+        client.reload()
+        logger.info("Galeri servisine yeniden yükleme bildirildi")
+    except (ConnectionError, RuntimeError) as e:
+        # Servis dosya değişikliğini kendisi de yakalar
+        logger.warning(f"Galeri servisine bildirilemedi: {e}")
+    finally:
+        client.close()
+
+
 if __name__ == "__main__":
-    success = train()
+    parser = argparse.ArgumentParser(description="Yüz tanıma modelini eğitir")
+    parser.add_argument('--incremental', action='store_true', help="Yalnızca yeni/değişen yüz kayıtlarını işle")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Encoding için süreç sayısı")
+    parser.add_argument('--index', choices=['auto', 'brute', 'ivf'], default='auto', help="Galeri indeksi tipi")
+    parser.add_argument('--n-lists', type=int, default=None, help="IVF küme sayısı")
+    parser.add_argument('--n-probe', type=int, default=None, help="Sorgu başına taranacak IVF kümesi")
+    args = parser.parse_args()
+
+    # Aynı anda tetiklenen eğitimler sırayla çalışır (son manifest her zaman uygulanır)
+    with open(f"{MODEL_PATH}.lock", 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        success = train({'type': args.index, 'n_lists': args.n_lists, 'n_probe': args.n_probe},
+                        incremental=args.incremental, workers=args.workers)
+
+    if success:
+        notify_gallery_server()
+
     sys.exit(0 if success else 1)